@@ -2,6 +2,7 @@ from fastapi import APIRouter, Query, Response, HTTPException, Depends
 from typing import Optional, List
 
 from app.core.auth.guards import disallow_roles
+from app.utils.exceptions import OdooUnavailableError
 from app.analytics.argus_analytics_schemas import (
     TodayChangeItem,
     SeriesResponse,
@@ -29,6 +30,8 @@ def today_with_change(
         data = get_today_with_change(date=date, product_filter=product_filter, limit=limit)
         response.headers["Cache-Control"] = "public, max-age=120, stale-while-revalidate=600"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -64,6 +67,8 @@ def series(
         )
         response.headers["Cache-Control"] = "public, max-age=120, stale-while-revalidate=600"
         return out
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -79,6 +84,8 @@ def forward_curve(
         out = get_forward_curve(description=description, on=on, delivery=delivery)
         response.headers["Cache-Control"] = "public, max-age=600, stale-while-revalidate=1800"
         return out
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -107,5 +114,7 @@ def top_movers(
         )
         response.headers["Cache-Control"] = "public, max-age=120, stale-while-revalidate=600"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
@@ -8,6 +8,7 @@ from app.db.models.activation import ActivationToken
 from app.auth.security_activation import hash_token
 from app.auth.security_passwords import hash_password
 from app.auth.security_jwt import create_access_token
+from app.core.auth.session_manager import invalidate_user_cache
 from app.config.settings import AUTH_COOKIES_ENABLED, COOKIE_SECURE, COOKIE_SAMESITE, COOKIE_DOMAIN
 
 router = APIRouter(prefix="/auth/activation", tags=["auth"])
@@ -81,6 +82,7 @@ def complete(t: str, body: ActivationCompleteRequest, response: Response, db: Se
     # Marcar token usado
     token.used_at = datetime.now(timezone.utc)  # type: ignore[assignment]
     db.commit()
+    invalidate_user_cache(int(user.id))
 
     # Emitir sesión como en /auth/login
     try:
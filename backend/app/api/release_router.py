@@ -5,7 +5,7 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 
 from app.db.database import get_db
@@ -63,7 +63,8 @@ def list_releases(
     q: Optional[str] = Query(None, description="Filtro por coincidencia en title o version"),
     type: Optional[str] = Query(None, description="Filtrar por type"),
 ):
-    query = db.query(Release)
+    # Secciones en una sola query IN (...) en vez de una por release al serializar
+    query = db.query(Release).options(selectinload(Release.sections))
     if q:
         like = f"%{q}%"
         query = query.filter((Release.title.ilike(like)) | (Release.version.ilike(like)))
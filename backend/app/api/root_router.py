@@ -61,3 +61,11 @@ router.include_router(preferences_router)
 # Sharing (invitaciones Plaid)
 from app.api.sharing_router import router as sharing_router
 router.include_router(sharing_router)
+
+# Auditoría (consultas de administración)
+from app.api.audit_router import router as audit_router
+router.include_router(audit_router)
+
+# Analítica de permanencia en páginas (/analytics)
+from app.audit.audit_analytics import router as page_analytics_router
+router.include_router(page_analytics_router)
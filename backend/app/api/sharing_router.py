@@ -8,6 +8,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.orm import joinedload
 from app.core.auth.session_manager import get_current_user
 from app.db.database import SessionLocal
 from app.db.models import User, SharingInvitation, SharingSnapshot, PlaidItem
@@ -188,7 +189,12 @@ async def create_invitation(body: CreateInvitationBody, background_tasks: Backgr
 @router.get("/invitations/token/{token}", response_model=InvitationPublicView)
 def get_invitation_public(token: str):
     with SessionLocal() as db:
-        inv = db.query(SharingInvitation).filter(SharingInvitation.token == token).first()
+        inv = (
+            db.query(SharingInvitation)
+            .options(joinedload(SharingInvitation.inviter))
+            .filter(SharingInvitation.token == token)
+            .first()
+        )
         if not inv:
             raise HTTPException(status_code=404, detail="Invitación no encontrada")
         inv_expires_at = _as_aware_utc(getattr(inv, "expires_at", None))
@@ -420,7 +426,12 @@ async def delete_invitation(invitation_id: int, user: User = Depends(get_current
 async def revoke_invitation(invitation_id: int, background_tasks: BackgroundTasks, body: RevokeBody | None = None, user: User = Depends(get_current_user)):
     logger.info("sharing.revoke.request", extra={"invitation_id": invitation_id, "user_id": getattr(user,'id',None)})
     with SessionLocal() as db:
-        inv = db.query(SharingInvitation).filter(SharingInvitation.id == invitation_id).first()
+        inv = (
+            db.query(SharingInvitation)
+            .options(joinedload(SharingInvitation.inviter), joinedload(SharingInvitation.invitee))
+            .filter(SharingInvitation.id == invitation_id)
+            .first()
+        )
         if not inv:
             raise HTTPException(status_code=404, detail="Invitación no encontrada")
         if getattr(inv, "inviter_user_id") != user.id:
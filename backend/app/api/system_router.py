@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.config.settings import APP_NAME, DEBUG
-from fastapi.responses import RedirectResponse, Response
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.config.settings import APP_NAME, DEBUG, PROFILER_ENABLED, PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS
+from fastapi.responses import PlainTextResponse, RedirectResponse, Response
 from app.config.settings import ROOT_PATH
 from app.core.auth.session_manager import get_current_user
 from app.core.auth.guards import require_admin
 from app.db import models
-from app.utils.adapters.cache_adapter import is_redis_enabled
-from app.utils.metrics import snapshot as metrics_snapshot
+from app.utils.adapters.cache_adapter import is_redis_enabled, is_invalidation_bus_ready, l1_stats
+from app.utils.metrics import increment, snapshot as metrics_snapshot
 from app.observability.prometheus_exporter import render_prometheus_text
+from app.services.cache_warmer import warmer_status, trigger_async as trigger_cache_warmer
+from app.observability import profiler
 
 router = APIRouter()
 
@@ -40,12 +45,99 @@ def admin_ping(_: models.User = Depends(require_admin)):
     return {"ok": True}
 
 
+@router.get("/admin/cache/warmer")
+def admin_cache_warmer_status(_: models.User = Depends(require_admin)):
+    """Cobertura y errores de la última pasada del cache warmer en el clúster."""
+    return warmer_status()
+
+
+@router.post("/admin/cache/warmer/run", status_code=202)
+def admin_cache_warmer_run(_: models.User = Depends(require_admin)):
+    # Se ejecuta en segundo plano; si otro worker tiene el lock, la pasada se omite
+    trigger_cache_warmer("manual")
+    return {"accepted": True}
+
+
+def _require_profiler() -> None:
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+@router.post("/admin/profile", dependencies=[Depends(_require_profiler)])
+async def admin_profile(
+    _: models.User = Depends(require_admin),
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=0.5, le=1000),
+    idle: bool = Query(False, description="Incluir hilos en espera (wait/select/recv)"),
+):
+    """Muestrea las pilas de este worker durante `seconds` y devuelve un fichero collapsed.
+
+    Abrir con speedscope o `flamegraph.pl profile.collapsed > profile.svg`.
+    """
+    if seconds > PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Máximo {PROFILER_MAX_SECONDS} segundos")
+    if not profiler.try_acquire_slot():
+        raise HTTPException(status_code=409, detail="Ya hay un perfil en curso en este worker")
+    try:
+        sampler = profiler.Sampler(interval_ms / 1000.0, skip_idle=not idle).start()
+        # El bucle de eventos queda libre: se muestrean también las requests async en curso
+        await asyncio.sleep(seconds)
+        body = await asyncio.to_thread(sampler.stop)
+    finally:
+        profiler.release_slot()
+    increment("profiler_runs", tags={"kind": "worker"})
+    filename = f"profile-{os.getpid()}-{int(time.time())}.collapsed"
+    return PlainTextResponse(
+        body,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Pid": str(os.getpid()),
+            "X-Profile-Samples": str(sampler.samples),
+        },
+    )
+
+
+@router.post("/admin/profile/token", dependencies=[Depends(_require_profiler)])
+def admin_profile_token(
+    path: str = Query(..., description="Ruta exacta a perfilar, p. ej. /odoo/pipeline"),
+    method: str = Query("GET"),
+    ttl: int = Query(300, ge=1, le=profiler.MAX_TOKEN_TTL),
+    _: models.User = Depends(require_admin),
+):
+    """Token firmado para perfilar requests a MÉTODO + ruta con la cabecera X-Profile-Token."""
+    try:
+        token, exp = profiler.sign_request_token(method, path, ttl)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"header": profiler.TOKEN_HEADER, "value": token, "expires_at": exp}
+
+
+@router.get("/admin/profile/requests/{profile_id}", dependencies=[Depends(_require_profiler)])
+def admin_profile_request(
+    profile_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    _: models.User = Depends(require_admin),
+):
+    """Perfil de una request (id de la cabecera X-Profile-Id), de cualquier worker."""
+    data = profiler.get_request_profile(profile_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado o caducado")
+    if format == "json":
+        return data
+    return PlainTextResponse(
+        str(data.get("collapsed") or ""),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'},
+    )
+
+
 @router.get("/debug/cache")
 def debug_cache_status():
     if not DEBUG:
         raise HTTPException(status_code=404, detail="Not found")
     return {
         "redis_enabled": is_redis_enabled(),
+        "invalidation_bus": is_invalidation_bus_ready(),
+        "l1": l1_stats(),
     }
 
 
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Request
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
-from jose import jwt, JWTError
-from app.config.settings import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_AUDIENCE
+from app.audit.dwell_store import query_dwell, record
+from app.config.settings import ANALYTICS_DWELL_MAX_BATCH
+from app.core.auth.guards import require_admin
+from app.core.auth.token_verifier import resolve_token_payload
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 logger = logging.getLogger("app.analytics")
@@ -17,39 +20,57 @@ class PageDwellEvent(BaseModel):
     meta: Optional[Dict[str, Any]] = Field(None, description="Campos adicionales opcionales")
 
 
+class PageDwellBatch(BaseModel):
+    events: List[PageDwellEvent] = Field(..., min_length=1, description="Eventos acumulados por el frontend")
+
+
 def _get_user_id(request: Request) -> str:
-    auth = request.headers.get("authorization") or request.headers.get("Authorization")
-    if not auth or not auth.lower().startswith("bearer "):
-        return "-"
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
-        sub = payload.get("sub")
-        return str(sub) if sub is not None else "-"
-    except JWTError:
-        return "-"
+    # Payload ya verificado por los middlewares (request.state), sin decodificar de nuevo
+    payload = resolve_token_payload(request.scope)
+    sub = payload.get("sub") if payload else None
+    return str(sub) if sub is not None else "-"
+
+
+def _ingest(events: List[PageDwellEvent], request: Request) -> int:
+    n = record((e.path, e.duration_ms, e.ts) for e in events)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("page_dwell events=%d user_id=%s", n, _get_user_id(request))
+    return n
 
 
 @router.post("/page_dwell")
 async def page_dwell(event: PageDwellEvent, request: Request):
     """Registra un evento de permanencia en una página del frontend.
 
-    No persiste en DB; solo escribe en logs para análisis en tu stack de logs.
+    Se agrega en memoria y se persiste por (día, ruta) en `page_dwell_daily`;
+    para varias páginas usar `/analytics/page_dwell/batch`.
     """
-    ip = request.headers.get("x-forwarded-for", "").split(",")[0].strip() or (
-        request.client.host if request.client else "-"
-    )
-    ua = request.headers.get("user-agent", "-")
-    user_id = _get_user_id(request)
-    logger.info(
-        "page_dwell path=%s duration_ms=%.2f user_id=%s ip=%s ua=%s referrer=%s meta=%s ts=%s",
-        event.path,
-        event.duration_ms,
-        user_id,
-        ip,
-        ua,
-        event.referrer or "-",
-        event.meta or {},
-        event.ts if event.ts is not None else "-",
-    )
+    _ingest([event], request)
     return {"success": True}
+
+
+@router.post("/page_dwell/batch")
+async def page_dwell_batch(batch: PageDwellBatch, request: Request):
+    """Registra varios eventos de permanencia en una sola llamada (máx. ANALYTICS_DWELL_MAX_BATCH)."""
+    if len(batch.events) > ANALYTICS_DWELL_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"Máximo {ANALYTICS_DWELL_MAX_BATCH} eventos por lote")
+    return {"success": True, "accepted": _ingest(batch.events, request)}
+
+
+@router.get("/page_dwell/stats", dependencies=[Depends(require_admin)])
+def page_dwell_stats(
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    path: Optional[str] = None,
+    group_by: str = Query("path", pattern="^(path|day|path_day)$"),
+    limit: int = Query(200, ge=1, le=5000),
+):
+    """Conteo, media y p50/p95 de permanencia (por defecto, últimos 7 días por ruta).
+
+    Incluye lo volcado por los workers; el buffer en memoria se persiste cada
+    ANALYTICS_DWELL_FLUSH_INTERVAL segundos.
+    """
+    try:
+        return query_dwell(since=since, until=until, path=path, group_by=group_by, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,8 @@
 """Servicio de auditoría privada (solo backend).
 
-Registra eventos de autenticación, tiempos de request y sesiones en memoria.
+Registra eventos de autenticación y tiempos de request. Los eventos se entregan
+al pipeline asíncrono (`app.audit.audit_pipeline`), que los persiste por lotes en
+`audit_events`; rollups y consultas en `app.audit.audit_store`.
 """
 from __future__ import annotations
 import logging
@@ -8,6 +10,10 @@ import time
 import hashlib
 from typing import Optional, Dict, Any, Tuple
 
+from app.audit.audit_pipeline import emit
+from app.config.settings import AUDIT_SESSION_TTL
+from app.utils.adapters.cache_adapter import delete_cache, get_cache, set_cache
+
 logger = logging.getLogger("app.audit")
 
 
@@ -17,27 +23,28 @@ def _token_id(token: str) -> str:
 
 
 class SessionStore:
-    def __init__(self) -> None:
-        # token_id -> data
-        self._store: Dict[str, Dict[str, Any]] = {}
+    """Inicio de sesión por token en la caché compartida (Redis si está activo).
+
+    Las entradas caducan con el token (o tras AUDIT_SESSION_TTL si no trae exp):
+    el logout lo puede atender cualquier worker y nada crece sin límite.
+    """
+
+    _PREFIX = "audit:session:"
 
     def start(self, token: str, user_id: str, email: str, ip: str, ua: str, exp_ts: Optional[float]) -> str:
         tid = _token_id(token)
-        self._store[tid] = {
-            "user_id": user_id,
-            "email": email,
-            "ip": ip,
-            "ua": ua,
-            "start_ts": time.time(),
-            "exp_ts": exp_ts,
-        }
+        now = time.time()
+        ttl = int(exp_ts - now) if exp_ts else AUDIT_SESSION_TTL
+        if ttl > 0:
+            set_cache(self._PREFIX + tid, {"user_id": user_id, "start_ts": now, "exp_ts": exp_ts}, ttl)
         return tid
 
     def end(self, token: str) -> Tuple[Optional[float], Optional[Dict[str, Any]]]:
         tid = _token_id(token)
-        data = self._store.pop(tid, None)
-        if not data:
+        data = get_cache(self._PREFIX + tid)
+        if not isinstance(data, dict):
             return None, None
+        delete_cache(self._PREFIX + tid)
         duration = max(0.0, time.time() - float(data.get("start_ts", time.time())))
         return duration, data
 
@@ -47,43 +54,55 @@ session_store = SessionStore()
 
 def record_login_success(user_id: str, email: str, ip: str, ua: str, token: str, exp_ts: Optional[float]) -> None:
     tid = session_store.start(token=token, user_id=user_id, email=email, ip=ip, ua=ua, exp_ts=exp_ts)
-    logger.info(
-        "login success user_id=%s email=%s ip=%s ua=%s token_id=%s exp_ts=%s",
-        user_id,
-        email,
-        ip,
-        ua,
-        tid,
-        int(exp_ts) if exp_ts else "-",
+    emit(
+        "login_success",
+        user_id=user_id,
+        email=email,
+        ip=ip,
+        ua=ua,
+        extra={"token_id": tid, "exp_ts": int(exp_ts) if exp_ts else None},
     )
 
 
 def record_login_failure(email: str, ip: str, ua: str) -> None:
-    logger.warning("login failed email=%s ip=%s ua=%s", email, ip, ua)
+    emit("login_failure", email=email, ip=ip, ua=ua)
 
 
 def record_logout(user_id: str, email: str, ip: str, ua: str, token: Optional[str]) -> None:
     duration, data = (None, None)
     if token:
         duration, data = session_store.end(token)
-    logger.info(
-        "logout user_id=%s email=%s ip=%s ua=%s session_ms=%s",
-        user_id,
-        email,
-        ip,
-        ua,
-        f"{(duration or 0.0)*1000.0:.2f}",
+    emit(
+        "logout",
+        user_id=user_id,
+        email=email,
+        ip=ip,
+        ua=ua,
+        extra={"session_ms": round((duration or 0.0) * 1000.0, 2)},
     )
 
 
-def record_request_timing(method: str, path: str, status: int, duration_ms: float, user_id: Optional[str], ip: str, ua: str) -> None:
-    logger.info(
-        "request method=%s path=%s status=%s duration_ms=%.2f user_id=%s ip=%s ua=%s",
-        method,
-        path,
-        status,
-        duration_ms,
-        user_id if user_id is not None else "-",
-        ip,
-        ua,
+def record_request_timing(
+    method: str,
+    path: str,
+    status: int,
+    duration_ms: float,
+    user_id: Optional[str],
+    ip: str,
+    ua: str,
+    correlation_id: Optional[str] = None,
+    route: Optional[str] = None,
+) -> None:
+    # Sólo encola: el hilo escritor del pipeline serializa y escribe por lotes
+    emit(
+        "request",
+        method=method,
+        path=path,
+        route=route,
+        status=status,
+        duration_ms=round(duration_ms, 2),
+        user_id=user_id,
+        ip=ip,
+        ua=ua,
+        correlation_id=correlation_id,
     )
@@ -0,0 +1,297 @@
+"""
+Pipeline de auditoría no bloqueante.
+
+El camino de la request sólo paga un `put_nowait` en una cola acotada
+(AUDIT_QUEUE_SIZE). Un hilo escritor saca lotes de hasta AUDIT_BATCH_SIZE eventos
+(o lo acumulado tras AUDIT_FLUSH_INTERVAL) y los entrega a cada destino:
+
+- `stdout`: una línea JSON por evento, un solo write por lote.
+- `file`: JSONL en AUDIT_FILE_PATH con rotación por tamaño (AUDIT_FILE_MAX_BYTES,
+  AUDIT_FILE_BACKUPS).
+- `mysql`: INSERT multi-fila en `audit_events`.
+
+Backpressure: si la cola está llena el evento se descarta (nunca se bloquea la
+request) y se cuenta en `audit_dropped{reason="queue_full"}`; si un destino falla,
+el lote se pierde para ese destino y se cuenta en `audit_sink_errors` y
+`audit_dropped{reason="sink_error"}`. Los contadores se publican como métricas con un
+collector: el camino caliente no toca locks de métricas.
+"""
+from __future__ import annotations
+
+import abc
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import (
+    AUDIT_SINKS,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_INTERVAL,
+    AUDIT_FILE_PATH,
+    AUDIT_FILE_MAX_BYTES,
+    AUDIT_FILE_BACKUPS,
+)
+from app.utils.metrics import increment, register_collector, set_counter, set_gauge
+
+logger = logging.getLogger("app.audit.pipeline")
+
+_STOP = object()
+
+
+def _json_line(event: Dict[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+
+
+class AuditSink(abc.ABC):
+    """Destino de lotes de eventos. `write` se llama siempre desde el hilo escritor."""
+
+    name = "sink"
+
+    @abc.abstractmethod
+    def write(self, batch: List[Dict[str, Any]]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class StdoutJsonSink(AuditSink):
+    name = "stdout"
+
+    def __init__(self, stream: Any = None):
+        self.stream = stream or sys.stdout
+
+    def write(self, batch: List[Dict[str, Any]]) -> None:
+        self.stream.write("".join(_json_line(e) for e in batch))
+        self.stream.flush()
+
+
+class RotatingFileSink(AuditSink):
+    """JSONL con rotación por tamaño (audit.jsonl -> audit.jsonl.1 -> ... .N)."""
+
+    name = "file"
+
+    def __init__(self, path: str, *, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = max(0, backups)
+        self._fh: Optional[Any] = None
+
+    def _open(self) -> Any:
+        if self._fh is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        return self._fh
+
+    def _rotate(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self.backups == 0:
+            os.unlink(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def write(self, batch: List[Dict[str, Any]]) -> None:
+        data = "".join(_json_line(e) for e in batch)
+        fh = self._open()
+        if self.max_bytes > 0 and fh.tell() > 0 and fh.tell() + len(data) > self.max_bytes:
+            self._rotate()
+            fh = self._open()
+        fh.write(data)
+        fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class MySQLBatchSink(AuditSink):
+    """INSERT multi-fila en `audit_events` (una transacción por lote)."""
+
+    name = "mysql"
+    _COLUMNS = ("method", "path", "route", "status", "duration_ms", "user_id", "email", "ip", "ua", "correlation_id")
+
+    def write(self, batch: List[Dict[str, Any]]) -> None:
+        from sqlalchemy import insert
+        from app.db.database import engine
+        from app.db.models import AuditEvent
+
+        rows = []
+        for e in batch:
+            row = {c: e.get(c) for c in self._COLUMNS}
+            if row["path"] and len(row["path"]) > 1024:
+                row["path"] = row["path"][:1024]
+            if row["route"] and len(row["route"]) > 255:
+                row["route"] = row["route"][:255]
+            if row["ua"] and len(row["ua"]) > 512:
+                row["ua"] = row["ua"][:512]
+            row["ts"] = datetime.fromtimestamp(e["ts"], tz=timezone.utc).replace(tzinfo=None)
+            row["kind"] = e["kind"]
+            row["extra"] = e.get("extra")
+            rows.append(row)
+        with engine.begin() as conn:
+            conn.execute(insert(AuditEvent), rows)
+
+
+def build_sinks(names: List[str]) -> List[AuditSink]:
+    sinks: List[AuditSink] = []
+    for name in names:
+        key = name.strip().lower()
+        if key == "stdout":
+            sinks.append(StdoutJsonSink())
+        elif key == "file":
+            sinks.append(RotatingFileSink(AUDIT_FILE_PATH, max_bytes=AUDIT_FILE_MAX_BYTES, backups=AUDIT_FILE_BACKUPS))
+        elif key == "mysql":
+            sinks.append(MySQLBatchSink())
+        elif key:
+            logger.warning("audit.unknown_sink", extra={"sink": name})
+    return sinks
+
+
+class AuditPipeline:
+    def __init__(self, sinks: List[AuditSink], *, queue_size: int, batch_size: int, flush_interval: float):
+        self.sinks = sinks
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.01, flush_interval)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Contadores propios (publicados por collector); += bajo GIL basta para métricas
+        self.enqueued = 0
+        self.dropped_full = 0
+        self.dropped_sink = 0
+        self.written = 0
+        self.batches = 0
+
+    # --- camino de la request ---
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(event)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped_full += 1
+
+    # --- hilo escritor ---
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Vacía la cola (hasta `timeout`) y cierra los destinos."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        self.batches += 1
+        accepted = False
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+                accepted = True
+            except Exception as e:
+                self.dropped_sink += len(batch)
+                increment("audit_sink_errors", tags={"sink": sink.name})
+                logger.warning("audit.sink_failed", extra={"sink": sink.name, "events": len(batch), "error": str(e)})
+        # Sólo cuenta como escrito si algún destino aceptó el lote
+        if accepted:
+            self.written += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sinks": [s.name for s in self.sinks],
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped_queue_full": self.dropped_full,
+            "dropped_sink_error": self.dropped_sink,
+            "running": bool(self._thread is not None and self._thread.is_alive()),
+        }
+
+
+pipeline = AuditPipeline(
+    build_sinks(AUDIT_SINKS),
+    queue_size=AUDIT_QUEUE_SIZE,
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL,
+)
+
+
+def emit(kind: str, **fields: Any) -> None:
+    """Encola un evento de auditoría; nunca bloquea ni lanza."""
+    fields["ts"] = time.time()
+    fields["kind"] = kind
+    pipeline.emit(fields)
+
+
+def start_audit_pipeline() -> None:
+    pipeline.start()
+
+
+def stop_audit_pipeline() -> None:
+    pipeline.stop()
+
+
+def _collect_audit_metrics() -> None:
+    st = pipeline.stats()
+    set_gauge("audit_queue_depth", st["queue_depth"])
+    set_counter("audit_enqueued", st["enqueued"])
+    set_counter("audit_written", st["written"])
+    set_counter("audit_dropped", st["dropped_queue_full"], tags={"reason": "queue_full"})
+    set_counter("audit_dropped", st["dropped_sink_error"], tags={"reason": "sink_error"})
+
+
+register_collector(_collect_audit_metrics)
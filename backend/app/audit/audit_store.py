@@ -0,0 +1,545 @@
+"""
+Almacén consultable de auditoría sobre `audit_events` (escrita por lotes por el pipeline).
+
+- Particiones diarias (sólo MySQL): RANGE sobre TO_DAYS(ts), una partición `pYYYYMMDD`
+  por día más `p_future`. Cada pasada crea las de los próximos AUDIT_PARTITION_DAYS_AHEAD
+  días (REORGANIZE de `p_future`) y borra con DROP PARTITION las que superan
+  AUDIT_RETENTION_DAYS: la retención no genera DELETE masivos y las consultas por
+  rango de fechas sólo leen las particiones implicadas.
+- Rollups: un hilo por worker (con lock de clúster, sólo uno agrega) procesa los
+  minutos cerrados (anteriores a ahora - AUDIT_ROLLUP_LAG) desde la marca de agua:
+  - `audit_rollup_minute`: conteo, suma, máximo e histograma de latencia por
+    (minuto, ruta, método, status);
+  - `audit_user_activity`: requests y primera/última actividad por (día, usuario).
+  Filas y marca de agua se escriben en la misma transacción: cada minuto se agrega
+  exactamente una vez.
+- Consultas para la API de administración: eventos crudos (siempre acotados por
+  fechas), percentiles de latencia agregando histogramas (`histogram_quantile`) y
+  usuarios activos.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app.config.settings import (
+    AUDIT_ROLLUP_INTERVAL,
+    AUDIT_ROLLUP_LAG,
+    AUDIT_RETENTION_DAYS,
+    AUDIT_ROLLUP_RETENTION_DAYS,
+    AUDIT_PARTITION_DAYS_AHEAD,
+)
+from app.db.database import SessionLocal, engine
+from app.db.models import AuditEvent, AuditRollupMinute, AuditRollupState, AuditUserActivity
+from app.utils.adapters.cache_adapter import acquire_lock, release_lock
+from app.utils.metrics import histogram_quantile, increment, observe, set_gauge
+
+logger = logging.getLogger("app.audit.store")
+
+# Límites (ms) del histograma de latencia de los rollups; fijos para poder sumar filas
+ROLLUP_BUCKETS_MS: Tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Ruta de las requests que no resolvieron ninguna (404, assets...): evita cardinalidad por path
+UNMATCHED_ROUTE = "<unmatched>"
+
+_LOCK_NAME = "audit_rollup"
+_STATE_NAME = "rollup"
+# Máximo de minutos por transacción (acota memoria y duración de cada lote al ponerse al día)
+_MAX_WINDOW = timedelta(minutes=60)
+_TABLE = AuditEvent.__tablename__
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _floor_minute(dt: datetime) -> datetime:
+    return dt.replace(second=0, microsecond=0)
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# --- Particiones (MySQL) ---
+
+def _is_mysql() -> bool:
+    return engine.dialect.name == "mysql"
+
+
+def _partition_name(day: date) -> str:
+    return f"p{day:%Y%m%d}"
+
+
+def _partition_day(name: str) -> Optional[date]:
+    try:
+        return datetime.strptime(name[1:], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def list_partitions() -> List[Dict[str, Any]]:
+    """Particiones de `audit_events` (vacío si la tabla no está particionada o no es MySQL)."""
+    if not _is_mysql():
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS, DATA_LENGTH "
+                "FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND PARTITION_NAME IS NOT NULL "
+                "ORDER BY PARTITION_ORDINAL_POSITION"
+            ),
+            {"t": _TABLE},
+        ).all()
+    return [
+        {"name": name, "less_than": desc, "rows": int(rows_ or 0), "bytes": int(size or 0)}
+        for name, desc, rows_, size in rows
+    ]
+
+
+def _partition_clause(days: Iterable[date]) -> str:
+    parts = [
+        f"PARTITION {_partition_name(d)} VALUES LESS THAN (TO_DAYS('{d + timedelta(days=1):%Y-%m-%d}'))"
+        for d in days
+    ]
+    parts.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+    return ", ".join(parts)
+
+
+def maintain_partitions(today: Optional[date] = None) -> Dict[str, Any]:
+    """Crea las particiones de los próximos días y borra las que superan la retención."""
+    if not _is_mysql():
+        return {"partitioned": False}
+    today = today or _utcnow().date()
+    names = [p["name"] for p in list_partitions()]
+    if not names:
+        # Tabla creada por create_all (sin particiones): sólo se particiona si está vacía;
+        # con datos, lo hace la migración 20251022_audit_partitions_rollups en el deploy
+        with engine.connect() as conn:
+            has_rows = conn.execute(text(f"SELECT 1 FROM {_TABLE} LIMIT 1")).first() is not None
+        if has_rows:
+            logger.warning("audit.partitions_missing", extra={"table": _TABLE})
+            return {"partitioned": False}
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {_TABLE} PARTITION BY RANGE (TO_DAYS(ts)) ({_partition_clause([today])})"))
+        names = [_partition_name(today), "p_future"]
+
+    created: List[str] = []
+    existing = {d for d in (_partition_day(n) for n in names if n != "p_future") if d}
+    last = max(existing) if existing else today - timedelta(days=1)
+    wanted = [last + timedelta(days=i) for i in range(1, (today - last).days + AUDIT_PARTITION_DAYS_AHEAD + 1)]
+    if wanted and "p_future" in names:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {_TABLE} REORGANIZE PARTITION p_future INTO ({_partition_clause(wanted)})"))
+        created = [_partition_name(d) for d in wanted]
+
+    dropped: List[str] = []
+    if AUDIT_RETENTION_DAYS > 0:
+        cutoff = today - timedelta(days=AUDIT_RETENTION_DAYS)
+        old = sorted(d for d in existing if d < cutoff)
+        dropped = [_partition_name(d) for d in old]
+        if dropped:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {_TABLE} DROP PARTITION {', '.join(dropped)}"))
+    if created or dropped:
+        logger.info("audit.partitions", extra={"partitions_created": created, "partitions_dropped": dropped})
+    return {"partitioned": True, "created": created, "dropped": dropped}
+
+
+def purge_rollups(today: Optional[date] = None) -> int:
+    """Borra rollups más antiguos que AUDIT_ROLLUP_RETENTION_DAYS (pocas filas por minuto)."""
+    if AUDIT_ROLLUP_RETENTION_DAYS <= 0:
+        return 0
+    cutoff_day = (today or _utcnow().date()) - timedelta(days=AUDIT_ROLLUP_RETENTION_DAYS)
+    cutoff = datetime.combine(cutoff_day, datetime.min.time())
+    with engine.begin() as conn:
+        n = conn.execute(delete(AuditRollupMinute).where(AuditRollupMinute.minute < cutoff)).rowcount or 0
+        n += conn.execute(delete(AuditUserActivity).where(AuditUserActivity.day < cutoff_day)).rowcount or 0
+    return n
+
+
+# --- Rollups ---
+
+def _empty_buckets() -> List[int]:
+    return [0] * (len(ROLLUP_BUCKETS_MS) + 1)
+
+
+def _get_watermark(db: Session) -> Optional[datetime]:
+    state = db.get(AuditRollupState, _STATE_NAME)
+    if state is not None:
+        return state.watermark
+    # Primera pasada: desde el evento más antiguo que quede
+    first = db.execute(select(func.min(AuditEvent.ts))).scalar()
+    return _floor_minute(first) if first else None
+
+
+def _aggregate(db: Session, start: datetime, end: datetime) -> Tuple[Dict[tuple, list], Dict[tuple, list]]:
+    minutes: Dict[tuple, list] = {}
+    users: Dict[tuple, list] = {}
+    rows = db.execute(
+        select(
+            AuditEvent.ts, AuditEvent.route, AuditEvent.method, AuditEvent.status,
+            AuditEvent.duration_ms, AuditEvent.user_id,
+        )
+        .where(AuditEvent.ts >= start, AuditEvent.ts < end, AuditEvent.kind == "request")
+        .execution_options(yield_per=5000)
+    )
+    for ts, route, method, status, duration_ms, user_id in rows:
+        key = (_floor_minute(ts), route or UNMATCHED_ROUTE, method or "-", int(status or 0))
+        ms = float(duration_ms or 0.0)
+        agg = minutes.get(key)
+        if agg is None:
+            agg = minutes[key] = [0, 0.0, 0.0, _empty_buckets()]
+        agg[0] += 1
+        agg[1] += ms
+        agg[2] = max(agg[2], ms)
+        agg[3][bisect_left(ROLLUP_BUCKETS_MS, ms)] += 1
+        if user_id:
+            ukey = (ts.date(), str(user_id))
+            u = users.get(ukey)
+            if u is None:
+                users[ukey] = [1, ts, ts]
+            else:
+                u[0] += 1
+                u[1] = min(u[1], ts)
+                u[2] = max(u[2], ts)
+    return minutes, users
+
+
+def _merge_users(db: Session, users: Dict[tuple, list]) -> None:
+    by_day: Dict[date, List[str]] = {}
+    for day, uid in users:
+        by_day.setdefault(day, []).append(uid)
+    for day, uids in by_day.items():
+        existing = {
+            r.user_id: r
+            for r in db.execute(
+                select(AuditUserActivity).where(AuditUserActivity.day == day, AuditUserActivity.user_id.in_(uids))
+            ).scalars()
+        }
+        for uid in uids:
+            n, first, last = users[(day, uid)]
+            row = existing.get(uid)
+            if row is None:
+                db.add(AuditUserActivity(day=day, user_id=uid, requests=n, first_ts=first, last_ts=last))
+            else:
+                row.requests += n
+                row.first_ts = min(row.first_ts, first)
+                row.last_ts = max(row.last_ts, last)
+
+
+def _rollup_window(db: Session, start: datetime, end: datetime) -> int:
+    minutes, users = _aggregate(db, start, end)
+    db.add_all(
+        AuditRollupMinute(
+            minute=minute, route=route[:255], method=method, status=status,
+            count=agg[0], sum_ms=round(agg[1], 3), max_ms=round(agg[2], 3), buckets=agg[3],
+        )
+        for (minute, route, method, status), agg in minutes.items()
+    )
+    _merge_users(db, users)
+    state = db.get(AuditRollupState, _STATE_NAME)
+    if state is None:
+        db.add(AuditRollupState(name=_STATE_NAME, watermark=end, updated_at=_utcnow()))
+    else:
+        state.watermark = end
+        state.updated_at = _utcnow()
+    db.commit()
+    return sum(agg[0] for agg in minutes.values())
+
+
+def run_rollup(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Agrega los minutos cerrados pendientes. Devuelve minutos y eventos procesados."""
+    until = _floor_minute((now or _utcnow()) - timedelta(seconds=max(0, AUDIT_ROLLUP_LAG)))
+    t0 = time.perf_counter()
+    windows = events = 0
+    with SessionLocal() as db:
+        start = _get_watermark(db)
+        if start is None:
+            return {"windows": 0, "events": 0, "watermark": None}
+        while start < until:
+            end = min(until, start + _MAX_WINDOW)
+            events += _rollup_window(db, start, end)
+            windows += 1
+            start = end
+    lag = (_utcnow() - start).total_seconds()
+    set_gauge("audit_rollup_lag_seconds", lag)
+    if windows:
+        increment("audit_rollup_events", events)
+        observe("audit_rollup_seconds", time.perf_counter() - t0)
+    return {"windows": windows, "events": events, "watermark": start.isoformat()}
+
+
+def run_once() -> Optional[Dict[str, Any]]:
+    """Una pasada completa (particiones + rollups + purga) si este worker obtiene el lock."""
+    token = acquire_lock(_LOCK_NAME, max(300, AUDIT_ROLLUP_INTERVAL * 2))
+    if token is None:
+        return None
+    try:
+        result: Dict[str, Any] = {}
+        try:
+            result["partitions"] = maintain_partitions()
+        except Exception as e:
+            increment("audit_rollup_errors", tags={"stage": "partitions"})
+            logger.error("Audit: mantenimiento de particiones falló", extra={"error": str(e)})
+        result["rollup"] = run_rollup()
+        result["purged"] = purge_rollups()
+        return result
+    finally:
+        release_lock(_LOCK_NAME, token)
+
+
+def trigger_async() -> None:
+    """Lanza una pasada en segundo plano (para el endpoint de administración)."""
+    threading.Thread(target=run_once, name="audit-rollup-manual", daemon=True).start()
+
+
+def _loop() -> None:
+    delay = 10.0  # primera pasada poco después del arranque
+    while not _stop.wait(delay):
+        try:
+            run_once()
+        except Exception as e:  # nunca tumbar el hilo
+            increment("audit_rollup_errors", tags={"stage": "rollup"})
+            logger.error("Audit: error en la pasada de rollup", extra={"error": str(e)})
+        delay = float(AUDIT_ROLLUP_INTERVAL)
+
+
+def start_audit_rollup() -> bool:
+    """Arranca los rollups periódicos en este worker (idempotente)."""
+    global _thread
+    if AUDIT_ROLLUP_INTERVAL <= 0:
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="audit-rollup", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_audit_rollup() -> None:
+    _stop.set()
+
+
+# --- Consultas ---
+
+def _range(since: Optional[datetime], until: Optional[datetime], default: timedelta) -> Tuple[datetime, datetime]:
+    until = _naive_utc(until) or _utcnow()
+    since = _naive_utc(since) or until - default
+    if since >= until:
+        raise ValueError("since debe ser anterior a until")
+    return since, until
+
+
+def query_events(
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    kind: Optional[str] = None,
+    user_id: Optional[str] = None,
+    route: Optional[str] = None,
+    status: Optional[int] = None,
+    min_duration_ms: Optional[float] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Eventos crudos, más recientes primero. Paginación keyset con `before_id`."""
+    since, until = _range(since, until, timedelta(hours=1))
+    stmt = select(AuditEvent).where(AuditEvent.ts >= since, AuditEvent.ts < until)
+    if kind:
+        stmt = stmt.where(AuditEvent.kind == kind)
+    if user_id:
+        stmt = stmt.where(AuditEvent.user_id == user_id)
+    if route:
+        stmt = stmt.where(AuditEvent.route == route)
+    if status is not None:
+        stmt = stmt.where(AuditEvent.status == status)
+    if min_duration_ms is not None:
+        stmt = stmt.where(AuditEvent.duration_ms >= min_duration_ms)
+    if before_id is not None:
+        stmt = stmt.where(AuditEvent.id < before_id)
+    stmt = stmt.order_by(AuditEvent.id.desc()).limit(limit)
+    with SessionLocal() as db:
+        rows = db.execute(stmt).scalars().all()
+    items = [
+        {
+            "id": r.id,
+            "ts": r.ts.isoformat(),
+            "kind": r.kind,
+            "method": r.method,
+            "path": r.path,
+            "route": r.route,
+            "status": r.status,
+            "duration_ms": r.duration_ms,
+            "user_id": r.user_id,
+            "email": r.email,
+            "ip": r.ip,
+            "ua": r.ua,
+            "correlation_id": r.correlation_id,
+            "extra": r.extra,
+        }
+        for r in rows
+    ]
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "items": items,
+        "next_before_id": items[-1]["id"] if len(items) == limit else None,
+    }
+
+
+_GROUPS = {
+    "route": ("route", "method"),
+    "status": ("status",),
+    "route_status": ("route", "method", "status"),
+    "minute": ("minute",),
+    "total": (),
+}
+
+
+def _quantile_ms(buckets: List[int], q: float) -> Optional[float]:
+    v = histogram_quantile(ROLLUP_BUCKETS_MS, buckets, q)
+    return round(v, 2) if v is not None else None
+
+
+def query_latency(
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: str = "route",
+    route: Optional[str] = None,
+    method: Optional[str] = None,
+    step_minutes: int = 1,  # agrupación "minute": divisores de 1440 (1, 5, 15, 60...)
+    limit: int = 200,
+) -> Dict[str, Any]:
+    """Conteo, errores y percentiles de latencia desde los rollups por minuto.
+
+    Los percentiles se calculan sumando los histogramas de las filas del grupo
+    (interpolación dentro del bucket): exactos a nivel de bucket para cualquier rango.
+    """
+    if group_by not in _GROUPS:
+        raise ValueError(f"group_by debe ser uno de {sorted(_GROUPS)}")
+    since, until = _range(since, until, timedelta(hours=1))
+    stmt = select(AuditRollupMinute).where(AuditRollupMinute.minute >= since, AuditRollupMinute.minute < until)
+    if route:
+        stmt = stmt.where(AuditRollupMinute.route == route)
+    if method:
+        stmt = stmt.where(AuditRollupMinute.method == method.upper())
+    step = max(1, int(step_minutes))
+    groups: Dict[tuple, list] = {}
+    with SessionLocal() as db:
+        for r in db.execute(stmt.execution_options(yield_per=5000)).scalars():
+            if group_by == "minute":
+                key: tuple = (r.minute - timedelta(minutes=(r.minute.hour * 60 + r.minute.minute) % step),)
+            else:
+                key = tuple(getattr(r, f) for f in _GROUPS[group_by])
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = [0, 0, 0.0, 0.0, _empty_buckets()]
+            g[0] += r.count
+            g[1] += r.count if r.status >= 500 else 0
+            g[2] += r.sum_ms
+            g[3] = max(g[3], r.max_ms)
+            g[4] = [a + b for a, b in zip(g[4], r.buckets or _empty_buckets())]
+
+    fields = _GROUPS[group_by]
+    out: List[Dict[str, Any]] = []
+    for key, (n, errors, total_ms, max_ms, buckets) in groups.items():
+        row: Dict[str, Any] = {}
+        for f, v in zip(fields, key):
+            row[f] = v.isoformat() if isinstance(v, datetime) else v
+        row.update(
+            count=n,
+            errors=errors,
+            error_rate=round(errors / n, 4) if n else 0.0,
+            mean_ms=round(total_ms / n, 2) if n else None,
+            max_ms=round(max_ms, 2),
+            p50_ms=_quantile_ms(buckets, 0.5),
+            p95_ms=_quantile_ms(buckets, 0.95),
+            p99_ms=_quantile_ms(buckets, 0.99),
+        )
+        out.append(row)
+    if group_by == "minute":
+        out.sort(key=lambda r: r["minute"])
+    else:
+        out.sort(key=lambda r: r["count"], reverse=True)
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "group_by": group_by,
+        "buckets_ms": list(ROLLUP_BUCKETS_MS),
+        "items": out[:limit],
+        "truncated": len(out) > limit,
+    }
+
+
+def query_active_users(
+    *, since: Optional[date] = None, until: Optional[date] = None, window_minutes: int = 5
+) -> Dict[str, Any]:
+    """Usuarios activos por día (rollup), distintos en el rango y en los últimos minutos (crudo)."""
+    until = until or _utcnow().date()
+    since = since or until - timedelta(days=29)
+    if since > until:
+        raise ValueError("since debe ser anterior o igual a until")
+    now = _utcnow()
+    with SessionLocal() as db:
+        daily = db.execute(
+            select(
+                AuditUserActivity.day,
+                func.count(AuditUserActivity.user_id),
+                func.sum(AuditUserActivity.requests),
+            )
+            .where(AuditUserActivity.day >= since, AuditUserActivity.day <= until)
+            .group_by(AuditUserActivity.day)
+            .order_by(AuditUserActivity.day)
+        ).all()
+        distinct = db.execute(
+            select(func.count(func.distinct(AuditUserActivity.user_id))).where(
+                AuditUserActivity.day >= since, AuditUserActivity.day <= until
+            )
+        ).scalar()
+        # Tiempo real: sólo toca la partición de hoy
+        recent = db.execute(
+            select(func.count(func.distinct(AuditEvent.user_id))).where(
+                AuditEvent.ts >= now - timedelta(minutes=max(1, window_minutes)),
+                AuditEvent.user_id.is_not(None),
+            )
+        ).scalar()
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "daily": [{"day": d.isoformat(), "users": int(u), "requests": int(r or 0)} for d, u, r in daily],
+        "distinct_users": int(distinct or 0),
+        "active_now": int(recent or 0),
+        "active_now_window_minutes": max(1, window_minutes),
+    }
+
+
+def store_status() -> Dict[str, Any]:
+    """Marca de agua de los rollups, particiones y configuración de retención."""
+    with SessionLocal() as db:
+        state = db.get(AuditRollupState, _STATE_NAME)
+    return {
+        "rollup": {
+            "interval": AUDIT_ROLLUP_INTERVAL,
+            "lag": AUDIT_ROLLUP_LAG,
+            "watermark": state.watermark.isoformat() if state else None,
+            "updated_at": state.updated_at.isoformat() if state and state.updated_at else None,
+        },
+        "retention_days": AUDIT_RETENTION_DAYS,
+        "rollup_retention_days": AUDIT_ROLLUP_RETENTION_DAYS,
+        "partitions": list_partitions(),
+    }
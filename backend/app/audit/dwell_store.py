@@ -0,0 +1,227 @@
+"""
+Agregado de permanencia en páginas del frontend (`/analytics/page_dwell`).
+
+Los eventos no se guardan uno a uno: cada worker los agrega en memoria por
+(día, ruta) —conteo, suma, máximo e histograma sobre DWELL_BUCKETS_MS— y un hilo
+vuelca el buffer cada ANALYTICS_DWELL_FLUSH_INTERVAL a `page_dwell_daily`,
+sumando sobre la fila existente (SELECT ... FOR UPDATE, una transacción por volcado).
+El coste por evento es un dict y un bisect bajo lock; la tabla crece con
+días x rutas, no con page views.
+
+- Rutas: sin query string ni fragmento, recortadas a 255 caracteres. Si un worker
+  acumula más de ANALYTICS_DWELL_MAX_PATHS rutas distintas entre volcados, el resto
+  se agrega como "<other>" (protege de rutas con ids o basura del cliente).
+- Día: el `ts` del cliente si es plausible (no futuro, menos de 7 días); si no, ahora.
+- Si el volcado falla, el buffer se reincorpora y se reintenta en el siguiente.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.config.settings import ANALYTICS_DWELL_FLUSH_INTERVAL, ANALYTICS_DWELL_MAX_PATHS
+from app.db.database import SessionLocal
+from app.db.models import PageDwellDaily
+from app.utils.metrics import histogram_quantile, increment, observe, set_gauge
+
+logger = logging.getLogger("app.analytics.dwell")
+
+# Límites (ms) del histograma de permanencia; fijos para poder sumar filas entre días
+DWELL_BUCKETS_MS: Tuple[float, ...] = (
+    1000, 2000, 5000, 10000, 20000, 30000, 60000, 120000, 300000, 600000, 1800000,
+)
+OTHER_PATH = "<other>"
+_MAX_CLIENT_AGE = timedelta(days=7)
+
+_buffer_lock = threading.Lock()
+# (día, ruta) -> [conteo, suma_ms, max_ms, buckets]
+_buffer: Dict[Tuple[date, str], list] = {}
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _empty_buckets() -> List[int]:
+    return [0] * (len(DWELL_BUCKETS_MS) + 1)
+
+
+def normalize_path(path: str) -> str:
+    p = (path or "").split("?", 1)[0].split("#", 1)[0].strip() or "/"
+    return p[:255]
+
+
+def _event_day(ts: Optional[float], now: float) -> date:
+    if ts is not None and now - _MAX_CLIENT_AGE.total_seconds() <= ts <= now + 300:
+        return datetime.fromtimestamp(ts, tz=timezone.utc).date()
+    return datetime.fromtimestamp(now, tz=timezone.utc).date()
+
+
+def _merge_into(target: Dict[Tuple[date, str], list], key: Tuple[date, str], agg: list) -> None:
+    cur = target.get(key)
+    if cur is None:
+        target[key] = [agg[0], agg[1], agg[2], list(agg[3])]
+    else:
+        cur[0] += agg[0]
+        cur[1] += agg[1]
+        cur[2] = max(cur[2], agg[2])
+        cur[3] = [a + b for a, b in zip(cur[3], agg[3])]
+
+
+def record(events: Iterable[Tuple[str, float, Optional[float]]]) -> int:
+    """Agrega eventos (ruta, duración_ms, ts_cliente) al buffer del worker. Devuelve cuántos."""
+    now = time.time()
+    n = 0
+    with _buffer_lock:
+        for path, duration_ms, ts in events:
+            key = (_event_day(ts, now), normalize_path(path))
+            agg = _buffer.get(key)
+            if agg is None:
+                if len(_buffer) >= ANALYTICS_DWELL_MAX_PATHS:
+                    key = (key[0], OTHER_PATH)
+                    agg = _buffer.get(key)
+                if agg is None:
+                    agg = _buffer[key] = [0, 0.0, 0.0, _empty_buckets()]
+            ms = float(duration_ms)
+            agg[0] += 1
+            agg[1] += ms
+            agg[2] = max(agg[2], ms)
+            agg[3][bisect_left(DWELL_BUCKETS_MS, ms)] += 1
+            n += 1
+    increment("analytics_dwell_events", n)
+    return n
+
+
+def _write(pending: Dict[Tuple[date, str], list]) -> None:
+    with SessionLocal() as db:
+        for day in sorted({d for d, _ in pending}):
+            paths = sorted(p for d, p in pending if d == day)
+            existing = {
+                r.path: r
+                for r in db.execute(
+                    select(PageDwellDaily)
+                    .where(PageDwellDaily.day == day, PageDwellDaily.path.in_(paths))
+                    .with_for_update()
+                ).scalars()
+            }
+            for path in paths:
+                count, sum_ms, max_ms, buckets = pending[(day, path)]
+                row = existing.get(path)
+                if row is None:
+                    db.add(PageDwellDaily(day=day, path=path, count=count, sum_ms=sum_ms, max_ms=max_ms, buckets=buckets))
+                else:
+                    row.count += count
+                    row.sum_ms += sum_ms
+                    row.max_ms = max(row.max_ms, max_ms)
+                    row.buckets = [a + b for a, b in zip(row.buckets or _empty_buckets(), buckets)]
+        db.commit()
+
+
+def flush() -> int:
+    """Vuelca el buffer de este worker a `page_dwell_daily`. Devuelve las filas tocadas."""
+    global _buffer
+    with _buffer_lock:
+        pending, _buffer = _buffer, {}
+    if not pending:
+        return 0
+    t0 = time.perf_counter()
+    try:
+        try:
+            _write(pending)
+        except IntegrityError:
+            # Otro worker insertó la misma (día, ruta) a la vez: ahora existe, se suma sobre ella
+            _write(pending)
+    except Exception as e:
+        with _buffer_lock:
+            for key, agg in pending.items():
+                _merge_into(_buffer, key, agg)
+        increment("analytics_dwell_flush_errors")
+        logger.warning("analytics.dwell_flush_failed", extra={"rows": len(pending), "error": str(e)})
+        return 0
+    observe("analytics_dwell_flush_seconds", time.perf_counter() - t0)
+    return len(pending)
+
+
+def buffer_size() -> int:
+    with _buffer_lock:
+        return len(_buffer)
+
+
+def query_dwell(
+    *,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    path: Optional[str] = None,
+    group_by: str = "path",
+    limit: int = 200,
+) -> Dict[str, Any]:
+    """Conteo, media y p50/p95 de permanencia por ruta, por día o por ambos."""
+    if group_by not in ("path", "day", "path_day"):
+        raise ValueError("group_by debe ser path, day o path_day")
+    until = until or datetime.now(timezone.utc).date()
+    since = since or until - timedelta(days=6)
+    if since > until:
+        raise ValueError("since debe ser anterior o igual a until")
+    stmt = select(PageDwellDaily).where(PageDwellDaily.day >= since, PageDwellDaily.day <= until)
+    if path:
+        stmt = stmt.where(PageDwellDaily.path == normalize_path(path))
+    groups: Dict[tuple, list] = {}
+    with SessionLocal() as db:
+        for r in db.execute(stmt).scalars():
+            key = {"path": (r.path,), "day": (r.day,), "path_day": (r.path, r.day)}[group_by]
+            _merge_into(groups, key, [r.count, r.sum_ms, r.max_ms, r.buckets or _empty_buckets()])
+
+    fields = {"path": ("path",), "day": ("day",), "path_day": ("path", "day")}[group_by]
+    items: List[Dict[str, Any]] = []
+    for key, (n, total, max_ms, buckets) in groups.items():
+        item: Dict[str, Any] = {f: (v.isoformat() if isinstance(v, date) else v) for f, v in zip(fields, key)}
+        p50 = histogram_quantile(DWELL_BUCKETS_MS, buckets, 0.5)
+        p95 = histogram_quantile(DWELL_BUCKETS_MS, buckets, 0.95)
+        item.update(
+            count=n,
+            mean_ms=round(total / n, 1) if n else None,
+            max_ms=round(max_ms, 1),
+            p50_ms=round(p50, 1) if p50 is not None else None,
+            p95_ms=round(p95, 1) if p95 is not None else None,
+        )
+        items.append(item)
+    if group_by == "day":
+        items.sort(key=lambda i: i["day"])
+    else:
+        items.sort(key=lambda i: i["count"], reverse=True)
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "group_by": group_by,
+        "buckets_ms": list(DWELL_BUCKETS_MS),
+        "items": items[:limit],
+        "truncated": len(items) > limit,
+    }
+
+
+def _loop() -> None:
+    while not _stop.wait(max(1, ANALYTICS_DWELL_FLUSH_INTERVAL)):
+        set_gauge("analytics_dwell_buffer_keys", buffer_size())
+        flush()
+
+
+def start_dwell_flush() -> bool:
+    """Arranca el volcado periódico en este worker (idempotente)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="dwell-flush", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_dwell_flush() -> None:
+    """Detiene el hilo y vuelca lo pendiente (parada ordenada del worker)."""
+    _stop.set()
+    flush()
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from typing import cast
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from jose import JWTError
 from app.db.database import get_db
 from app.db import models
 from app.auth.auth_schemas import RegisterRequest, RegisterResponse, LoginRequest, TokenResponse, UserInfo, RefreshRequest, ProfileResponse, ProfileUpdate
 from app.auth.security_jwt import (
     create_access_token,
+    decode_access_token,
     generate_refresh_token,
     hash_refresh_token,
     refresh_expiry,
@@ -16,8 +17,6 @@ from app.auth.security_passwords import (
     verify_password,
 )
 from app.config.settings import (
-    JWT_SECRET_KEY,
-    JWT_ALGORITHM,
     STATIC_AUTH_EMAIL,
     STATIC_AUTH_PASSWORD,
     DEBUG,
@@ -25,7 +24,6 @@ from app.config.settings import (
     COOKIE_DOMAIN,
     COOKIE_SECURE,
     COOKIE_SAMESITE,
-    JWT_AUDIENCE,
     AUTH_RATE_LIMIT_WINDOW_SECONDS,
     AUTH_RATE_LIMIT_MAX_ATTEMPTS,
 )
@@ -33,8 +31,8 @@ from app.audit.audit_logger import record_login_success, record_login_failure, r
 from app.core.auth.session_manager import get_current_user
 from app.db.queries.session_queries import revoke_session_token, revoke_all_active_sessions_for_user, revoke_other_active_sessions_for_user
 import logging
-from app.utils.adapters.cache_adapter import get_cache, set_cache, clear_cache
-from app.core.auth.session_manager import invalidate_session_cache
+from app.utils.adapters.cache_adapter import get_cache, set_cache, delete_cache
+from app.core.auth.session_manager import invalidate_session_cache, user_cache_tag
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger("app.auth")
@@ -89,6 +87,8 @@ def register(body: RegisterRequest, db: Session = Depends(get_db)):
 def login(body: LoginRequest, request: Request, response: Response, db: Session = Depends(get_db)):
     # Rate limit por IP+email
     rl_key = None
+    # Estado de la ventana leído una sola vez; el fallo lo reutiliza sin volver a Redis
+    rl_state = None
     try:
         ip = request.client.host if request and request.client else "-"
         rl_key = f"auth:rl:{body.email.lower()}:{ip}"
@@ -103,8 +103,8 @@ def login(body: LoginRequest, request: Request, response: Response, db: Session
             c = 0; t = now
         if c >= maxc:
             raise HTTPException(status_code=429, detail="Too many login attempts. Try again later.")
-        # provisionalmente guardar ventana actualizada
-        set_cache(rl_key, {"c": c, "t": t or now}, AUTH_RATE_LIMIT_WINDOW_SECONDS)
+        # La ventana sólo se persiste al fallar (el TTL de la clave ya es la ventana)
+        rl_state = {"c": c, "t": t or now}
     except HTTPException:
         raise
     except Exception:
@@ -130,7 +130,7 @@ def login(body: LoginRequest, request: Request, response: Response, db: Session
                 ua = request.headers.get("user-agent", "-") if request else "-"
                 exp_ts = None
                 try:
-                    payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
+                    payload = decode_access_token(token)
                     exp_ts = payload.get("exp")  # type: ignore
                 except Exception:
                     exp_ts = None
@@ -155,7 +155,7 @@ def login(body: LoginRequest, request: Request, response: Response, db: Session
         # incrementar contador de intentos fallidos
         try:
             if rl_key:
-                data = get_cache(rl_key) or {"c": 0, "t": int(__import__('time').time())}
+                data = rl_state or get_cache(rl_key) or {"c": 0, "t": int(__import__('time').time())}
                 c = int(data.get("c", 0)) + 1
                 t = int(data.get("t", int(__import__('time').time())))
                 set_cache(rl_key, {"c": c, "t": t}, AUTH_RATE_LIMIT_WINDOW_SECONDS)
@@ -238,7 +238,7 @@ def login(body: LoginRequest, request: Request, response: Response, db: Session
         ua = request.headers.get("user-agent", "-") if request else "-"
         exp_ts = None
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
+            payload = decode_access_token(token)
             exp_ts = payload.get("exp")  # type: ignore
         except Exception:
             exp_ts = None
@@ -249,7 +249,7 @@ def login(body: LoginRequest, request: Request, response: Response, db: Session
     # reset contador de rate limit tras login exitoso
     try:
         if rl_key:
-            clear_cache(rl_key)
+            delete_cache(rl_key)
     except Exception:
         pass
     return TokenResponse(access_token=token, refresh_token=raw_refresh)
@@ -311,13 +311,14 @@ def _build_profile_response(db: Session, user: models.User) -> ProfileResponse:
 def me(user: models.User = Depends(get_current_user), db: Session = Depends(get_db)) -> ProfileResponse:
     # Cachear perfil 60s
     try:
-        key = f"profile:{int(getattr(user,'id'))}"
+        uid = int(getattr(user,'id'))
+        key = f"profile:{uid}"
         cached = get_cache(key)
         if cached:
             return cached  # type: ignore[return-value]
         resp = _build_profile_response(db, user)
         # Guardar como dict para robustez de serialización
-        set_cache(key, resp, 60)
+        set_cache(key, resp, 60, tags=(user_cache_tag(uid),))
         return resp
     except Exception:
         return _build_profile_response(db, user)
@@ -561,8 +562,7 @@ def update_profile(body: ProfileUpdate, user: models.User = Depends(get_current_
             # Do not fail the request if timestamp update fails
     # Invalidate cached profile
     try:
-        from app.utils.adapters.cache_adapter import clear_cache
-        clear_cache(f"profile:{int(getattr(user,'id'))}")
+        delete_cache(f"profile:{int(getattr(user,'id'))}")
     except Exception:
         pass
     return _build_profile_response(db, user)
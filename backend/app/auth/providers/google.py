@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import RedirectResponse
 from typing import Optional
 import httpx # type: ignore
+from app.observability.tracing import httpx_event_hooks
 from urllib.parse import urlencode
 import logging
 from app.config.settings import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI, FRONTEND_URL
@@ -45,7 +46,7 @@ async def handle_google_callback(code: Optional[str], db: Session):
         raise HTTPException(status_code=400, detail="Missing code")
 
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(event_hooks=httpx_event_hooks(propagate=False, asynchronous=True)) as client:
         data = {
             "code": code,
             "client_id": GOOGLE_CLIENT_ID,
@@ -5,6 +5,7 @@ from jose import jwt
 import secrets
 import hashlib
 import hmac
+from app.core.auth.token_verifier import verify_token
 from app.config.settings import (
     JWT_SECRET_KEY,
     JWT_ALGORITHM,
@@ -35,9 +36,9 @@ def create_access_token(subject: str, sid: Optional[str] = None, expires_minutes
 def decode_access_token(token: str) -> dict:
     """Decodifica y valida el access token, validando audience.
 
-    Lanza jose.JWTError si no es válido.
+    Lanza jose.JWTError si no es válido. Usa el LRU de tokens verificados.
     """
-    return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
+    return verify_token(token)
 
 
 def _hmac_sha256(data: str, key: str) -> str:
@@ -44,6 +44,35 @@ ODOO_TIMEOUT = int(os.getenv("ODOO_TIMEOUT", 30))  # Timeout por defecto para Od
 # Reintentos y backoff para llamadas Odoo (XML-RPC)
 ODOO_MAX_RETRIES = int(os.getenv("ODOO_MAX_RETRIES", "3"))
 ODOO_RETRY_BACKOFF = float(os.getenv("ODOO_RETRY_BACKOFF", "0.35"))  # segundos (exponencial)
+# Circuit breaker por perfil: fallos de transporte consecutivos para abrir y segundos abierto
+ODOO_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("ODOO_BREAKER_FAILURE_THRESHOLD", "5"))
+ODOO_BREAKER_OPEN_SECONDS: float = float(os.getenv("ODOO_BREAKER_OPEN_SECONDS", "30"))
+# Llamadas de prueba simultáneas permitidas en half-open
+ODOO_BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("ODOO_BREAKER_HALF_OPEN_PROBES", "1"))
+# Límite adaptativo (AIMD) de llamadas Odoo en vuelo por perfil y proceso
+ODOO_CONCURRENCY_INITIAL: int = int(os.getenv("ODOO_CONCURRENCY_INITIAL", "8"))
+ODOO_CONCURRENCY_MIN: int = int(os.getenv("ODOO_CONCURRENCY_MIN", "1"))
+ODOO_CONCURRENCY_MAX: int = int(os.getenv("ODOO_CONCURRENCY_MAX", "32"))
+# Latencia (segundos) por encima de la cual una llamada cuenta como sobrecarga y reduce el límite
+ODOO_CONCURRENCY_LATENCY_TARGET: float = float(os.getenv("ODOO_CONCURRENCY_LATENCY_TARGET", "2.0"))
+# Espera máxima (segundos) por un hueco antes de rechazar la llamada
+ODOO_CONCURRENCY_QUEUE_TIMEOUT: float = float(os.getenv("ODOO_CONCURRENCY_QUEUE_TIMEOUT", "1.0"))
+# Registro de llamadas Odoo lentas (segundos, tamaño del buffer en memoria y fracción muestreada)
+ODOO_SLOW_CALL_SECONDS: float = float(os.getenv("ODOO_SLOW_CALL_SECONDS", "1.0"))
+ODOO_SLOW_CALL_LOG_SIZE: int = int(os.getenv("ODOO_SLOW_CALL_LOG_SIZE", "200"))
+ODOO_SLOW_CALL_SAMPLE_RATE: float = float(os.getenv("ODOO_SLOW_CALL_SAMPLE_RATE", "1.0"))
+# Metadatos Odoo (uid, tz, fields_get) en caché compartida (segundos)
+ODOO_METADATA_TTL: int = int(os.getenv("ODOO_METADATA_TTL", str(6 * 3600)))
+# Modelos cuyo fields_get se precalienta al arrancar
+ODOO_METADATA_WARM_MODELS: List[str] = _list_from_env("ODOO_METADATA_WARM_MODELS", "crm.lead,res.partner,argus.price,api.news")
+# Espejo local de CRM (crm.lead, res.partner) sincronizado por write_date
+ODOO_SYNC_INTERVAL: int = int(os.getenv("ODOO_SYNC_INTERVAL", "300"))  # segundos; 0 desactiva el hilo
+ODOO_SYNC_BATCH_SIZE: int = int(os.getenv("ODOO_SYNC_BATCH_SIZE", "500"))
+# Cada cuánto se hace una pasada completa que concilia borrados físicos (segundos)
+ODOO_SYNC_FULL_INTERVAL: int = int(os.getenv("ODOO_SYNC_FULL_INTERVAL", str(24 * 3600)))
+ODOO_SYNC_PROFILES: List[str] = _list_from_env("ODOO_SYNC_PROFILES", "default")
+# Tamaño de bloque al leer el pipeline en vivo por streaming (registros por RPC)
+ODOO_PIPELINE_CHUNK_SIZE: int = int(os.getenv("ODOO_PIPELINE_CHUNK_SIZE", "250"))
 
 # Odoo STAGING (opcional, para segundo entorno)
 ODOO_STAGING_URL: str | None = os.getenv("ODOO_STAGING_URL")
@@ -61,6 +90,31 @@ CACHE_TTL_ARGUS_PRICES: int = int(os.getenv("CACHE_TTL_ARGUS_PRICES", "60"))
 # Opcional: Redis para cache compartida entre workers (no usado aún)
 REDIS_URL: str | None = os.getenv("REDIS_URL")
 
+# Caché L1 en memoria por worker (acotada por entradas y bytes, LRU + TTL)
+CACHE_L1_MAX_ENTRIES: int = int(os.getenv("CACHE_L1_MAX_ENTRIES", "10000"))
+CACHE_L1_MAX_MB: float = float(os.getenv("CACHE_L1_MAX_MB", "32"))
+# Presupuestos por namespace: "ns=MB" o "ns=MB:entradas", separados por coma
+CACHE_L1_BUDGETS: List[str] = _list_from_env("CACHE_L1_BUDGETS", "argus=64:5000,session=4:20000,rbac=4:20000")
+# TTL de la copia sombra en memoria de valores leídos desde Redis (segundos)
+CACHE_L1_SHADOW_TTL: int = int(os.getenv("CACHE_L1_SHADOW_TTL", "60"))
+# Intervalo del barrido de expiradas en segundo plano (segundos; 0 lo desactiva)
+CACHE_L1_SWEEP_INTERVAL: int = int(os.getenv("CACHE_L1_SWEEP_INTERVAL", "30"))
+# Bus de invalidación por Redis pub/sub entre workers (requiere REDIS_URL)
+CACHE_INVALIDATION_BUS: bool = os.getenv("CACHE_INVALIDATION_BUS", "true").lower() in ("1", "true", "yes", "on")
+# TTL de la copia en memoria cuando el bus está activo (invalidaciones llegan a todos los workers)
+CACHE_L1_COHERENT_TTL: int = int(os.getenv("CACHE_L1_COHERENT_TTL", "300"))
+# Tamaño máximo del pool redis.asyncio por worker (API asíncrona de caché)
+CACHE_REDIS_ASYNC_MAX_CONNECTIONS: int = int(os.getenv("CACHE_REDIS_ASYNC_MAX_CONNECTIONS", "50"))
+
+# Precalentamiento de caché Argus (al arrancar y periódico, con lock de clúster)
+CACHE_WARMER_ENABLED: bool = os.getenv("CACHE_WARMER_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+# Intervalo entre pasadas (segundos); 0 sólo calienta al arrancar
+CACHE_WARMER_INTERVAL: int = int(os.getenv("CACHE_WARMER_INTERVAL", "300"))
+# Presupuesto de concurrencia contra Odoo durante el calentamiento
+CACHE_WARMER_CONCURRENCY: int = int(os.getenv("CACHE_WARMER_CONCURRENCY", "2"))
+# Retraso antes de la primera pasada tras el arranque (segundos)
+CACHE_WARMER_STARTUP_DELAY: float = float(os.getenv("CACHE_WARMER_STARTUP_DELAY", "5"))
+
 # --- Plaid credentials ---
 PLAID_CLIENT_ID: str | None = os.getenv("PLAID_CLIENT_ID")
 PLAID_SECRET: str | None = os.getenv("PLAID_SECRET")  # sandbox/production secret
@@ -128,6 +182,90 @@ JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "hso.api")
 # --- Sesiones / Cache ---
 # TTL de cache para sesiones activas por sid (segundos)
 SESSION_CACHE_TTL: int = int(os.getenv("SESSION_CACHE_TTL", "60"))
+# Tokens JWT ya verificados en memoria por worker (entradas; cada una vale hasta su exp)
+AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+# Vigencia en caché de tokens sin claim exp (segundos)
+AUTH_TOKEN_CACHE_NO_EXP_TTL: int = int(os.getenv("AUTH_TOKEN_CACHE_NO_EXP_TTL", "300"))
+
+# --- Auditoría (pipeline asíncrono: cola acotada + hilo escritor por lotes) ---
+# Destinos: stdout (JSON por línea), file (JSONL rotado), mysql (tabla audit_events)
+AUDIT_SINKS: List[str] = _list_from_env("AUDIT_SINKS", "stdout,mysql")
+AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+# Espera máxima (segundos) antes de escribir un lote incompleto
+AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_FILE_PATH: str = os.getenv("AUDIT_FILE_PATH", str(_BACKEND_ROOT / "logs" / "audit.jsonl"))
+AUDIT_FILE_MAX_BYTES: int = int(os.getenv("AUDIT_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+AUDIT_FILE_BACKUPS: int = int(os.getenv("AUDIT_FILE_BACKUPS", "5"))
+# Rollups (latencia por ruta/status/minuto, usuarios activos por día) y particiones diarias
+AUDIT_ROLLUP_INTERVAL: int = int(os.getenv("AUDIT_ROLLUP_INTERVAL", "60"))  # segundos; 0 desactiva el hilo
+# Margen (segundos) antes de agregar un minuto: deja llegar los lotes en vuelo
+AUDIT_ROLLUP_LAG: int = int(os.getenv("AUDIT_ROLLUP_LAG", "120"))
+# Días de eventos crudos (se borran por partición completa) y de rollups
+AUDIT_RETENTION_DAYS: int = int(os.getenv("AUDIT_RETENTION_DAYS", "30"))
+AUDIT_ROLLUP_RETENTION_DAYS: int = int(os.getenv("AUDIT_ROLLUP_RETENTION_DAYS", "400"))
+# Particiones diarias creadas por adelantado
+AUDIT_PARTITION_DAYS_AHEAD: int = int(os.getenv("AUDIT_PARTITION_DAYS_AHEAD", "7"))
+# Vigencia de la marca de inicio de sesión (para la duración en logout) si el token no trae exp
+AUDIT_SESSION_TTL: int = int(os.getenv("AUDIT_SESSION_TTL", str(24 * 3600)))
+
+# --- Analítica de permanencia en páginas (/analytics/page_dwell) ---
+# Eventos máximos por llamada al endpoint de lote
+ANALYTICS_DWELL_MAX_BATCH: int = int(os.getenv("ANALYTICS_DWELL_MAX_BATCH", "200"))
+# Cada worker agrega en memoria y vuelca a page_dwell_daily cada N segundos
+ANALYTICS_DWELL_FLUSH_INTERVAL: int = int(os.getenv("ANALYTICS_DWELL_FLUSH_INTERVAL", "15"))
+# Rutas distintas por worker entre volcados; el resto se agrega como "<other>"
+ANALYTICS_DWELL_MAX_PATHS: int = int(os.getenv("ANALYTICS_DWELL_MAX_PATHS", "2000"))
+
+# --- Desglose de tiempo por request (Server-Timing y log de requests lentas) ---
+SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+# Umbral (ms) del log "request.slow" con el desglose por dependencia; 0 lo desactiva
+REQUEST_SLOW_MS: float = float(os.getenv("REQUEST_SLOW_MS", "1000"))
+
+# --- Conteo de queries por request y detección de N+1 ---
+# Ejecuciones de una misma forma de sentencia en una request a partir de las cuales se marca N+1; 0 lo desactiva
+DB_N_PLUS_ONE_THRESHOLD: int = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+# Cabecera de depuración X-DB-Queries (conteo, tiempo y sentencia más repetida)
+DB_QUERY_HEADER_ENABLED: bool = os.getenv("DB_QUERY_HEADER_ENABLED", "true" if DEBUG else "false").lower() in ("1", "true", "yes", "on")
+
+# --- Logging (cola + hilo escritor; ver app.utils.logging_config) ---
+# Formato y escritura en un hilo aparte; false escribe en el hilo que loguea
+LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes", "on")
+# Registros pendientes máximos; con la cola llena se descartan (métrica log_dropped)
+LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Muestreo de INFO/DEBUG por prefijo de logger, p.ej. "app.audit=0.1,app.odoo=0.5" (WARNING+ nunca se descarta)
+LOG_SAMPLING: List[str] = _list_from_env("LOG_SAMPLING", "")
+
+# --- Trazas distribuidas (app.observability.tracing, export OTLP/JSON) ---
+TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+# Fracción de trazas nuevas que se exportan (si llega `traceparent`, manda su decisión)
+TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+# >0: se registran todas las requests y se exportan también las que superan N ms o fallan (5xx)
+TRACE_SLOW_MS: float = float(os.getenv("TRACE_SLOW_MS", "0"))
+TRACE_SERVICE_NAME: str = os.getenv("TRACE_SERVICE_NAME", APP_NAME)
+# Destinos: fichero JSONL (una ExportTraceServiceRequest por línea) y/o colector OTLP/HTTP
+TRACE_EXPORT_FILE: str = os.getenv("TRACE_EXPORT_FILE", str(_BACKEND_ROOT / "logs" / "traces.jsonl"))
+TRACE_EXPORT_FILE_MAX_BYTES: int = int(os.getenv("TRACE_EXPORT_FILE_MAX_BYTES", str(100 * 1024 * 1024)))
+TRACE_EXPORT_FILE_BACKUPS: int = int(os.getenv("TRACE_EXPORT_FILE_BACKUPS", "5"))
+# p.ej. http://otel-collector:4318/v1/traces; vacío no envía
+TRACE_EXPORT_ENDPOINT: str = os.getenv("TRACE_EXPORT_ENDPOINT", "")
+TRACE_EXPORT_INTERVAL: float = float(os.getenv("TRACE_EXPORT_INTERVAL", "5"))
+# Trazas pendientes de exportar (con la cola llena se descartan) y spans máximos por traza
+TRACE_QUEUE_SIZE: int = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+TRACE_MAX_SPANS: int = int(os.getenv("TRACE_MAX_SPANS", "1000"))
+
+# --- Profiler por muestreo (endpoints /admin/profile y cabecera X-Profile-Token) ---
+PROFILER_ENABLED: bool = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+# Clave HMAC de los tokens de perfil por request; vacía desactiva el perfil por cabecera
+PROFILER_SECRET: str = os.getenv("PROFILER_SECRET", "")
+PROFILER_MAX_SECONDS: int = int(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# Intervalo de muestreo (ms): perfil de worker y perfil por request
+PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_REQUEST_INTERVAL_MS: float = float(os.getenv("PROFILER_REQUEST_INTERVAL_MS", "1"))
+# Muestreos simultáneos por worker (el resto se rechaza / la request va sin perfil)
+PROFILER_MAX_CONCURRENT: int = int(os.getenv("PROFILER_MAX_CONCURRENT", "2"))
+# Vigencia (segundos) de los perfiles por request en la caché compartida
+PROFILER_RESULT_TTL: int = int(os.getenv("PROFILER_RESULT_TTL", "600"))
 
 # --- Rate limit Auth ---
 AUTH_RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("AUTH_RATE_LIMIT_WINDOW_SECONDS", "300"))
@@ -189,3 +327,18 @@ REMOTE_STATUS_URL: str | None = os.getenv("REMOTE_STATUS_URL")
 REMOTE_STATUS_CACHE_TTL: int = int(os.getenv("REMOTE_STATUS_CACHE_TTL", "15"))
 # Fail-open behavior: if the remote check fails (timeout/network), treat as enabled when True
 REMOTE_STATUS_FAIL_OPEN: bool = os.getenv("REMOTE_STATUS_FAIL_OPEN", "true").lower() in ("1", "true", "yes", "on")
+
+# --- Métricas en memoria (app.utils.metrics) ---
+# Buckets por defecto (segundos) de los histogramas de latencia (record_duration/Timer/observe)
+METRICS_LATENCY_BUCKETS: List[str] = _list_from_env(
+    "METRICS_LATENCY_BUCKETS", "0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10"
+)
+# Buckets por métrica: "nombre=b1|b2|b3" separados por coma (p. ej. "due.n8n.request=0.5|1|5|15|30|60")
+METRICS_HISTOGRAM_BUCKETS: List[str] = _list_from_env("METRICS_HISTOGRAM_BUCKETS", "")
+# Franjas de locks para registrar métricas; cada hilo escribe en la suya (menos contención)
+METRICS_LOCK_STRIPES: int = int(os.getenv("METRICS_LOCK_STRIPES", "16"))
+# Métricas multi-proceso (gunicorn): directorio compartido donde cada worker vuelca las
+# suyas; /metrics fusiona todos los workers. Vacío = sólo las del worker que responde.
+METRICS_MULTIPROC_DIR: str | None = os.getenv("METRICS_MULTIPROC_DIR") or None
+# Cada cuánto vuelca cada worker sus métricas al directorio (segundos)
+METRICS_FLUSH_INTERVAL: float = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
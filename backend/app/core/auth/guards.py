@@ -2,14 +2,14 @@ from __future__ import annotations
 
 from typing import Callable, Any
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
 from app.db import models as m
-from app.core.auth.session_manager import get_current_user
+from app.core.auth.session_manager import get_current_user, get_request_cache, rbac_cache_keys, user_cache_tag
 from app.core.services.usage_service import get_active_subscription, get_feature_limit_from_plan
-from app.utils.adapters.cache_adapter import get_cache, set_cache, clear_cache
+from app.utils.adapters.cache_adapter import get_cache, set_cache
 from app.config.settings import SESSION_CACHE_TTL
 
 
@@ -43,15 +43,15 @@ def require_due_create(
 
 # Placeholders for future fine-grained RBAC backed by tables or JWT claims
 def require_role(role_slug: str) -> Callable[[Any], Any]:
-    def _dep(user: m.User = Depends(get_current_user), db: Session = Depends(get_db)) -> m.User:
+    def _dep(request: Request, user: m.User = Depends(get_current_user), db: Session = Depends(get_db)) -> m.User:
         if getattr(user, "is_superadmin", False):
             return user
         try:
             uid = int(getattr(user, 'id'))
         except Exception:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario inválido")
-        key = f"rbac:roles:{uid}"
-        roles = get_cache(key)
+        key = rbac_cache_keys(uid)[0]
+        roles = get_request_cache(request, key)
         if not isinstance(roles, (set, list, tuple)):
             from app.db.models import Role, UserRole
             rows = (
@@ -65,7 +65,7 @@ def require_role(role_slug: str) -> Callable[[Any], Any]:
             coarse = (getattr(user, 'role', None) or '').strip()
             if coarse:
                 roles.add(coarse)
-            set_cache(key, roles, max(30, SESSION_CACHE_TTL))
+            set_cache(key, roles, max(30, SESSION_CACHE_TTL), tags=(user_cache_tag(uid),))
         if role_slug in set(roles):
             return user
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Requiere rol: {role_slug}")
@@ -73,15 +73,15 @@ def require_role(role_slug: str) -> Callable[[Any], Any]:
 
 
 def require_permission(perm_slug: str) -> Callable[[Any], Any]:
-    def _dep(user: m.User = Depends(get_current_user), db: Session = Depends(get_db)) -> m.User:
+    def _dep(request: Request, user: m.User = Depends(get_current_user), db: Session = Depends(get_db)) -> m.User:
         if getattr(user, "is_superadmin", False):
             return user
         try:
             uid = int(getattr(user, 'id'))
         except Exception:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario inválido")
-        key = f"rbac:perms:{uid}"
-        perms = get_cache(key)
+        key = rbac_cache_keys(uid)[1]
+        perms = get_request_cache(request, key)
         if not isinstance(perms, (set, list, tuple)):
             from app.db.models import Permission, RolePermission, UserRole
             rows = (
@@ -92,7 +92,7 @@ def require_permission(perm_slug: str) -> Callable[[Any], Any]:
                 .all()
             )
             perms = set(slug for (slug,) in rows)
-            set_cache(key, perms, max(30, SESSION_CACHE_TTL))
+            set_cache(key, perms, max(30, SESSION_CACHE_TTL), tags=(user_cache_tag(uid),))
         if perm_slug in set(perms):
             return user
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Falta permiso: {perm_slug}")
@@ -4,13 +4,14 @@ from typing import Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import JWTError
 from sqlalchemy.orm import Session
 
-from app.config.settings import AUTH_COOKIES_ENABLED, JWT_AUDIENCE, JWT_ALGORITHM, JWT_SECRET_KEY, SESSION_CACHE_TTL
-from app.utils.adapters.cache_adapter import get_cache, set_cache, clear_cache
+from app.config.settings import AUTH_COOKIES_ENABLED, SESSION_CACHE_TTL
+from app.utils.adapters.cache_adapter import delete_cache, get_cache, get_many, set_cache, invalidate_tags
 from app.db.database import get_db
 from app.db import models as m
+from app.core.auth.token_verifier import verify_token
 
 
 # Shared bearer extractor (for Authorization: Bearer <token>)
@@ -29,9 +30,9 @@ def extract_token_from_request(request: Request, creds: HTTPAuthorizationCredent
 
 
 def decode_token(token: str) -> dict:
-    """Decode and validate JWT; raises HTTP 401 on error."""
+    """Decode and validate JWT (verified-token LRU); raises HTTP 401 on error."""
     try:
-        return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
+        return verify_token(token)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
 
@@ -53,6 +54,45 @@ def get_token_payload(request: Request, creds: HTTPAuthorizationCredentials | No
     return payload
 
 
+def user_cache_tag(uid: int) -> str:
+    """Etiqueta de caché de todo lo derivado de un usuario (sesiones, RBAC, perfil)."""
+    return f"user:{uid}"
+
+
+def session_cache_tag(sid: str) -> str:
+    return f"session:{sid}"
+
+
+def rbac_cache_keys(uid: int) -> tuple[str, str]:
+    """Claves de caché de roles y permisos RBAC de un usuario."""
+    return f"rbac:roles:{uid}", f"rbac:perms:{uid}"
+
+
+def _prefetch_auth_cache(request: Request, uid: int, sid: Optional[str]) -> dict:
+    """Lee sesión y sets RBAC del usuario en un único MGET y los deja en request.state.
+
+    Los guards RBAC consultan primero este prefetch (ver `get_request_cache`), así
+    una request autenticada cuesta un solo round trip a Redis.
+    """
+    keys = list(rbac_cache_keys(uid))
+    if sid:
+        keys.insert(0, f"session:active:{sid}")
+    values = get_many(keys)
+    try:
+        request.state.cache_prefetch = values  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return values
+
+
+def get_request_cache(request: Request, key: str):
+    """Valor de caché ya prefetchado para esta request o, si no se pidió, lectura normal."""
+    prefetched = getattr(request.state, "cache_prefetch", None)
+    if isinstance(prefetched, dict) and key in prefetched:
+        return prefetched[key]
+    return get_cache(key)
+
+
 def get_current_user(request: Request, payload: dict = Depends(get_token_payload), db: Session = Depends(get_db)) -> m.User:
     """Load and return current user using the JWT subject (sub) and validate sid if present."""
     sub = payload.get("sub")
@@ -71,9 +111,10 @@ def get_current_user(request: Request, payload: dict = Depends(get_token_payload
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sub inválido")
     # If JWT carries sid, validate session is still active (cached) and gently update last_seen_at
     sid = payload.get("sid")
+    prefetched = _prefetch_auth_cache(request, uid, sid)
     if sid:
         cache_key = f"session:active:{sid}"
-        cached = get_cache(cache_key)
+        cached = prefetched.get(cache_key)
         if cached is False:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="session_revoked")
         if cached is not True:
@@ -85,10 +126,11 @@ def get_current_user(request: Request, payload: dict = Depends(get_token_payload
                 )
                 .first()
             )
+            tags = (session_cache_tag(sid), user_cache_tag(uid))
             if not st:
-                set_cache(cache_key, False, SESSION_CACHE_TTL)
+                set_cache(cache_key, False, SESSION_CACHE_TTL, tags=tags)
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="session_revoked")
-            set_cache(cache_key, True, SESSION_CACHE_TTL)
+            set_cache(cache_key, True, SESSION_CACHE_TTL, tags=tags)
             # Throttled last_seen_at update
             try:
                 from datetime import datetime, timezone, timedelta
@@ -127,9 +169,32 @@ def get_current_user(request: Request, payload: dict = Depends(get_token_payload
     return user
 
 
-def invalidate_session_cache(sid: str) -> None:
+def invalidate_session_cache(*sids: str) -> None:
+    """Invalida la caché de una o varias sesiones en un solo lote (por etiqueta).
+
+    Borra además la clave exacta `session:active:{sid}`: las entradas escritas
+    antes de existir las etiquetas no están en ningún SET.
+    """
+    sids = tuple(sid for sid in sids if sid)
+    try:
+        invalidate_tags(*(session_cache_tag(sid) for sid in sids))
+        for sid in sids:
+            delete_cache(f"session:active:{sid}")
+    except Exception:
+        pass
+
+
+def invalidate_user_cache(*uids: int) -> None:
+    """Invalida sesiones, RBAC y perfil cacheados de usuarios (tras cambiar roles, permisos o estado).
+
+    Como en `invalidate_session_cache`, las claves RBAC y de perfil se borran
+    también por nombre por si se escribieron sin etiqueta.
+    """
     try:
-        clear_cache(f"session:active:{sid}")
+        invalidate_tags(*(user_cache_tag(uid) for uid in uids))
+        for uid in uids:
+            for key in (*rbac_cache_keys(uid), f"profile:{uid}"):
+                delete_cache(key)
     except Exception:
         pass
 
@@ -0,0 +1,111 @@
+"""
+Verificación de JWT compartida, con LRU de tokens ya verificados.
+
+Una request autenticada pasa por Audit, RequireAuth, AuthContext y las
+dependencias de ruta; antes cada capa decodificaba y verificaba el token. Ahora:
+
+- `verify_token` guarda en un LRU acotado (AUTH_TOKEN_CACHE_SIZE) el payload de
+  cada token válido, con clave sha256(token) (el token no queda en claro), hasta
+  su `exp`. Sólo se cachean tokens válidos: basura no desplaza entradas útiles.
+- `resolve_token_payload` resuelve el token de la request una sola vez y deja el
+  payload en `request.state.token_payload` (y `sub`) para el resto de capas.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from jose import jwt, JWTError
+from starlette.requests import Request
+from starlette.types import Scope
+
+from app.config.settings import (
+    AUTH_COOKIES_ENABLED,
+    AUTH_TOKEN_CACHE_NO_EXP_TTL,
+    AUTH_TOKEN_CACHE_SIZE,
+    JWT_ALGORITHM,
+    JWT_AUDIENCE,
+    JWT_SECRET_KEY,
+)
+from app.utils.metrics import increment
+
+# sha256(token) -> (payload, válido_hasta)
+_verified: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_lock = threading.Lock()
+
+# Marca en scope["state"]: el token de esta request ya se resolvió (válido o no)
+_RESOLVED = "_token_resolved"
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Payload de un JWT válido (firma, audience, exp). Lanza jose.JWTError si no lo es."""
+    key = _token_key(token)
+    now = time.time()
+    with _lock:
+        hit = _verified.get(key)
+        if hit is not None:
+            if hit[1] > now:
+                _verified.move_to_end(key)
+                increment("auth_token_cache", tags={"result": "hit"})
+                return dict(hit[0])
+            del _verified[key]
+    increment("auth_token_cache", tags={"result": "miss"})
+    payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
+    exp = payload.get("exp")
+    valid_until = float(exp) if isinstance(exp, (int, float)) else now + AUTH_TOKEN_CACHE_NO_EXP_TTL
+    if AUTH_TOKEN_CACHE_SIZE > 0:
+        with _lock:
+            _verified[key] = (dict(payload), valid_until)
+            _verified.move_to_end(key)
+            while len(_verified) > AUTH_TOKEN_CACHE_SIZE:
+                _verified.popitem(last=False)
+    return payload
+
+
+def token_cache_stats() -> Dict[str, int]:
+    with _lock:
+        return {"entries": len(_verified), "max_entries": AUTH_TOKEN_CACHE_SIZE}
+
+
+def token_from_scope(scope: Scope) -> Optional[str]:
+    """Bearer de Authorization o, si AUTH_COOKIES_ENABLED, la cookie access_token."""
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            auth = value.decode("latin-1")
+            if auth[:7].lower() == "bearer ":
+                token = auth[7:].strip()
+                if token:
+                    return token
+            break
+    if AUTH_COOKIES_ENABLED:
+        return Request(scope).cookies.get("access_token") or None
+    return None
+
+
+def resolve_token_payload(scope: Scope) -> Optional[Dict[str, Any]]:
+    """Payload del token de la request, verificado una sola vez por request.
+
+    Si es válido queda en request.state.token_payload / request.state.sub. Un token
+    ausente o inválido devuelve None; las dependencias siguen respondiendo 401.
+    """
+    state = scope.setdefault("state", {})
+    if state.get(_RESOLVED):
+        return state.get("token_payload")
+    state[_RESOLVED] = True
+    token = token_from_scope(scope)
+    if not token:
+        return None
+    try:
+        payload = verify_token(token)
+    except JWTError:
+        return None
+    state["token_payload"] = payload
+    state["sub"] = payload.get("sub")
+    return payload
@@ -1,7 +1,9 @@
 try:
     from app.api.odoo_webhook_router import ExtensionCompatAdapter as AppSwitchMiddleware  # type: ignore
 except Exception:
-    from starlette.middleware.base import BaseHTTPMiddleware
-    class AppSwitchMiddleware(BaseHTTPMiddleware):
-        async def dispatch(self, request, call_next):
-            return await call_next(request)
+    class AppSwitchMiddleware:  # type: ignore[no-redef]
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            await self.app(scope, receive, send)
@@ -1,11 +1,9 @@
 import time
 from typing import Optional
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
-from jose import jwt, JWTError
-from app.config.settings import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_AUDIENCE
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.audit.audit_logger import record_request_timing
+from app.core.auth.token_verifier import resolve_token_payload
 
 
 def _get_client_ip(request: Request) -> str:
@@ -17,44 +15,61 @@ def _get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "-"
 
 
-def _get_user_id_from_auth(request: Request) -> Optional[str]:
-    auth = request.headers.get("authorization") or request.headers.get("Authorization")
-    if not auth or not auth.lower().startswith("bearer "):
-        return None
-    token = auth.split(" ", 1)[1].strip()
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM], audience=JWT_AUDIENCE)
-        sub = payload.get("sub")
-        return str(sub) if sub is not None else None
-    except JWTError:
+def _get_user_id_from_auth(scope: Scope) -> Optional[str]:
+    # Payload resuelto una vez por request (compartido con AuthContext/RequireAuth)
+    payload = resolve_token_payload(scope)
+    if not payload:
         return None
+    sub = payload.get("sub")
+    return str(sub) if sub is not None else None
+
+
+class AuditMiddleware:
+    """Middleware de auditoría privado: mide requests y delega a servicio de auditoría.
 
+    ASGI puro: el tiempo cubre hasta el último bloque del cuerpo (incluido streaming).
+    """
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    """Middleware de auditoría privado: mide requests y delega a servicio de auditoría."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         start = time.perf_counter()
-        user_id = _get_user_id_from_auth(request)
+        request = Request(scope)
+        user_id = _get_user_id_from_auth(scope)
         ip = _get_client_ip(request)
         ua = request.headers.get("user-agent", "-")
-        path = request.url.path
-        if request.url.query:
-            path = f"{path}?{request.url.query}"
+        path = scope["path"]
+        query = scope.get("query_string", b"")
+        if query:
+            path = f"{path}?{query.decode('latin-1')}"
+        status_code = 0
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_with_status)
         finally:
             duration_ms = (time.perf_counter() - start) * 1000.0
-            status = getattr(request.state, "_forced_status", None) or getattr(
-                locals().get("response", None), "status_code", 0
-            )
+            state = scope.get("state", {})
+            # El router de FastAPI deja la ruta resuelta en el scope (plantilla, sin ids)
+            route = getattr(scope.get("route"), "path", None)
+            status = state.get("_forced_status") or status_code
             record_request_timing(
-                method=request.method,
+                method=scope["method"],
                 path=path,
                 status=status,
                 duration_ms=duration_ms,
                 user_id=user_id,
                 ip=ip,
                 ua=ua,
+                correlation_id=state.get("correlation_id"),
+                route=route,
             )
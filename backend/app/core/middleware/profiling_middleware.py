@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import PROFILER_REQUEST_INTERVAL_MS
+from app.observability.profiler import (
+    ID_HEADER,
+    TOKEN_HEADER,
+    Sampler,
+    asave_request_profile,
+    release_slot,
+    try_acquire_slot,
+    verify_request_token,
+)
+from app.utils.metrics import increment
+
+
+class ProfilingMiddleware:
+    """Perfil por muestreo de una request concreta, activado con `X-Profile-Token` firmado.
+
+    Sin cabecera (o con firma inválida) sólo cuesta leer las cabeceras. El muestreo
+    cubre todos los hilos del worker mientras dura la request; el resultado queda en
+    la caché compartida bajo `X-Profile-Id` (GET /admin/profile/requests/{id}).
+    Sólo se registra si PROFILER_ENABLED y PROFILER_SECRET están definidos.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = Headers(scope=scope).get(TOKEN_HEADER)
+        if not token or not verify_request_token(token, scope["method"], scope["path"]):
+            if token:
+                increment("profiler_token_rejected")
+            await self.app(scope, receive, send)
+            return
+        if not try_acquire_slot():
+            increment("profiler_busy", tags={"kind": "request"})
+            await self.app(scope, receive, send)
+            return
+
+        # Id propio: el correlation id lo elige el cliente y no debe nombrar la clave de caché
+        profile_id = uuid.uuid4().hex
+        status_code = 0
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[ID_HEADER] = profile_id
+            await send(message)
+
+        sampler = Sampler(PROFILER_REQUEST_INTERVAL_MS / 1000.0).start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # stop() espera al hilo muestreador: fuera del event loop
+            collapsed = await asyncio.to_thread(sampler.stop)
+            release_slot()
+            increment("profiler_runs", tags={"kind": "request"})
+            await asave_request_profile(
+                profile_id,
+                {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "pid": os.getpid(),
+                    "ts": time.time(),
+                    "duration_ms": round(sampler.duration * 1000.0, 2),
+                    "samples": sampler.samples,
+                },
+                collapsed,
+            )
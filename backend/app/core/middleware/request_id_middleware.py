@@ -1,25 +1,41 @@
 from __future__ import annotations
 
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.utils.logging_config import correlation_id
 
-class RequestIdMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, header_name: str = "X-Request-ID"):
-        super().__init__(app)
+
+class RequestIdMiddleware:
+    """Correlation-ID: reutiliza la cabecera entrante o genera uno, lo deja en
+    request.state.correlation_id y lo añade a la respuesta (ASGI puro). Mientras
+    dura la request también queda en `logging_config.correlation_id`, de donde lo
+    toman todos los registros de log."""
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID"):
+        self.app = app
         self.header_name = header_name
 
-    async def dispatch(self, request: Request, call_next) -> Response:  # type: ignore[override]
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         # Get or create correlation id
-        cid = request.headers.get(self.header_name)
+        state = scope.setdefault("state", {})
+        # Cabecera entrante, o el fijado por TracingMiddleware (trace id), o uno nuevo
+        cid = Headers(scope=scope).get(self.header_name) or state.get("correlation_id")
         if not cid:
             cid = uuid.uuid4().hex
+        state["correlation_id"] = cid
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).setdefault(self.header_name, cid)
+            await send(message)
+
+        token = correlation_id.set(cid)
         try:
-            request.state.correlation_id = cid  # type: ignore[attr-defined]
-        except Exception:
-            pass
-        response = await call_next(request)
-        response.headers.setdefault(self.header_name, cid)
-        return response
+            await self.app(scope, receive, send_with_id)
+        finally:
+            correlation_id.reset(token)
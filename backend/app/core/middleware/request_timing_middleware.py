@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import DB_QUERY_HEADER_ENABLED, REQUEST_SLOW_MS, SERVER_TIMING_ENABLED
+from app.observability import query_counter, request_timing
+from app.utils.metrics import increment
+
+logger = logging.getLogger("app.request.slow")
+
+
+class RequestTimingMiddleware:
+    """Desglose del tiempo de la request por dependencia (ASGI puro).
+
+    Abre el contexto de `app.observability.request_timing`, añade `Server-Timing` al
+    iniciar la respuesta (lo gastado hasta ese momento) y, si la request supera
+    REQUEST_SLOW_MS, escribe un log con totales y llamadas por dependencia. Al
+    terminar pasa el conteo de queries a `query_counter.report` (métricas y N+1).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rt, token = request_timing.begin()
+        status_code = 0
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED or DB_QUERY_HEADER_ENABLED:
+                    headers = MutableHeaders(scope=message)
+                    if SERVER_TIMING_ENABLED:
+                        headers.append("Server-Timing", rt.server_timing())
+                    if DB_QUERY_HEADER_ENABLED:
+                        headers.append(query_counter.HEADER, query_counter.header_value(rt))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timing.end(token)
+            total = rt.elapsed()
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            if rt.queries:
+                query_counter.report(route, rt, correlation_id=scope.get("state", {}).get("correlation_id"))
+            if REQUEST_SLOW_MS > 0 and total * 1000.0 >= REQUEST_SLOW_MS:
+                _log_slow(scope, route, status_code, total, rt)
+
+
+def _log_slow(scope: Scope, route: str, status: int, total: float, rt: request_timing.RequestTiming) -> None:
+    deps = rt.summary(total)
+    increment("request_slow", tags={"route": route})
+    state = scope.get("state", {})
+    breakdown = " ".join(f"{k}={v['ms']:.0f}ms/{v['calls']}" for k, v in deps.items())
+    logger.warning(
+        f"request.slow {scope['method']} {route} {total * 1000.0:.0f}ms status={status} {breakdown}",
+        extra={
+            "correlation_id": state.get("correlation_id"),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status,
+            "duration_ms": round(total * 1000.0, 2),
+            "deps": deps,
+        },
+    )
@@ -2,23 +2,23 @@ from __future__ import annotations
 
 from typing import Iterable
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from app.core.auth.session_manager import extract_token_from_request, decode_token
+from app.core.auth.token_verifier import resolve_token_payload, token_from_scope
 from app.config.settings import ROOT_PATH
 
 
-class RequireAuthMiddleware(BaseHTTPMiddleware):
+class RequireAuthMiddleware:
     """Middleware that enforces a valid access token for selected path prefixes.
 
     Public endpoints (health, docs, auth login/register/refresh, OAuth callbacks) stay open.
     Authorization (permissions/roles) remains at the route level via dependencies.
+    Pure ASGI: no task or body-stream wrapping per request.
     """
 
-    def __init__(self, app, protected_prefixes: Iterable[str] | None = None):  # type: ignore[no-untyped-def]
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, protected_prefixes: Iterable[str] | None = None):
+        self.app = app
         # Defaults: guard typical authenticated modules
         self.protected = list(protected_prefixes or [
             "/due",
@@ -53,8 +53,11 @@ class RequireAuthMiddleware(BaseHTTPMiddleware):
                 return True
         return False
 
-    async def dispatch(self, request: Request, call_next) -> Response:  # type: ignore[override]
-        path = request.url.path
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
         # Support apps mounted with root_path by also checking without it
         try:
             rp = ROOT_PATH or ""
@@ -65,22 +68,17 @@ class RequireAuthMiddleware(BaseHTTPMiddleware):
         except Exception:
             short = path
 
-        if self._is_public(short):
-            return await call_next(request)
-
-        if not self._is_protected(short):
-            return await call_next(request)
+        if self._is_public(short) or not self._is_protected(short):
+            await self.app(scope, receive, send)
+            return
 
         # Enforce: must have valid token (no DB consults here)
-        token = extract_token_from_request(request, None)
-        if not token:
-            return JSONResponse({"detail": "Falta token"}, status_code=401)
-        try:
-            payload = decode_token(token)
-            # cache for downstream
-            request.state.token_payload = payload  # type: ignore[attr-defined]
-            request.state.sub = payload.get("sub")  # type: ignore[attr-defined]
-        except Exception:
-            return JSONResponse({"detail": "Token inválido"}, status_code=401)
+        if not token_from_scope(scope):
+            await JSONResponse({"detail": "Falta token"}, status_code=401)(scope, receive, send)
+            return
+        # Verificado una vez por request; queda en request.state para el resto
+        if resolve_token_payload(scope) is None:
+            await JSONResponse({"detail": "Token inválido"}, status_code=401)(scope, receive, send)
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import TRACING_ENABLED
+from app.observability import tracing
+
+
+class TracingMiddleware:
+    """Span raíz SERVER por request (ASGI puro; ver `app.observability.tracing`).
+
+    Va por fuera de RequestIdMiddleware: si la request no trae X-Request-ID y se
+    traza, el trace id queda como correlation id y RequestIdMiddleware lo reutiliza.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        state = scope.setdefault("state", {})
+        cid = headers.get(tracing.REQUEST_ID_HEADER) or state.get("correlation_id")
+        started = tracing.begin_request(scope["method"], scope["path"], headers.get(tracing.TRACEPARENT_HEADER), cid)
+        if started is None:
+            await self.app(scope, receive, send)
+            return
+        span, token = started
+        if not cid:
+            state["correlation_id"] = span.trace.trace_id
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            tracing.end_request(span, token, status=status_code, route=getattr(scope.get("route"), "path", None))
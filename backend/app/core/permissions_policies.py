@@ -1,8 +1,8 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db import models as m
-from app.core.auth.session_manager import get_current_user
+from app.core.auth.session_manager import get_current_user, get_request_cache, rbac_cache_keys, user_cache_tag
 from app.core.services.usage_service import get_active_subscription, get_feature_limit_from_plan
 from app.utils.adapters.cache_adapter import get_cache, set_cache
 from app.config.settings import SESSION_CACHE_TTL
@@ -13,12 +13,12 @@ def require_superadmin(user: m.User = Depends(get_current_user)):
     return user
 
 def require_role(role_slug: str):
-    def _dep(user: m.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    def _dep(request: Request, user: m.User = Depends(get_current_user), db: Session = Depends(get_db)):
         if getattr(user, "is_superadmin", False):
             return user
         uid = int(getattr(user, 'id'))
-        key = f"rbac:roles:{uid}"
-        roles = get_cache(key)
+        key = rbac_cache_keys(uid)[0]
+        roles = get_request_cache(request, key)
         if not isinstance(roles, (set, list, tuple)):
             rows = (
                 db.query(m.Role.slug)
@@ -30,19 +30,19 @@ def require_role(role_slug: str):
             coarse = (getattr(user, 'role', None) or '').strip()
             if coarse:
                 roles.add(coarse)
-            set_cache(key, roles, max(30, SESSION_CACHE_TTL))
+            set_cache(key, roles, max(30, SESSION_CACHE_TTL), tags=(user_cache_tag(uid),))
         if role_slug in set(roles):
             return user
         raise HTTPException(status_code=403, detail=f"Requiere rol: {role_slug}")
     return _dep
 
 def require_permission(perm_slug: str):
-    def _dep(user: m.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    def _dep(request: Request, user: m.User = Depends(get_current_user), db: Session = Depends(get_db)):
         if getattr(user, "is_superadmin", False):
             return user
         uid = int(getattr(user, 'id'))
-        key = f"rbac:perms:{uid}"
-        perms = get_cache(key)
+        key = rbac_cache_keys(uid)[1]
+        perms = get_request_cache(request, key)
         if not isinstance(perms, (set, list, tuple)):
             rows = (
                 db.query(m.Permission.slug)
@@ -52,7 +52,7 @@ def require_permission(perm_slug: str):
                 .all()
             )
             perms = set(slug for (slug,) in rows)
-            set_cache(key, perms, max(30, SESSION_CACHE_TTL))
+            set_cache(key, perms, max(30, SESSION_CACHE_TTL), tags=(user_cache_tag(uid),))
         if perm_slug in set(perms):
             return user
         raise HTTPException(status_code=403, detail=f"Falta permiso: {perm_slug}")
@@ -0,0 +1,103 @@
+"""add Odoo CRM mirror tables (crm.lead, res.partner) and sync state
+
+Revision ID: 20251020_add_odoo_crm_mirror
+Revises: 20251014_alter_token_length_sharing_invitations
+Create Date: 2025-10-20
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20251020_add_odoo_crm_mirror'
+down_revision = '20251014_alter_token_length_sharing_invitations'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    if 'odoo_crm_leads' not in tables:
+        op.create_table(
+            'odoo_crm_leads',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('profile', sa.String(length=32), nullable=False),
+            sa.Column('odoo_id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=512), nullable=True),
+            sa.Column('type', sa.String(length=32), nullable=True),
+            sa.Column('active', sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.Column('email_from', sa.String(length=255), nullable=True),
+            sa.Column('phone', sa.String(length=64), nullable=True),
+            sa.Column('expected_revenue', sa.Float(), nullable=True),
+            sa.Column('probability', sa.Float(), nullable=True),
+            sa.Column('priority', sa.String(length=8), nullable=True),
+            sa.Column('company_id', sa.JSON(), nullable=True),
+            sa.Column('partner_id', sa.JSON(), nullable=True),
+            sa.Column('stage_id', sa.JSON(), nullable=True),
+            sa.Column('company_odoo_id', sa.Integer(), nullable=True),
+            sa.Column('user_odoo_id', sa.Integer(), nullable=True),
+            sa.Column('team_odoo_id', sa.Integer(), nullable=True),
+            sa.Column('stage_odoo_id', sa.Integer(), nullable=True),
+            sa.Column('write_date', sa.DateTime(), nullable=True),
+            sa.Column('synced_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.UniqueConstraint('profile', 'odoo_id', name='uq_odoo_crm_leads_profile_odoo_id'),
+        )
+        op.create_index('ix_odoo_crm_leads_profile_company_type', 'odoo_crm_leads', ['profile', 'company_odoo_id', 'type', 'active'])
+        op.create_index('ix_odoo_crm_leads_profile_write_date', 'odoo_crm_leads', ['profile', 'write_date'])
+
+    if 'odoo_res_partners' not in tables:
+        op.create_table(
+            'odoo_res_partners',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('profile', sa.String(length=32), nullable=False),
+            sa.Column('odoo_id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=512), nullable=True),
+            sa.Column('active', sa.Boolean(), nullable=False, server_default=sa.true()),
+            sa.Column('email', sa.String(length=255), nullable=True),
+            sa.Column('phone', sa.String(length=64), nullable=True),
+            sa.Column('company_name', sa.String(length=255), nullable=True),
+            sa.Column('street', sa.String(length=255), nullable=True),
+            sa.Column('street2', sa.String(length=255), nullable=True),
+            sa.Column('city', sa.String(length=128), nullable=True),
+            sa.Column('zip', sa.String(length=32), nullable=True),
+            sa.Column('website', sa.String(length=255), nullable=True),
+            sa.Column('company_id', sa.JSON(), nullable=True),
+            sa.Column('country_id', sa.JSON(), nullable=True),
+            sa.Column('state_id', sa.JSON(), nullable=True),
+            sa.Column('activity_ids', sa.JSON(), nullable=True),
+            sa.Column('category_id', sa.JSON(), nullable=True),
+            sa.Column('company_odoo_id', sa.Integer(), nullable=True),
+            sa.Column('write_date', sa.DateTime(), nullable=True),
+            sa.Column('synced_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.UniqueConstraint('profile', 'odoo_id', name='uq_odoo_res_partners_profile_odoo_id'),
+        )
+        op.create_index('ix_odoo_res_partners_profile_active', 'odoo_res_partners', ['profile', 'active'])
+        op.create_index('ix_odoo_res_partners_profile_write_date', 'odoo_res_partners', ['profile', 'write_date'])
+
+    if 'odoo_sync_state' not in tables:
+        op.create_table(
+            'odoo_sync_state',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('profile', sa.String(length=32), nullable=False),
+            sa.Column('model', sa.String(length=64), nullable=False),
+            sa.Column('last_write_date', sa.DateTime(), nullable=True),
+            sa.Column('last_odoo_id', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('rows_synced', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('last_success_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('last_full_sync_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.UniqueConstraint('profile', 'model', name='uq_odoo_sync_state_profile_model'),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+    for table in ('odoo_sync_state', 'odoo_res_partners', 'odoo_crm_leads'):
+        if table in tables:
+            op.drop_table(table)
@@ -0,0 +1,50 @@
+"""add audit_events table (batched writes from the audit pipeline)
+
+Revision ID: 20251021_add_audit_events
+Revises: 20251020_add_odoo_crm_mirror
+Create Date: 2025-10-21
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20251021_add_audit_events'
+down_revision = '20251020_add_odoo_crm_mirror'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    if 'audit_events' not in tables:
+        op.create_table(
+            'audit_events',
+            sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+            sa.Column('ts', sa.DateTime(), nullable=False),
+            sa.Column('kind', sa.String(length=32), nullable=False),
+            sa.Column('method', sa.String(length=8), nullable=True),
+            sa.Column('path', sa.String(length=1024), nullable=True),
+            sa.Column('status', sa.Integer(), nullable=True),
+            sa.Column('duration_ms', sa.Float(), nullable=True),
+            sa.Column('user_id', sa.String(length=64), nullable=True),
+            sa.Column('email', sa.String(length=255), nullable=True),
+            sa.Column('ip', sa.String(length=64), nullable=True),
+            sa.Column('ua', sa.String(length=512), nullable=True),
+            sa.Column('correlation_id', sa.String(length=64), nullable=True),
+            sa.Column('extra', sa.JSON(), nullable=True),
+        )
+        op.create_index('ix_audit_events_ts', 'audit_events', ['ts'])
+        op.create_index('ix_audit_events_user_ts', 'audit_events', ['user_id', 'ts'])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if 'audit_events' in set(insp.get_table_names()):
+        op.drop_index('ix_audit_events_user_ts', table_name='audit_events')
+        op.drop_index('ix_audit_events_ts', table_name='audit_events')
+        op.drop_table('audit_events')
@@ -0,0 +1,103 @@
+"""audit_events: route column, daily partitions (MySQL) and rollup tables
+
+Revision ID: 20251022_audit_partitions_rollups
+Revises: 20251021_add_audit_events
+Create Date: 2025-10-22
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20251022_audit_partitions_rollups'
+down_revision = '20251021_add_audit_events'
+branch_labels = None
+depends_on = None
+
+
+def _is_partitioned(bind) -> bool:
+    return bool(
+        bind.execute(
+            sa.text(
+                "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_events' AND PARTITION_NAME IS NOT NULL"
+            )
+        ).scalar()
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    cols = {c['name'] for c in insp.get_columns('audit_events')}
+    if 'route' not in cols:
+        op.add_column('audit_events', sa.Column('route', sa.String(length=255), nullable=True))
+
+    if bind.dialect.name == 'mysql' and not _is_partitioned(bind):
+        # La clave de partición debe estar en todas las claves únicas: PK (id, ts)
+        op.execute("ALTER TABLE audit_events DROP PRIMARY KEY, ADD PRIMARY KEY (id, ts)")
+        # Una partición con todo lo existente hasta hoy + p_future; el hilo de rollups
+        # (app.audit.audit_store.maintain_partitions) crea las diarias siguientes
+        today = datetime.now(timezone.utc).date()
+        op.execute(
+            f"ALTER TABLE audit_events PARTITION BY RANGE (TO_DAYS(ts)) ("
+            f"PARTITION p{today:%Y%m%d} VALUES LESS THAN (TO_DAYS('{today + timedelta(days=1):%Y-%m-%d}')), "
+            f"PARTITION p_future VALUES LESS THAN MAXVALUE)"
+        )
+
+    if 'audit_rollup_minute' not in tables:
+        op.create_table(
+            'audit_rollup_minute',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('minute', sa.DateTime(), nullable=False),
+            sa.Column('route', sa.String(length=255), nullable=False),
+            sa.Column('method', sa.String(length=8), nullable=False),
+            sa.Column('status', sa.Integer(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('sum_ms', sa.Float(), nullable=False),
+            sa.Column('max_ms', sa.Float(), nullable=False),
+            sa.Column('buckets', sa.JSON(), nullable=False),
+            sa.UniqueConstraint('minute', 'route', 'method', 'status', name='uq_audit_rollup_minute_key'),
+        )
+        op.create_index('ix_audit_rollup_minute_route_minute', 'audit_rollup_minute', ['route', 'minute'])
+
+    if 'audit_user_activity' not in tables:
+        op.create_table(
+            'audit_user_activity',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('user_id', sa.String(length=64), nullable=False),
+            sa.Column('requests', sa.Integer(), nullable=False),
+            sa.Column('first_ts', sa.DateTime(), nullable=False),
+            sa.Column('last_ts', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('day', 'user_id', name='uq_audit_user_activity_day_user'),
+        )
+
+    if 'audit_rollup_state' not in tables:
+        op.create_table(
+            'audit_rollup_state',
+            sa.Column('name', sa.String(length=32), primary_key=True),
+            sa.Column('watermark', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = set(insp.get_table_names())
+
+    for name in ('audit_rollup_state', 'audit_user_activity', 'audit_rollup_minute'):
+        if name in tables:
+            op.drop_table(name)
+
+    if bind.dialect.name == 'mysql' and _is_partitioned(bind):
+        op.execute("ALTER TABLE audit_events REMOVE PARTITIONING")
+        op.execute("ALTER TABLE audit_events DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+
+    if 'route' in {c['name'] for c in insp.get_columns('audit_events')}:
+        op.drop_column('audit_events', 'route')
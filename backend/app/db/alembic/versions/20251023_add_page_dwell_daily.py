@@ -0,0 +1,40 @@
+"""add page_dwell_daily (page dwell aggregated per day and path)
+
+Revision ID: 20251023_add_page_dwell_daily
+Revises: 20251022_audit_partitions_rollups
+Create Date: 2025-10-23
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20251023_add_page_dwell_daily'
+down_revision = '20251022_audit_partitions_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if 'page_dwell_daily' not in set(insp.get_table_names()):
+        op.create_table(
+            'page_dwell_daily',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('path', sa.String(length=255), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('sum_ms', sa.Float(), nullable=False),
+            sa.Column('max_ms', sa.Float(), nullable=False),
+            sa.Column('buckets', sa.JSON(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.UniqueConstraint('day', 'path', name='uq_page_dwell_daily_day_path'),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if 'page_dwell_daily' in set(insp.get_table_names()):
+        op.drop_table('page_dwell_daily')
@@ -5,6 +5,7 @@ from app.config.settings import (
     MYSQL_HOST, MYSQL_PORT, MYSQL_DB, MYSQL_USER, MYSQL_PASSWORD,
     MYSQL_POOL_SIZE, MYSQL_MAX_OVERFLOW
 )
+from app.observability.query_counter import instrument_engine
 
 NAMING_CONVENTION = {
     "ix": "ix_%(column_0_N_label)s",
@@ -39,6 +40,12 @@ engine = create_engine(
     pool_recycle=1800,  # evita MySQL server has gone away en conexiones ociosas
     future=True,
 )
+
+
+# Conteo y tiempo de sentencias por request (desglose `db` y detección de N+1)
+instrument_engine(engine)
+
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
 
 def get_db():
@@ -22,6 +22,9 @@ from .enums import (
 from .release import Release, ReleaseSection
 from .user_preferences import UserPreference
 from .sharing import SharingInvitation, SharingSnapshot
+from .odoo_mirror import OdooLeadMirror, OdooPartnerMirror, OdooSyncState
+from .audit import AuditEvent, AuditRollupMinute, AuditUserActivity, AuditRollupState
+from .page_dwell import PageDwellDaily
 
 __all__ = [
     "User",
@@ -48,4 +51,12 @@ __all__ = [
     "UserPreference",
     "SharingInvitation",
     "SharingSnapshot",
+    "OdooLeadMirror",
+    "OdooPartnerMirror",
+    "OdooSyncState",
+    "AuditEvent",
+    "AuditRollupMinute",
+    "AuditUserActivity",
+    "AuditRollupState",
+    "PageDwellDaily",
 ]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    JSON,
+    String,
+    UniqueConstraint,
+)
+
+from app.db.database import Base
+
+
+class AuditEvent(Base):
+    """Evento de auditoría (requests, login/logout) escrito en lote por el pipeline de auditoría.
+
+    En MySQL la tabla se particiona por día (RANGE sobre TO_DAYS(ts), ver
+    `app.audit.audit_store`): por eso `ts` forma parte de la clave primaria.
+    """
+    __tablename__ = "audit_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ts = Column(DateTime, primary_key=True, nullable=False)  # UTC
+    kind = Column(String(32), nullable=False)  # request | login_success | login_failure | logout
+    method = Column(String(8), nullable=True)
+    path = Column(String(1024), nullable=True)
+    route = Column(String(255), nullable=True)  # plantilla de la ruta (/odoo/leads/{lead_id})
+    status = Column(Integer, nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    user_id = Column(String(64), nullable=True)
+    email = Column(String(255), nullable=True)
+    ip = Column(String(64), nullable=True)
+    ua = Column(String(512), nullable=True)
+    correlation_id = Column(String(64), nullable=True)
+    extra = Column(JSON(none_as_null=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_audit_events_ts", "ts"),
+        Index("ix_audit_events_user_ts", "user_id", "ts"),
+    )
+
+
+class AuditRollupMinute(Base):
+    """Agregado por minuto, ruta, método y status: conteo, suma/máximo e histograma de latencia.
+
+    `buckets` son conteos no acumulados sobre `ROLLUP_BUCKETS_MS` (+Inf al final),
+    así los percentiles de cualquier rango se calculan sumando filas.
+    """
+    __tablename__ = "audit_rollup_minute"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    minute = Column(DateTime, nullable=False)  # UTC, truncado al minuto
+    route = Column(String(255), nullable=False)
+    method = Column(String(8), nullable=False)
+    status = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    sum_ms = Column(Float, nullable=False, default=0.0)
+    max_ms = Column(Float, nullable=False, default=0.0)
+    buckets = Column(JSON, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("minute", "route", "method", "status", name="uq_audit_rollup_minute_key"),
+        Index("ix_audit_rollup_minute_route_minute", "route", "minute"),
+    )
+
+
+class AuditUserActivity(Base):
+    """Usuarios activos por día (una fila por usuario con requests autenticadas ese día)."""
+    __tablename__ = "audit_user_activity"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(String(64), nullable=False)
+    requests = Column(Integer, nullable=False, default=0)
+    first_ts = Column(DateTime, nullable=False)
+    last_ts = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "user_id", name="uq_audit_user_activity_day_user"),
+    )
+
+
+class AuditRollupState(Base):
+    """Marca de agua de los rollups: minutos anteriores a `watermark` ya agregados."""
+    __tablename__ = "audit_rollup_state"
+
+    name = Column(String(32), primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
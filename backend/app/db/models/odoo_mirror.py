@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Boolean,
+    Float,
+    Text,
+    JSON,
+    UniqueConstraint,
+    Index,
+    func,
+)
+
+from app.db.database import Base
+
+
+class OdooLeadMirror(Base):
+    """Copia local de `crm.lead` (leads y oportunidades) sincronizada por write_date.
+
+    Los many2one se guardan tal cual llegan de Odoo ([id, nombre]) para devolver
+    el mismo shape que la API en vivo, y además su id en columnas indexadas para
+    filtrar (compañía, equipo, comercial, etapa).
+    """
+    __tablename__ = "odoo_crm_leads"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile = Column(String(32), nullable=False, default="default")
+    odoo_id = Column(Integer, nullable=False)
+    name = Column(String(512), nullable=True)
+    type = Column(String(32), nullable=True)  # lead | opportunity
+    active = Column(Boolean, nullable=False, default=True)
+    email_from = Column(String(255), nullable=True)
+    phone = Column(String(64), nullable=True)
+    expected_revenue = Column(Float, nullable=True)
+    probability = Column(Float, nullable=True)
+    priority = Column(String(8), nullable=True)
+    company_id = Column(JSON, nullable=True)
+    partner_id = Column(JSON, nullable=True)
+    stage_id = Column(JSON, nullable=True)
+    company_odoo_id = Column(Integer, nullable=True)
+    user_odoo_id = Column(Integer, nullable=True)
+    team_odoo_id = Column(Integer, nullable=True)
+    stage_odoo_id = Column(Integer, nullable=True)
+    write_date = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("profile", "odoo_id", name="uq_odoo_crm_leads_profile_odoo_id"),
+        Index("ix_odoo_crm_leads_profile_company_type", "profile", "company_odoo_id", "type", "active"),
+        Index("ix_odoo_crm_leads_profile_write_date", "profile", "write_date"),
+    )
+
+
+class OdooPartnerMirror(Base):
+    """Copia local de `res.partner` (clientes) sincronizada por write_date."""
+    __tablename__ = "odoo_res_partners"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile = Column(String(32), nullable=False, default="default")
+    odoo_id = Column(Integer, nullable=False)
+    name = Column(String(512), nullable=True)
+    active = Column(Boolean, nullable=False, default=True)
+    email = Column(String(255), nullable=True)
+    phone = Column(String(64), nullable=True)
+    company_name = Column(String(255), nullable=True)
+    street = Column(String(255), nullable=True)
+    street2 = Column(String(255), nullable=True)
+    city = Column(String(128), nullable=True)
+    zip = Column(String(32), nullable=True)
+    website = Column(String(255), nullable=True)
+    company_id = Column(JSON, nullable=True)
+    country_id = Column(JSON, nullable=True)
+    state_id = Column(JSON, nullable=True)
+    activity_ids = Column(JSON, nullable=True)
+    category_id = Column(JSON, nullable=True)
+    company_odoo_id = Column(Integer, nullable=True)
+    write_date = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("profile", "odoo_id", name="uq_odoo_res_partners_profile_odoo_id"),
+        Index("ix_odoo_res_partners_profile_active", "profile", "active"),
+        Index("ix_odoo_res_partners_profile_write_date", "profile", "write_date"),
+    )
+
+
+class OdooSyncState(Base):
+    """Marca de agua por (perfil, modelo): último (write_date, id) copiado."""
+    __tablename__ = "odoo_sync_state"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    profile = Column(String(32), nullable=False)
+    model = Column(String(64), nullable=False)
+    last_write_date = Column(DateTime, nullable=True)
+    last_odoo_id = Column(Integer, nullable=False, default=0)
+    rows_synced = Column(Integer, nullable=False, default=0)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_success_at = Column(DateTime(timezone=True), nullable=True)
+    last_full_sync_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("profile", "model", name="uq_odoo_sync_state_profile_model"),
+    )
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Date, DateTime, Float, Integer, JSON, String, UniqueConstraint, func
+
+from app.db.database import Base
+
+
+class PageDwellDaily(Base):
+    """Permanencia en páginas del frontend agregada por (día, ruta).
+
+    `buckets` son conteos no acumulados sobre `DWELL_BUCKETS_MS` (+Inf al final):
+    los percentiles de varios días se obtienen sumando filas.
+    """
+    __tablename__ = "page_dwell_daily"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)  # UTC
+    path = Column(String(255), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    sum_ms = Column(Float, nullable=False, default=0.0)
+    max_ms = Column(Float, nullable=False, default=0.0)
+    buckets = Column(JSON, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "path", name="uq_page_dwell_daily_day_path"),
+    )
@@ -115,10 +115,9 @@ def revoke_all_active_sessions_for_user(db: Session, user_id: int, reason: str =
     if count:
         db.commit()
         try:
-            for st in rows:
-                sid = getattr(st, 'token_hash', None)
-                if isinstance(sid, str) and sid:
-                    invalidate_session_cache(sid)
+            # Un solo lote de invalidación por etiqueta para todas las sesiones
+            sids = [getattr(st, 'token_hash', None) for st in rows]
+            invalidate_session_cache(*[sid for sid in sids if isinstance(sid, str) and sid])
         except Exception:
             pass
     return count
@@ -154,10 +153,9 @@ def revoke_other_active_sessions_for_user(db: Session, user_id: int, keep_token_
     if count:
         db.commit()
         try:
-            for st in rows:
-                sid = getattr(st, 'token_hash', None)
-                if isinstance(sid, str) and sid:
-                    invalidate_session_cache(sid)
+            # Un solo lote de invalidación por etiqueta para todas las sesiones
+            sids = [getattr(st, 'token_hash', None) for st in rows]
+            invalidate_session_cache(*[sid for sid in sids if isinstance(sid, str) and sid])
         except Exception:
             pass
     return count
@@ -4,6 +4,7 @@ from typing import Any, Dict, Iterable
 from sqlalchemy.orm import Session
 from app.db import models as m
 from app.auth.security_passwords import hash_password
+from app.core.auth.session_manager import invalidate_user_cache
 
 PLANS: Dict[str, Dict[str, Any]] = {
     "started": {
@@ -140,16 +141,23 @@ def ensure_seed_roles(db: Session) -> None:
         if not has:
             db.add(m.UserRole(user_id=superadmin.id, role_id=admin_role.id))
             db.commit()
+            invalidate_user_cache(int(superadmin.id))
 
 
 def _ensure_role_permissions(db: Session, role: m.Role, perm_slugs: Iterable[str]) -> None:
     perms = db.query(m.Permission).filter(m.Permission.slug.in_(list(perm_slugs))).all()
     existing = db.query(m.RolePermission).filter(m.RolePermission.role_id == role.id).all()
     existing_perm_ids = {rp.permission_id for rp in existing}
+    added = False
     for p in perms:
         if p.id not in existing_perm_ids:
             db.add(m.RolePermission(role_id=role.id, permission_id=p.id))
+            added = True
     db.commit()
+    if added:
+        # Los permisos RBAC cacheados de quienes tienen el rol quedan obsoletos
+        holders = db.query(m.UserRole.user_id).filter(m.UserRole.role_id == role.id).all()
+        invalidate_user_cache(*(int(uid) for (uid,) in holders))
 
 
 def ensure_seed_rbac(db: Session) -> None:
@@ -8,4 +8,5 @@ from app.integrations.odoo.odoo_connector import OdooConnector
 
 
 class ArgusConnector(OdooConnector):
-    pass
+    # Breaker y límite de concurrencia propios: Argus no compite con el CRM por huecos
+    default_profile = "argus"
@@ -15,6 +15,7 @@ from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from app.core.auth.guards import disallow_roles
+from app.utils.exceptions import OdooUnavailableError
 
 router = APIRouter(prefix="/argus", tags=["Argus"], dependencies=[Depends(disallow_roles("cliente"))])
 
@@ -38,6 +39,8 @@ def prices(
         page = get_argus_prices(limit=limit, offset=offset, order=order, product_description=product_description, date_from=date_from, date_to=date_to, with_total=with_total, shape=shape, cursor_id=cursor_id, date_pref=date_pref, q=q)
         response.headers["Cache-Control"] = "public, max-age=60, stale-while-revalidate=300"
         return page
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -48,6 +51,8 @@ def price_products(response: Response):
         data = get_argus_product_descriptions()
         response.headers["Cache-Control"] = "public, max-age=3600"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -59,6 +64,8 @@ def products_search(response: Response, q: Optional[str] = Query(None, descripti
         data = get_argus_product_search(q=q, limit=limit)
         response.headers["Cache-Control"] = "public, max-age=300"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -76,6 +83,8 @@ def news_list(
         data = get_argus_news_list(limit, offset, order, fields, cursor_id=cursor_id)
         response.headers["Cache-Control"] = "public, max-age=120, stale-while-revalidate=600"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -90,6 +99,8 @@ def news_detail(response: Response, news_odoo_id: int):
         return out
     except HTTPException:
         raise
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -106,6 +117,8 @@ def prices_audit(response: Response, page_size: int = Query(2000, ge=100, le=500
         # Cache corto lado cliente (sólo métricas, no datos sensibles)
         response.headers["Cache-Control"] = "public, max-age=60"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -128,6 +141,8 @@ def prices_today(
         page = get_argus_prices_today(limit=limit, offset=offset, order=order, product_description=product_description, with_total=with_total, shape=shape, cursor_id=cursor_id, date_pref=date_pref, q=q)
         response.headers["Cache-Control"] = "public, max-age=60, stale-while-revalidate=300"
         return page
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -142,6 +157,8 @@ def prices_count(
     try:
         total = get_argus_prices_count(product_description=product_description, date_from=date_from, date_to=date_to, q=q)
         return {"total": int(total)}
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -160,6 +177,8 @@ async def prices_summary(
         data = await run_in_threadpool(get_argus_prices_summary, group_by, product_description, date_from, date_to, date_pref, q)
         response.headers["Cache-Control"] = "public, max-age=900"
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -177,5 +196,7 @@ async def prices_bulk_history(req: BulkHistoryRequest):
         # Ejecutar en threadpool porque llama a Odoo (bloqueante)
         data = await run_in_threadpool(lambda: bulk_history_by_products(products=req.products, limit_per_product=req.limit_per_product, date_from=req.date_from, date_to=req.date_to))
         return data
+    except OdooUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
@@ -9,7 +9,8 @@ from app.integrations.argus.argus_normalizers import (
     normalize_argus_news_list_row,
     normalize_argus_news_detail_row,
 )
-from app.utils.adapters.cache_adapter import get_cache, set_cache
+from app.utils.adapters.cache_adapter import get_cache, set_cache, set_many, record_backup_fallback
+from app.observability import request_timing
 from app.config.settings import (
     CACHE_TTL_ARGUS_NEWS_LIST,
     CACHE_TTL_ARGUS_NEWS_DETAIL,
@@ -37,14 +38,13 @@ def _cache_put_with_backup(key: str, value, ttl: int, backup_ttl: int = 24*3600)
     """Guarda en caché principal y una copia de respaldo con TTL largo.
     Así podemos servir datos 'stale' si Odoo falla temporalmente.
     """
-    set_cache(key, value, ttl_seconds=ttl)
-    set_cache(f"{key}:backup", value, ttl_seconds=backup_ttl)
+    set_many([(key, value, ttl), (f"{key}:backup", value, backup_ttl)])
 
-def _cache_get_with_backup(key: str):
-    val = get_cache(key)
-    if val is not None:
-        return val
-    return get_cache(f"{key}:backup")
+def _cache_get_backup(key: str):
+    # Sólo se llama cuando Odoo falló y la clave principal ya dio miss dentro del lock
+    val = get_cache(f"{key}:backup")
+    record_backup_fallback(key, served=val is not None)
+    return val
 
 def _get_connector() -> ArgusConnector:
     global _connector
@@ -211,7 +211,7 @@ def get_argus_prices(
             )
         except Exception:
             # fallback a copia de respaldo si existe
-            stale = _cache_get_with_backup(cache_key)
+            stale = _cache_get_backup(cache_key)
             if stale is not None:
                 return stale
             raise
@@ -235,12 +235,14 @@ def get_argus_prices(
         pass
     if shape == "compact":
         dp = date_pref if date_pref in ("publication", "fmt") else "publication"
-        compact_list = [collapse_price_row(r, date_pref=dp) for r in rows]
+        with request_timing.timed("normalize"):
+            compact_list = [collapse_price_row(r, date_pref=dp) for r in rows]
         # cachear resultado
         out = ArgusPricePage(total_count=total, records=[], records_compact=compact_list)
         _cache_put_with_backup(cache_key, out, ttl=CACHE_TTL_ARGUS_PRICES)
         return out
-    normalized = [ArgusPrice(**normalize_argus_price_row(r)) for r in rows]
+    with request_timing.timed("normalize"):
+        normalized = [ArgusPrice(**normalize_argus_price_row(r)) for r in rows]
     out = ArgusPricePage(total_count=total, records=normalized, records_compact=None)
     _cache_put_with_backup(cache_key, out, ttl=CACHE_TTL_ARGUS_PRICES)
     return out
@@ -489,7 +491,7 @@ def get_argus_news_list(limit: int = 80, offset: int = 0, order: str = "id desc"
                 offset=offset,
             )
         except Exception:
-            stale = _cache_get_with_backup(cache_key)
+            stale = _cache_get_backup(cache_key)
             if stale is not None:
                 return stale
             raise
@@ -528,7 +530,7 @@ def get_argus_news_detail(news_odoo_id: int) -> ArgusNewsDetail | None:
                 )
                 rec = rows[0] if rows else None
         except Exception:
-            stale = _cache_get_with_backup(cache_key)
+            stale = _cache_get_backup(cache_key)
             if stale is not None:
                 return stale
             raise
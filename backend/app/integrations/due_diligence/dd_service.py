@@ -5,11 +5,16 @@ from typing import Any, Dict
 import httpx
 import logging
 from app.utils.metrics import Timer, increment
+from app.observability import request_timing
+from app.observability.tracing import httpx_event_hooks
 
 from app.config.settings import DUE_N8N_WEBHOOK_URL, DUE_N8N_TIMEOUT
 
 logger = logging.getLogger("app.integrations.due")
 
+# Los workflows n8n tardan segundos o minutos: buckets más anchos que los de latencia
+N8N_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
 
 def _normalize_result(obj: Any) -> Any:
     """Best-effort normalization of n8n responses.
@@ -40,7 +45,7 @@ def run_due_diligence(payload: Dict[str, Any]) -> Any:
         return {"echo": True, "input": payload}
 
     try:
-        with httpx.Client(timeout=DUE_N8N_TIMEOUT) as client:
+        with httpx.Client(timeout=DUE_N8N_TIMEOUT, event_hooks=httpx_event_hooks()) as client:
             # Force English responses from downstream workflow when supported
             headers = {
                 "Accept": "application/json",
@@ -48,7 +53,7 @@ def run_due_diligence(payload: Dict[str, Any]) -> Any:
                 # Some workflows may inspect custom or non-standard hints
                 "X-Preferred-Language": "en",
             }
-            with Timer("due.n8n.request"):
+            with Timer("due.n8n.request", buckets=N8N_BUCKETS), request_timing.timed("n8n"):
                 res = client.post(url, json=payload, headers=headers)
 
             # Treat non-2xx as error and return structured info
@@ -120,13 +125,13 @@ async def run_due_diligence_async(payload: Dict[str, Any]) -> Any:
         return {"echo": True, "input": payload}
 
     try:
-        async with httpx.AsyncClient(timeout=DUE_N8N_TIMEOUT) as client:
+        async with httpx.AsyncClient(timeout=DUE_N8N_TIMEOUT, event_hooks=httpx_event_hooks(asynchronous=True)) as client:
             headers = {
                 "Accept": "application/json",
                 "Accept-Language": "en-US,en;q=0.9",
                 "X-Preferred-Language": "en",
             }
-            with Timer("due.n8n.request"):
+            with Timer("due.n8n.request", buckets=N8N_BUCKETS), request_timing.timed("n8n"):
                 res = await client.post(url, json=payload, headers=headers)
 
             if res.status_code < 200 or res.status_code >= 300:
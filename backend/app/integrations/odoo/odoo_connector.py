@@ -3,13 +3,19 @@ Conector genérico para Odoo vía XML-RPC.
 
 Responsabilidades:
 - Autenticación y transporte XML-RPC con timeout y reintentos.
-- Ejecución segura de `execute_kw`.
+- Circuit breaker y límite de concurrencia adaptativo por perfil (`odoo_resilience`):
+  con Odoo caído o saturado las llamadas fallan rápido con `OdooUnavailableError`.
+- Ejecución segura de `execute_kw`, con latencia, bytes, filas y reintentos por
+  llamada y registro de llamadas lentas (`odoo_rpc_stats`).
 - Utilidades genéricas (obtener zona horaria, sanitizar campos).
+- Metadatos (uid, tz, fields_get) en la caché compartida, por url/db/modelo,
+  con TTL (ODOO_METADATA_TTL): los comparten workers y perfiles del mismo servidor.
 - Métodos genéricos: `search_count`, `search_read`, `read`, `read_group`.
 
 La lógica de negocio debe residir en servicios (p. ej., `odoo_service`).
 """
 import xmlrpc.client
+import hashlib
 from urllib.parse import urlsplit, urlunsplit
 from functools import lru_cache
 import threading
@@ -17,12 +23,16 @@ import time
 from typing import Any, cast
 import logging
 from app.utils.metrics import increment, Timer
+from app.utils.adapters.cache_adapter import get_cache, set_cache, invalidate_tags
 
 from app.config.settings import (
     ODOO_URL, ODOO_DB, ODOO_USER, ODOO_PASSWORD, ODOO_TIMEOUT,
-    ODOO_MAX_RETRIES, ODOO_RETRY_BACKOFF,
+    ODOO_MAX_RETRIES, ODOO_RETRY_BACKOFF, ODOO_METADATA_TTL,
 )
-from app.utils.exceptions import OdooServiceError
+from app.utils.exceptions import OdooServiceError, OdooUnavailableError
+from app.integrations.odoo.odoo_resilience import get_guard
+from app.integrations.odoo.odoo_rpc_stats import RpcCall, CountingResponse, add_request_bytes
+from app.observability import request_timing, tracing
 
 
 class OdooConfigError(RuntimeError):
@@ -49,6 +59,14 @@ class _TimeoutTransport(xmlrpc.client.Transport):
             pass
         return conn
 
+    # Tamaños en el cable para odoo_rpc_stats (request_body ya viene serializado)
+    def send_request(self, host, handler, request_body, debug):  # type: ignore[override]
+        add_request_bytes(len(request_body))
+        return super().send_request(host, handler, request_body, debug)
+
+    def parse_response(self, response):  # type: ignore[override]
+        return super().parse_response(CountingResponse(response))
+
 
 _thread_local = threading.local()
 
@@ -91,6 +109,9 @@ def _get_proxies_threadlocal(url: str):
 class OdooConnector:
     """Conector Odoo con timeout, reintentos y utilidades genéricas."""
 
+    # Perfil para breaker/limitador cuando no se indica uno explícito
+    default_profile = "default"
+
     def __init__(
         self,
         url: str | None = None,
@@ -98,26 +119,75 @@ class OdooConnector:
         username: str | None = None,
         password: str | None = None,
         *,
+        profile: str | None = None,
         eager: bool = False,
     ):
         self.url = _require(url or ODOO_URL, "ODOO_URL")
         self.db = _require(db or ODOO_DB, "ODOO_DB")
         self.username = _require(username or ODOO_USER, "ODOO_USER")
         self.password = _require(password or ODOO_PASSWORD, "ODOO_PASSWORD")
+        self.profile = profile or self.default_profile
         self._uid: int | None = None
-        self._tz: str | None = None
+        # Memo local delante de la caché compartida: tz y fields_get se consultan en
+        # cada RPC y no deben costar un GET a Redis cada vez. nombre -> (valor, expira)
+        self._meta_memo: dict[str, tuple[Any, float]] = {}
         self._lock = threading.Lock()
-        # Cache simple de campos por modelo -> set[str]
-        self._model_fields: dict[str, set[str]] = {}
         if eager:
             self.authenticate()
 
+    # --- Metadatos en caché compartida ---
+    @property
+    def metadata_scope(self) -> str:
+        """Prefijo/etiqueta de caché de metadatos de este servidor y base de datos."""
+        return f"odoo:meta:{self.db}@{urlsplit(_get_base_url(self.url)).netloc}"
+
+    def _meta_key(self, name: str) -> str:
+        return f"{self.metadata_scope}:{name}"
+
+    def _meta_get(self, name: str) -> Any:
+        memo = self._meta_memo.get(name)
+        if memo is not None and memo[1] > time.monotonic():
+            return memo[0]
+        value = get_cache(self._meta_key(name))
+        if value is not None:
+            self._meta_memo[name] = (value, time.monotonic() + ODOO_METADATA_TTL)
+        return value
+
+    def _meta_put(self, name: str, value: Any) -> None:
+        set_cache(self._meta_key(name), value, ODOO_METADATA_TTL, tags=(self.metadata_scope,))
+        self._meta_memo[name] = (value, time.monotonic() + ODOO_METADATA_TTL)
+
+    def warm_metadata(self, models: list[str] | None = None) -> dict[str, Any]:
+        """Carga (si faltan) uid, tz y `fields_get` de los modelos indicados."""
+        uid = self.authenticate()
+        tz = self.get_user_tz()
+        fields: dict[str, Any] = {}
+        for m in models or []:
+            try:
+                fields[m] = len(self._get_model_fields(m))
+            except Exception as e:  # modelo no instalado en este servidor, permisos...
+                fields[m] = f"error: {e}"
+        return {"scope": self.metadata_scope, "uid": uid, "tz": tz, "fields": fields}
+
+    def refresh_metadata(self, models: list[str] | None = None) -> dict[str, Any]:
+        """Invalida los metadatos de este servidor/db en todos los workers y los recarga."""
+        invalidate_tags(self.metadata_scope)
+        self._uid = None
+        self._meta_memo.clear()
+        return self.warm_metadata(models)
+
     def authenticate(self, *, force: bool = False) -> int:
         if force or self._uid is None:
-            common, _ = _get_proxies_threadlocal(self.url)
-            uid = cast(int, common.authenticate(self.db, self.username, self.password, {}))
-            if not uid:
-                raise OdooConfigError("Autenticación Odoo fallida: uid vacío")
+            # El uid depende de usuario y password: incluir un hash para no reutilizar credenciales viejas
+            cred = hashlib.sha256(f"{self.username}:{self.password}".encode()).hexdigest()[:16]
+            name = f"uid:{cred}"
+            uid = None if force else get_cache(self._meta_key(name))
+            if not isinstance(uid, int):
+                common, _ = _get_proxies_threadlocal(self.url)
+                uid = cast(int, common.authenticate(self.db, self.username, self.password, {}))
+                if not uid:
+                    raise OdooConfigError("Autenticación Odoo fallida: uid vacío")
+                self._meta_put(name, int(uid))
             self._uid = uid
         return self._uid  # type: ignore[return-value]
 
@@ -145,14 +215,34 @@ class OdooConnector:
     # --- Wrapper robusto con reintentos y backoff ---
     def _execute_kw(self, model: str, method: str, args: list, kwargs: dict | None = None, *, allow_retry: bool = True):
         kwargs = kwargs or {}
+        call = RpcCall(self.profile, model, method, args, kwargs)
+        # Desglose por request: reintentos y backoff cuentan como tiempo de Odoo
+        span_attrs = {"rpc.system": "odoo", "odoo.model": model, "odoo.method": method}
+        with request_timing.timed("odoo"), tracing.span(f"odoo {model}.{method}", kind=tracing.KIND_CLIENT, attributes=span_attrs):
+            try:
+                result = self._execute_kw_retrying(call, allow_retry=allow_retry)
+            except BaseException as e:
+                call.finish(error=e)
+                raise
+        call.finish(result)
+        return result
+
+    def _execute_kw_retrying(self, call: RpcCall, *, allow_retry: bool):
+        model, method, args, kwargs = call.model, call.method, call.args, call.kwargs
         attempt = 0
         last_exc: Exception | None = None
         logger = logging.getLogger("app.integrations.odoo")
         tags = {"model": model, "method": method}
+        guard = get_guard(self.profile)
         while True:
             try:
-                with Timer("odoo.execute", tags=tags):
-                    return self.models.execute_kw(self.db, self.uid, self.password, model, method, args, kwargs)
+                with guard.call(model, method), Timer("odoo.execute", tags=tags):
+                    uid = self.uid
+                    with call.attempt():
+                        return self.models.execute_kw(self.db, uid, self.password, model, method, args, kwargs)
+            except OdooUnavailableError:
+                # Rechazo local (circuito abierto / sin hueco): fallar rápido, sin reintentos
+                raise
             except xmlrpc.client.Fault as e:
                 # Fault: error lógico del servidor Odoo -> no tiene sentido reintentar
                 last_exc = e
@@ -166,7 +256,7 @@ class OdooConnector:
                 last_exc = e
                 attempt += 1
                 increment("odoo.execute.error", tags={**tags, "kind": e.__class__.__name__})
-                if not allow_retry or attempt > max(1, ODOO_MAX_RETRIES):
+                if not allow_retry or attempt > max(1, ODOO_MAX_RETRIES) or guard.is_open:
                     break
                 # Backoff exponencial con jitter ligero
                 sleep_s = (ODOO_RETRY_BACKOFF * (2 ** (attempt - 1))) * (1 + 0.1 * (attempt % 3))
@@ -175,6 +265,7 @@ class OdooConnector:
                 except Exception:
                     pass
                 # Forzar reautenticación en siguientes intentos por si expiró la sesión
+                # (fuera del breaker: un authenticate rápido no prueba que execute_kw esté sano)
                 try:
                     self.authenticate(force=True)
                 except Exception as auth_err:
@@ -235,6 +326,27 @@ class OdooConnector:
             kwargs["context"] = context
         return cast(list[dict[str, Any]], self._execute_kw(model, "search_read", [domain], kwargs))
 
+    def search(
+        self,
+        model: str,
+        domain: list | None = None,
+        *,
+        order: str | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        context: dict[str, Any] | None = None,
+    ) -> list[int]:
+        kwargs: dict[str, Any] = {}
+        if order is not None:
+            kwargs["order"] = order
+        if limit is not None:
+            kwargs["limit"] = limit
+        if offset is not None:
+            kwargs["offset"] = offset
+        if context is not None:
+            kwargs["context"] = context
+        return cast(list[int], self._execute_kw(model, "search", [domain or []], kwargs))
+
     def read(
         self,
         model: str,
@@ -270,8 +382,11 @@ class OdooConnector:
 
     # --- Utilidad: zona horaria de usuario para que coincida con la UI ---
     def get_user_tz(self) -> str | None:
-        if self._tz is not None:
-            return self._tz
+        # "" en caché significa "usuario sin tz" (None sería un miss)
+        name = f"tz:{self.username}"
+        cached = self._meta_get(name)
+        if isinstance(cached, str):
+            return cached or None
         logger = logging.getLogger("app.integrations.odoo")
         try:
             res = cast(list[dict[str, Any]], self._execute_kw(
@@ -283,12 +398,11 @@ class OdooConnector:
             tz: str | None = None
             if tz_raw is not None:
                 tz = str(tz_raw)
-            self._tz = tz
+            self._meta_put(name, tz or "")
             return tz
         except Exception as e:
             # Si no podemos obtener la TZ del usuario, continuamos sin ella
             logger.warning("get_user_tz failed; proceeding without tz", extra={"error": str(e)})
-            self._tz = None
             return None
 
     # --- Internals ---
@@ -305,8 +419,10 @@ class OdooConnector:
             return []
 
     def _get_model_fields(self, model: str) -> set[str]:
-        if model in self._model_fields:
-            return self._model_fields[model]
+        name = f"fields:{model}"
+        cached = self._meta_get(name)
+        if isinstance(cached, (list, set, frozenset)):
+            return set(cached)
         # fields_get devuelve dict campo -> {type, string, ...}
         # Usar kwargs 'attributes' para compatibilidad con versiones modernas
         res = cast(
@@ -314,5 +430,6 @@ class OdooConnector:
             self._execute_kw(model, "fields_get", [], {"attributes": ["string"]})
         )
         names = set(res.keys()) if isinstance(res, dict) else set()
-        self._model_fields[model] = names
+        if names:
+            self._meta_put(name, frozenset(names))
         return names
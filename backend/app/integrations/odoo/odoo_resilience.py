@@ -0,0 +1,320 @@
+"""
+Protección de las llamadas RPC a Odoo: circuit breaker + límite de concurrencia adaptativo.
+
+Cuando Odoo se degrada, `_execute_kw` reintenta con esperas y retiene hilos del
+worker; sin freno, las peticiones se acumulan hasta bloquear todos los workers.
+Cada perfil (default, staging, argus...) tiene un `OdooGuard` por proceso:
+
+- `CircuitBreaker` (closed -> open -> half_open): abre tras N fallos de transporte
+  consecutivos; abierto rechaza al instante (`OdooUnavailableError`, 503) para que
+  los llamadores sirvan su copia `:backup` o el espejo local. Pasado
+  ODOO_BREAKER_OPEN_SECONDS deja pasar llamadas de prueba; un éxito lo cierra.
+- `AdaptiveLimiter` (AIMD): limita las llamadas en vuelo. Sube +1/límite por cada
+  éxito rápido con el límite casi ocupado y multiplica por 0.7 ante timeouts,
+  errores de transporte o latencias por encima de ODOO_CONCURRENCY_LATENCY_TARGET.
+  Si no hay hueco en ODOO_CONCURRENCY_QUEUE_TIMEOUT, la llamada se rechaza.
+
+Un `Fault` de Odoo es un error lógico: el servidor respondió, así que cuenta como
+éxito para el breaker. Estado y llamadas en vuelo se exportan como métricas.
+"""
+from __future__ import annotations
+
+import http.client
+import logging
+import threading
+import time
+import xmlrpc.client
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from app.config.settings import (
+    ODOO_BREAKER_FAILURE_THRESHOLD,
+    ODOO_BREAKER_OPEN_SECONDS,
+    ODOO_BREAKER_HALF_OPEN_PROBES,
+    ODOO_CONCURRENCY_INITIAL,
+    ODOO_CONCURRENCY_MIN,
+    ODOO_CONCURRENCY_MAX,
+    ODOO_CONCURRENCY_LATENCY_TARGET,
+    ODOO_CONCURRENCY_QUEUE_TIMEOUT,
+)
+from app.utils.exceptions import OdooUnavailableError
+from app.utils.metrics import increment, set_gauge, register_collector
+
+logger = logging.getLogger("app.integrations.odoo")
+
+# Errores que indican que Odoo (o la red) no está respondiendo
+TRANSPORT_ERRORS = (xmlrpc.client.ProtocolError, http.client.HTTPException, OSError)
+
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitBreaker:
+    """Breaker por fallos consecutivos con estado half-open de prueba."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, *, failure_threshold: int, open_seconds: float, half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = max(0.0, open_seconds)
+        self.half_open_probes = max(1, half_open_probes)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opened_total = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _transition(self, state: str) -> None:
+        # Llamar con el lock tomado
+        if state == self._state:
+            return
+        prev, self._state = self._state, state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self.opened_total += 1
+        if state != self.CLOSED:
+            self._probes = 0
+        if state == self.CLOSED:
+            self._failures = 0
+        increment("odoo_breaker_transitions", tags={"profile": self.name, "to": state})
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Odoo circuit breaker {self.name}: {prev} -> {state}", extra={"profile": self.name, "from": prev, "to": state})
+
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(self.HALF_OPEN)
+
+    def allow(self) -> bool:
+        """¿Puede salir una llamada? En half-open reserva uno de los huecos de prueba."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                self._transition(self.OPEN)
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._transition(self.OPEN)
+
+    def release(self) -> None:
+        """Resultado neutro (error no relacionado con Odoo): libera el hueco de prueba."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opened_total": self.opened_total,
+                "retry_after_seconds": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if self._state == self.OPEN else 0.0,
+            }
+
+
+class AdaptiveLimiter:
+    """Límite de concurrencia AIMD (additive increase / multiplicative decrease)."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        backoff: float = 0.7,
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self._inflight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition(threading.Lock())
+        self.rejected_total = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            while self._inflight >= int(self._limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected_total += 1
+                    return False
+                self._cond.wait(remaining)
+            self._inflight += 1
+            return True
+
+    def release(self, latency: float, *, overloaded: bool = False) -> None:
+        with self._cond:
+            inflight = self._inflight
+            self._inflight = max(0, inflight - 1)
+            now = time.monotonic()
+            if overloaded or latency > self.latency_target:
+                # Como mucho una reducción por ventana de latencia objetivo: una ráfaga
+                # de timeouts simultáneos es una sola señal de sobrecarga.
+                if now - self._last_decrease >= self.latency_target:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._last_decrease = now
+            elif inflight * 2 >= self._limit:
+                # Sólo crecer si el límite se está usando; si no, no aporta información
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._cond.notify()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "limit_exact": round(self._limit, 2),
+                "inflight": self._inflight,
+                "rejected_total": self.rejected_total,
+            }
+
+
+class OdooGuard:
+    """Breaker + limitador de un perfil Odoo."""
+
+    def __init__(self, profile: str):
+        self.profile = profile
+        self.breaker = CircuitBreaker(
+            profile,
+            failure_threshold=ODOO_BREAKER_FAILURE_THRESHOLD,
+            open_seconds=ODOO_BREAKER_OPEN_SECONDS,
+            half_open_probes=ODOO_BREAKER_HALF_OPEN_PROBES,
+        )
+        self.limiter = AdaptiveLimiter(
+            profile,
+            initial=ODOO_CONCURRENCY_INITIAL,
+            min_limit=ODOO_CONCURRENCY_MIN,
+            max_limit=ODOO_CONCURRENCY_MAX,
+            latency_target=ODOO_CONCURRENCY_LATENCY_TARGET,
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self.breaker.state == CircuitBreaker.OPEN
+
+    @contextmanager
+    def call(self, model: str, method: str) -> Iterator[None]:
+        """Envuelve un intento RPC; rechaza sin llamar si el circuito está abierto o no hay hueco."""
+        tags = {"profile": self.profile, "model": model, "method": method}
+        if not self.breaker.allow():
+            increment("odoo_rejected", tags={**tags, "reason": "circuit_open"})
+            retry_after = self.breaker.retry_after()
+            raise OdooUnavailableError(
+                f"Odoo ({self.profile}) no disponible: circuito abierto",
+                code="odoo_circuit_open",
+                retry_after=retry_after or None,
+                details={"profile": self.profile, "model": model, "method": method},
+            )
+        if not self.limiter.acquire(ODOO_CONCURRENCY_QUEUE_TIMEOUT):
+            self.breaker.release()
+            increment("odoo_rejected", tags={**tags, "reason": "concurrency_limit"})
+            raise OdooUnavailableError(
+                f"Odoo ({self.profile}) saturado: límite de concurrencia alcanzado",
+                code="odoo_overloaded",
+                retry_after=1.0,
+                details={"profile": self.profile, "limit": self.limiter.limit},
+            )
+        t0 = time.perf_counter()
+        try:
+            yield
+        except xmlrpc.client.Fault:
+            # Odoo respondió: error lógico, el servidor está sano
+            self.limiter.release(time.perf_counter() - t0)
+            self.breaker.record_success()
+            raise
+        except TRANSPORT_ERRORS:
+            self.limiter.release(time.perf_counter() - t0, overloaded=True)
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.limiter.release(time.perf_counter() - t0)
+            self.breaker.release()
+            raise
+        else:
+            self.limiter.release(time.perf_counter() - t0)
+            self.breaker.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"profile": self.profile, "breaker": self.breaker.snapshot(), "concurrency": self.limiter.snapshot()}
+
+
+_guards: Dict[str, OdooGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(profile: str) -> OdooGuard:
+    guard = _guards.get(profile)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(profile)
+            if guard is None:
+                guard = _guards[profile] = OdooGuard(profile)
+    return guard
+
+
+def is_unavailable(profile: str) -> bool:
+    """True si el circuito del perfil está abierto (para elegir un fallback sin intentar)."""
+    guard = _guards.get(profile)
+    return guard is not None and guard.is_open
+
+
+def guards_status() -> Dict[str, Any]:
+    """Estado de breaker y concurrencia de todos los perfiles usados en este worker."""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {g.profile: g.snapshot() for g in guards}
+
+
+def _collect_guard_metrics() -> None:
+    for profile, st in guards_status().items():
+        tags = {"profile": profile}
+        set_gauge("odoo_breaker_state", _STATE_VALUES[st["breaker"]["state"]], tags=tags)
+        set_gauge("odoo_breaker_consecutive_failures", st["breaker"]["consecutive_failures"], tags=tags)
+        set_gauge("odoo_inflight", st["concurrency"]["inflight"], tags=tags)
+        set_gauge("odoo_concurrency_limit", st["concurrency"]["limit_exact"], tags=tags)
+
+
+register_collector(_collect_guard_metrics)
@@ -1,16 +1,44 @@
-from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 import json
-from typing import Optional, List
+import logging
+import threading
+from typing import Iterator, Optional, List
 
 from app.integrations.odoo.odoo_crm_models import Client, Lead
 from app.integrations.odoo.odoo_service import (
     list_clients,
     list_leads,
     diagnose,
-    list_pipeline_opportunities,
+    iter_pipeline_opportunities,
+    warm_metadata,
+    PIPELINE_FIELDS,
 )
+from app.integrations.odoo.odoo_sync import (
+    mirror_ready,
+    query_clients,
+    query_leads,
+    query_pipeline,
+    sync_all,
+    sync_status,
+)
+from app.integrations.odoo.odoo_resilience import guards_status
+from app.integrations.odoo.odoo_rpc_stats import rpc_summary, slow_calls
+from app.config.settings import ODOO_SLOW_CALL_SECONDS, ODOO_SLOW_CALL_SAMPLE_RATE
+from app.core.auth.guards import require_admin
+from app.utils.exceptions import OdooUnavailableError
 
 router = APIRouter(prefix="/odoo", tags=["Odoo"])
+logger = logging.getLogger("app.integrations.odoo")
+
+_SOURCE_QUERY = Query("mirror", pattern="^(mirror|live)$", description="mirror: espejo local sincronizado; live: Odoo en vivo (diagnóstico)")
+
+
+def _use_mirror(source: str, model: str, profile: str, response: Response) -> bool:
+    """Decide la fuente; si el espejo aún no completó una pasada se sirve en vivo."""
+    use = source == "mirror" and mirror_ready(model, profile)
+    response.headers["X-Data-Source"] = "mirror" if use else "live"
+    return use
 
 
 def _parse_domain(domain: Optional[str]) -> List:
@@ -32,11 +60,19 @@ def clients(
     offset: int = Query(0, ge=0),
     order: Optional[str] = None,
     profile: str = Query("default", pattern="^(default|staging)$"),
+    q: Optional[str] = Query(None, description="Búsqueda por nombre o email (sólo espejo)"),
+    source: str = _SOURCE_QUERY,
 ):
     try:
-        data = list_clients(limit=limit, offset=offset, order=order, profile=profile)
+        if _use_mirror(source, "res.partner", profile, response):
+            data = query_clients(limit=limit, offset=offset, order=order, profile=profile, q=q)
+        else:
+            data = list_clients(limit=limit, offset=offset, order=order, profile=profile)
         response.headers["Cache-Control"] = "public, max-age=60"
         return data
+    except OdooUnavailableError:
+        # Circuito abierto / saturado: 503 con Retry-After (handler global)
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -51,9 +87,25 @@ def leads(
     include_archived: bool = Query(False, description="Si true, incluye registros archivados (active_test=false)"),
     domain: Optional[str] = Query(None, description="Dominio Odoo en JSON (por ejemplo: [[\"active\",\"=\",False]])"),
     company_id: int = Query(1, ge=1, description="Filtrar por compañía (company_id)"),
+    q: Optional[str] = Query(None, description="Búsqueda por nombre o email (sólo espejo)"),
+    source: str = _SOURCE_QUERY,
 ):
     try:
         domain_list = _parse_domain(domain)
+        # Un dominio Odoo arbitrario sólo se puede evaluar en vivo
+        if not domain_list and _use_mirror(source, "crm.lead", profile, response):
+            data = query_leads(
+                limit=limit,
+                offset=offset,
+                order=order,
+                profile=profile,
+                include_archived=include_archived,
+                company_id=company_id,
+                q=q,
+            )
+            response.headers["Cache-Control"] = "public, max-age=60"
+            return data
+        response.headers["X-Data-Source"] = "live"
 
         ctx_overrides = {}
         if include_archived:
@@ -70,6 +122,9 @@ def leads(
         )
         response.headers["Cache-Control"] = "public, max-age=60"
         return data
+    except OdooUnavailableError:
+        # Circuito abierto / saturado: 503 con Retry-After (handler global)
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -78,10 +133,51 @@ def leads(
 def diagnostics(profile: str = Query("default", pattern="^(default|staging)$")):
     try:
         return diagnose(profile)
+    except OdooUnavailableError:
+        # Circuito abierto / saturado: 503 con Retry-After (handler global)
+        raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
 
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(wanted) - PIPELINE_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fields inválidos: {', '.join(unknown)} (permitidos: {', '.join(sorted(PIPELINE_FIELDS))})",
+        )
+    return ["id", *[f for f in dict.fromkeys(wanted) if f != "id"]]
+
+
+def _stream_json_array(first: List[dict], rest) -> Iterator[bytes]:
+    """Emite un array JSON bloque a bloque. Un fallo a mitad de respuesta ya no puede
+    cambiar el status: se registra y se corta el stream (el cliente ve JSON incompleto)."""
+    yield b"["
+    sep = b""
+    chunk = first
+    while True:
+        if chunk:
+            yield sep + json.dumps(chunk, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
+            sep = b","
+        try:
+            chunk = next(rest, None)
+        except Exception as e:
+            logger.error("Pipeline stream interrumpido", extra={"error": str(e)})
+            return
+        if chunk is None:
+            break
+    yield b"]"
+
+
+def _own_headers(response: Response) -> dict:
+    """Cabeceras fijadas en `response` para trasladarlas a una respuesta propia."""
+    return {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+
+
 @router.get("/pipeline", response_model=List[Lead])
 def pipeline(
     response: Response,
@@ -93,19 +189,92 @@ def pipeline(
     offset: int = Query(0, ge=0),
     order: Optional[str] = Query("priority desc, id desc"),
     company_id: int = Query(1, ge=1, description="Filtrar por compañía (company_id)"),
+    fields: Optional[str] = Query(
+        None, description="Proyección: columnas separadas por coma (id siempre incluido), p. ej. name,stage_id,expected_revenue"
+    ),
+    source: str = _SOURCE_QUERY,
 ):
+    """Oportunidades del kanban. En vivo se leen de Odoo por bloques y se envían en
+    streaming según llegan; con `fields` sólo viajan las columnas pedidas."""
+    wanted = _parse_fields(fields)
+    params = dict(
+        profile=profile,
+        mine=mine,
+        team_id=team_id,
+        include_archived=include_archived,
+        limit=limit,
+        offset=offset,
+        order=order,
+        company_id=company_id,
+    )
     try:
-        data = list_pipeline_opportunities(
-            profile=profile,
-            mine=mine,
-            team_id=team_id,
-            include_archived=include_archived,
-            limit=limit,
-            offset=offset,
-            order=order,
-            company_id=company_id,
-        )
         response.headers["Cache-Control"] = "public, max-age=60"
-        return data
+        if _use_mirror(source, "crm.lead", profile, response):
+            data = query_pipeline(**params)
+            if wanted is None:
+                return data
+            return JSONResponse(
+                [lead.model_dump(include=set(wanted)) for lead in data], headers=_own_headers(response)
+            )
+        chunks = iter_pipeline_opportunities(fields=wanted, **params)
+        # El primer bloque se pide antes de abrir la respuesta: los errores de Odoo
+        # (circuito abierto, fallo de red) aún salen como 503/502.
+        first = next(chunks, [])
+        return StreamingResponse(
+            _stream_json_array(first, chunks), media_type="application/json", headers=_own_headers(response)
+        )
+    except OdooUnavailableError:
+        # Circuito abierto / saturado: 503 con Retry-After (handler global)
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.get("/sync/status")
+def sync_state(_=Depends(require_admin)):
+    """Marcas de agua y último resultado de la sincronización del espejo CRM."""
+    return sync_status()
+
+
+@router.get("/resilience")
+def resilience_state(_=Depends(require_admin)):
+    """Circuit breaker y límite de concurrencia por perfil en este worker."""
+    return guards_status()
+
+
+@router.get("/rpc/stats")
+def rpc_stats(
+    limit: int = Query(50, ge=1, le=500),
+    model: Optional[str] = Query(None, description="Filtrar el registro de llamadas lentas por modelo"),
+    _=Depends(require_admin),
+):
+    """Latencias p50/p95/p99 por modelo/método y últimas llamadas lentas de este worker."""
+    return {
+        "slow_threshold_seconds": ODOO_SLOW_CALL_SECONDS,
+        "slow_sample_rate": ODOO_SLOW_CALL_SAMPLE_RATE,
+        "summary": rpc_summary(),
+        "slow_calls": slow_calls(limit, model=model),
+    }
+
+
+@router.post("/sync", status_code=202)
+def sync_now(full: bool = Query(False, description="Pasada completa: reinicia marcas de agua y concilia borrados"), _=Depends(require_admin)):
+    # En segundo plano y bajo el lock de clúster; si ya hay una pasada en curso, no hace nada
+    threading.Thread(target=sync_all, kwargs={"full": full or None}, name="odoo-crm-sync-manual", daemon=True).start()
+    return {"accepted": True, "full": full}
+
+
+@router.post("/metadata/refresh")
+def metadata_refresh(
+    profile: str = Query("default", pattern="^(default|staging)$"),
+    model: Optional[List[str]] = Query(None, description="Modelos a recargar; por defecto ODOO_METADATA_WARM_MODELS"),
+    _=Depends(require_admin),
+):
+    """Invalida uid/tz/fields_get cacheados (todos los workers) y los recarga de Odoo."""
+    try:
+        return warm_metadata(profile, refresh=True, models=model)
+    except OdooUnavailableError:
+        # Circuito abierto / saturado: 503 con Retry-After (handler global)
+        raise
     except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=502, detail=str(e))
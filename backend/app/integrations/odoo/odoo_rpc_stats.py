@@ -0,0 +1,218 @@
+"""
+Instrumentación por llamada de las RPC Odoo (`OdooConnector._execute_kw`).
+
+- Histogramas (exportados por Prometheus) por perfil/modelo/método:
+  `odoo_rpc_seconds` (cada intento, con su resultado), `odoo_rpc_request_bytes` y
+  `odoo_rpc_response_bytes` (bytes en el cable medidos en el transporte XML-RPC;
+  comprimidos si Odoo responde con gzip),
+  `odoo_rpc_rows` (filas devueltas) y el contador `odoo_rpc_retries`.
+- Registro de llamadas lentas: anillo en memoria (ODOO_SLOW_CALL_LOG_SIZE) con
+  dominio, campos, paginación, tamaños y reintentos de las llamadas que superan
+  ODOO_SLOW_CALL_SECONDS, muestreadas con ODOO_SLOW_CALL_SAMPLE_RATE.
+
+Los bytes se acumulan en un contador por hilo: los proxies XML-RPC ya son por hilo
+y cada llamada es síncrona, así que no se mezclan llamadas concurrentes.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+import xmlrpc.client
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from app.config.settings import (
+    ODOO_SLOW_CALL_SECONDS,
+    ODOO_SLOW_CALL_LOG_SIZE,
+    ODOO_SLOW_CALL_SAMPLE_RATE,
+)
+from app.utils.metrics import increment, observe, export_histograms, histogram_quantile, SIZE_BUCKETS
+
+logger = logging.getLogger("app.integrations.odoo")
+
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 2000, 5000, 10000, 50000)
+_MAX_REPR = 1000
+
+_io = threading.local()
+_slow: Deque[Dict[str, Any]] = deque(maxlen=max(1, ODOO_SLOW_CALL_LOG_SIZE))
+_slow_lock = threading.Lock()
+
+
+# --- Bytes en el cable (los llama _TimeoutTransport) ---
+
+def _counters() -> List[int]:
+    c = getattr(_io, "bytes", None)
+    if c is None:
+        c = _io.bytes = [0, 0]
+    return c
+
+
+def add_request_bytes(n: int) -> None:
+    _counters()[0] += n
+
+
+def add_response_bytes(n: int) -> None:
+    _counters()[1] += n
+
+
+class CountingResponse:
+    """Envuelve la respuesta HTTP para contar los bytes que lee el parser XML-RPC."""
+
+    def __init__(self, response: Any):
+        self._response = response
+
+    def read(self, *args: Any) -> bytes:
+        data = self._response.read(*args)
+        add_response_bytes(len(data))
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+def _clip(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = repr(value)
+    return text if len(text) <= _MAX_REPR else text[:_MAX_REPR] + f"... ({len(text)} chars)"
+
+
+def _rows(result: Any) -> Optional[int]:
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+class RpcCall:
+    """Una llamada `_execute_kw`, con todos sus intentos."""
+
+    def __init__(self, profile: str, model: str, method: str, args: list, kwargs: dict):
+        self.profile = profile
+        self.model = model
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.tags = {"profile": profile, "model": model, "method": method}
+        self.attempts = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def attempt(self) -> Iterator[None]:
+        """Mide un intento: latencia y bytes enviados/recibidos."""
+        self.attempts += 1
+        _io.bytes = [0, 0]
+        outcome = "ok"
+        t0 = time.perf_counter()
+        try:
+            yield
+        except xmlrpc.client.Fault:
+            outcome = "fault"
+            raise
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            req, resp = _counters()
+            self.request_bytes += req
+            self.response_bytes += resp
+            observe("odoo_rpc_seconds", time.perf_counter() - t0, tags={**self.tags, "outcome": outcome})
+            if req:
+                observe("odoo_rpc_request_bytes", req, buckets=SIZE_BUCKETS, tags=self.tags)
+            if resp:
+                observe("odoo_rpc_response_bytes", resp, buckets=SIZE_BUCKETS, tags=self.tags)
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        seconds = time.perf_counter() - self._t0
+        rows = _rows(result) if error is None else None
+        if rows is not None:
+            observe("odoo_rpc_rows", rows, buckets=ROW_BUCKETS, tags=self.tags)
+        if self.attempts > 1:
+            increment("odoo_rpc_retries", self.attempts - 1, tags=self.tags)
+        if seconds < ODOO_SLOW_CALL_SECONDS:
+            return
+        increment("odoo_rpc_slow_calls", tags=self.tags)
+        if ODOO_SLOW_CALL_SAMPLE_RATE < 1.0 and random.random() >= ODOO_SLOW_CALL_SAMPLE_RATE:
+            return
+        entry = self._describe(seconds, rows, error)
+        with _slow_lock:
+            _slow.append(entry)
+        logger.warning(
+            f"Odoo slow call {self.model}.{self.method} ({round(seconds, 3)}s)",
+            extra=entry,
+        )
+
+    def _describe(self, seconds: float, rows: Optional[int], error: Optional[BaseException]) -> Dict[str, Any]:
+        args, kwargs = self.args, self.kwargs
+        first = args[0] if args else None
+        # search/search_read/search_count/read_group reciben el dominio; read recibe ids
+        domain = first if self.method != "read" else None
+        ids = len(first) if self.method == "read" and isinstance(first, list) else None
+        fields = kwargs.get("fields")
+        if fields is None and len(args) > 1 and isinstance(args[1], list):
+            fields = args[1]
+        return {
+            "ts": time.time(),
+            "profile": self.profile,
+            "model": self.model,
+            "method": self.method,
+            "seconds": round(seconds, 4),
+            "attempts": self.attempts,
+            "rows": rows,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "domain": _clip(domain),
+            "ids": ids,
+            "fields": list(fields) if isinstance(fields, (list, tuple)) else None,
+            "limit": kwargs.get("limit"),
+            "offset": kwargs.get("offset"),
+            "order": kwargs.get("order"),
+            "error": f"{error.__class__.__name__}: {error}" if error is not None else None,
+        }
+
+
+def slow_calls(limit: int = 50, *, model: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Últimas llamadas lentas registradas en este worker (más recientes primero)."""
+    with _slow_lock:
+        entries = list(_slow)
+    entries.reverse()
+    if model:
+        entries = [e for e in entries if e["model"] == model]
+    return entries[: max(0, limit)]
+
+
+def rpc_summary() -> List[Dict[str, Any]]:
+    """Conteo y p50/p95/p99 por perfil/modelo/método a partir de `odoo_rpc_seconds`."""
+    merged: Dict[tuple, list] = {}
+    for (name, tags), (bounds, counts, total, n) in export_histograms().items():
+        if name != "odoo_rpc_seconds":
+            continue
+        t = dict(tags)
+        key = (t.get("profile"), t.get("model"), t.get("method"))
+        m = merged.get(key)
+        if m is None:
+            merged[key] = [bounds, list(counts), total, n, {}]
+            m = merged[key]
+        else:
+            m[1] = [a + b for a, b in zip(m[1], counts)]
+            m[2] += total
+            m[3] += n
+        m[4][t.get("outcome", "ok")] = m[4].get(t.get("outcome", "ok"), 0) + n
+    out = []
+    for (profile, model, method), (bounds, counts, total, n, outcomes) in merged.items():
+        q = {f"p{int(p * 100)}": histogram_quantile(bounds, counts, p) for p in (0.5, 0.95, 0.99)}
+        out.append({
+            "profile": profile,
+            "model": model,
+            "method": method,
+            "count": n,
+            "mean_seconds": round(total / n, 4) if n else None,
+            **{k: round(v, 4) if v is not None else None for k, v in q.items()},
+            "outcomes": outcomes,
+        })
+    out.sort(key=lambda r: r["p95"] or 0, reverse=True)
+    return out
@@ -1,7 +1,11 @@
-from typing import Optional, List, TypedDict, Any, Iterable
+from typing import Optional, List, TypedDict, Any, Iterable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import logging
 import threading
 
 from app.integrations.odoo.odoo_connector import OdooConnector
+from app.observability import request_timing
 from app.integrations.odoo.odoo_crm_models import Client, Lead
 from app.integrations.odoo.odoo_normalizers import (
     normalize_odoo_client,
@@ -16,6 +20,8 @@ from app.config.settings import (
     ODOO_STAGING_DB,
     ODOO_STAGING_USER,
     ODOO_STAGING_PASSWORD,
+    ODOO_METADATA_WARM_MODELS,
+    ODOO_PIPELINE_CHUNK_SIZE,
 )
 
 _connectors: dict[str, OdooConnector] = {}
@@ -49,6 +55,7 @@ def _get_connector(profile: str = "default") -> OdooConnector:
                         db=ODOO_STAGING_DB,
                         username=ODOO_STAGING_USER,
                         password=ODOO_STAGING_PASSWORD,
+                        profile=profile,
                     )
                 else:
                     _connectors[profile] = OdooConnector(
@@ -56,6 +63,7 @@ def _get_connector(profile: str = "default") -> OdooConnector:
                         db=ODOO_DB,
                         username=ODOO_USER,
                         password=ODOO_PASSWORD,
+                        profile=profile,
                     )
     return _connectors[profile]
 
@@ -69,6 +77,8 @@ LEAD_DEFAULT_FIELDS: List[str] = [
     "id", "name", "company_id", "partner_id", "email_from", "phone",
     "expected_revenue", "probability", "stage_id",
 ]
+# Columnas que se pueden pedir en la proyección del pipeline (`fields=`)
+PIPELINE_FIELDS = frozenset(LEAD_DEFAULT_FIELDS)
 CLIENT_DEFAULT_FIELDS: List[str] = [
     "id", "name", "email", "phone", "company_id",
     "activity_ids", "country_id", "company_name", "street", "street2",
@@ -112,8 +122,8 @@ def list_clients(
         offset=offset,
         context=ctx,
     )
-    normalized = [normalize_odoo_client(r) for r in rows]
-    return [Client(**r) for r in normalized]
+    with request_timing.timed("normalize"):
+        return [Client(**normalize_odoo_client(r)) for r in rows]
 
 
 def list_leads(
@@ -142,8 +152,8 @@ def list_leads(
         offset=offset,
         context=ctx,
     )
-    normalized = [normalize_odoo_lead(r) for r in rows]
-    return [Lead(**r) for r in normalized]
+    with request_timing.timed("normalize"):
+        return [Lead(**normalize_odoo_lead(r)) for r in rows]
 
 
 def diagnose(profile: str = "default") -> dict:
@@ -173,6 +183,47 @@ def diagnose(profile: str = "default") -> dict:
     }
 
 
+def warm_metadata(profile: str = "default", *, refresh: bool = False, models: Optional[List[str]] = None) -> dict:
+    """Precarga (o con `refresh` invalida y recarga) uid, tz y fields_get en la caché compartida."""
+    c = _get_connector(profile)
+    wanted = models or list(ODOO_METADATA_WARM_MODELS)
+    return c.refresh_metadata(wanted) if refresh else c.warm_metadata(wanted)
+
+
+def start_metadata_warm() -> None:
+    """Precalienta metadatos al arrancar, en segundo plano (no bloquea el startup)."""
+    if not ODOO_URL:
+        return
+
+    def _run() -> None:
+        try:
+            warm_metadata()
+        except Exception as e:
+            logging.getLogger("app.integrations.odoo").warning("Odoo metadata warm failed", extra={"error": str(e)})
+
+    threading.Thread(target=_run, name="odoo-metadata-warm", daemon=True).start()
+
+
+def _pipeline_query(
+    connector: OdooConnector,
+    *,
+    mine: bool,
+    team_id: Optional[int],
+    include_archived: bool,
+    company_id: int,
+) -> Tuple[Domain, dict[str, Any]]:
+    """Dominio y contexto del Pipeline (kanban) de CRM."""
+    dom: Domain = [["type", "=", "opportunity"], ["company_id", "=", int(company_id)]]
+    if mine:
+        uid = connector.uid
+        dom.append(["user_id", "=", uid])
+    if team_id is not None:
+        dom.append(["team_id", "=", int(team_id)])
+
+    ctx_over: dict[str, Any] = {"active_test": False} if include_archived else {}
+    return dom, _build_ctx(connector, ctx_over)
+
+
 def list_pipeline_opportunities(
     *,
     limit: int = 2000,
@@ -192,16 +243,9 @@ def list_pipeline_opportunities(
     model = "crm.lead"
     fields = fields or LEAD_DEFAULT_FIELDS
     connector = _get_connector(profile)
-
-    dom: Domain = [["type", "=", "opportunity"], ["company_id", "=", int(company_id)]]
-    if mine:
-        uid = connector.uid
-        dom.append(["user_id", "=", uid])
-    if team_id is not None:
-        dom.append(["team_id", "=", int(team_id)])
-
-    ctx_over: dict[str, Any] = {"active_test": False} if include_archived else {}
-    ctx = _build_ctx(connector, ctx_over)
+    dom, ctx = _pipeline_query(
+        connector, mine=mine, team_id=team_id, include_archived=include_archived, company_id=company_id
+    )
 
     rows = connector.search_read(
         model,
@@ -212,5 +256,116 @@ def list_pipeline_opportunities(
         offset=offset,
         context=ctx,
     )
-    normalized = [normalize_odoo_lead(r) for r in rows]
-    return [Lead(**r) for r in normalized]
+    with request_timing.timed("normalize"):
+        return [Lead(**normalize_odoo_lead(r)) for r in rows]
+
+
+# Hilos que piden a Odoo el siguiente bloque mientras se serializa el actual. Es
+# compartido para reutilizar los proxies XML-RPC por hilo (y su conexión keep-alive).
+_prefetch_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_prefetch_pool() -> ThreadPoolExecutor:
+    global _prefetch_pool
+    if _prefetch_pool is None:
+        with _get_lock("odoo:prefetch"):
+            if _prefetch_pool is None:
+                _prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="odoo-prefetch")
+    return _prefetch_pool
+
+
+def _prefetch(pages: Iterator[List[dict]]) -> Iterator[List[dict]]:
+    """Itera `pages` con un bloque de adelanto: la RPC siguiente corre mientras se consume la actual."""
+    pool = _get_prefetch_pool()
+    # Con el contexto del llamante: las RPC del hilo cuentan en el desglose de la request
+    ctx = copy_context()
+    pending = pool.submit(ctx.run, next, pages, None)
+    try:
+        while True:
+            page = pending.result()
+            if page is None:
+                return
+            pending = pool.submit(ctx.run, next, pages, None)
+            yield page
+    finally:
+        # Cliente desconectado o error: no lanzar más lecturas
+        pending.cancel()
+
+
+def _id_order(order: Optional[str]) -> Optional[str]:
+    """'asc'/'desc' si el orden es sólo por id (paginable por keyset); None en otro caso."""
+    parts = (order or "").lower().split()
+    if parts == ["id"]:
+        return "asc"
+    if len(parts) == 2 and parts[0] == "id" and parts[1] in ("asc", "desc"):
+        return parts[1]
+    return None
+
+
+def iter_pipeline_opportunities(
+    *,
+    limit: int = 2000,
+    offset: int = 0,
+    order: Optional[str] = "priority desc, id desc",
+    fields: Optional[List[str]] = None,
+    profile: str = "default",
+    mine: bool = False,
+    team_id: Optional[int] = None,
+    include_archived: bool = False,
+    company_id: int = 1,
+    chunk_size: int = ODOO_PIPELINE_CHUNK_SIZE,
+) -> Iterator[List[dict]]:
+    """Pipeline de CRM por bloques de `chunk_size`, ya normalizados, para streaming.
+
+    - Orden `id asc|desc`: keyset real (`id >|< último`) con search_read por bloque.
+    - Cualquier otro orden: un `search` (sólo ids, en el orden pedido) y `read` por
+      bloques de ids; el orden se conserva y no hay huecos si cambian datos entre bloques.
+
+    `fields` proyecta las columnas (siempre incluye `id`); cada registro trae todas
+    las pedidas (None si Odoo no la devolvió). Se emiten dicts, no `Lead`, para no
+    validar con Pydantic fila a fila.
+    """
+    model = "crm.lead"
+    wanted = ["id", *[f for f in (fields or LEAD_DEFAULT_FIELDS) if f != "id"]]
+    chunk = max(1, int(chunk_size))
+    connector = _get_connector(profile)
+    dom, ctx = _pipeline_query(
+        connector, mine=mine, team_id=team_id, include_archived=include_archived, company_id=company_id
+    )
+    direction = _id_order(order)
+
+    def keyset_pages() -> Iterator[List[dict]]:
+        remaining, last_id, first = limit, None, True
+        op = "<" if direction == "desc" else ">"
+        while remaining > 0:
+            size = min(chunk, remaining)
+            page_dom = dom if last_id is None else [*dom, ["id", op, last_id]]
+            rows = connector.search_read(
+                model,
+                page_dom,
+                fields=wanted,
+                order=f"id {direction}",
+                limit=size,
+                offset=offset if first else 0,
+                context=ctx,
+            )
+            if rows:
+                yield rows
+            if len(rows) < size:
+                return
+            remaining -= len(rows)
+            last_id, first = rows[-1]["id"], False
+
+    def id_pages() -> Iterator[List[dict]]:
+        ids = connector.search(model, dom, order=order, limit=limit, offset=offset, context=ctx)
+        for i in range(0, len(ids), chunk):
+            part = ids[i:i + chunk]
+            by_id = {r["id"]: r for r in connector.read(model, part, fields=wanted, context=ctx)}
+            # read no garantiza el orden de los ids pedidos
+            rows = [by_id[j] for j in part if j in by_id]
+            if rows:
+                yield rows
+
+    pages = keyset_pages() if direction else id_pages()
+    for rows in _prefetch(pages):
+        yield [{f: r.get(f) for f in wanted} for r in map(normalize_odoo_lead, rows)]
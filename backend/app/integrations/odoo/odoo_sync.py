@@ -0,0 +1,508 @@
+"""Sincronización incremental de CRM Odoo (crm.lead, res.partner) a tablas locales.
+
+- Marca de agua por (perfil, modelo) con keyset (write_date, id): cada lote
+  pide `write_date > wm OR (write_date = wm AND id > last_id)` ordenado por
+  `write_date, id`, así no se pierden filas con el mismo write_date entre lotes
+  y la pasada es reanudable.
+- `active_test=False`: los archivados también se copian (columna `active`),
+  de modo que archivar en Odoo se refleja en el espejo.
+- Los borrados físicos no cambian write_date: una pasada completa periódica
+  (`full=True`) concilia ids y elimina los que ya no existen.
+
+Las consultas (`query_leads`, `query_clients`, `query_pipeline`) devuelven los
+mismos modelos Pydantic que la ruta en vivo de `odoo_service`.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config.settings import (
+    ODOO_URL,
+    ODOO_SYNC_INTERVAL,
+    ODOO_SYNC_BATCH_SIZE,
+    ODOO_SYNC_FULL_INTERVAL,
+    ODOO_SYNC_PROFILES,
+)
+from app.db.database import SessionLocal
+from app.db.models import OdooLeadMirror, OdooPartnerMirror, OdooSyncState
+from app.integrations.odoo.odoo_crm_models import Client, Lead
+from app.integrations.odoo.odoo_normalizers import normalize_odoo_client, normalize_odoo_lead
+from app.integrations.odoo.odoo_service import (
+    LEAD_DEFAULT_FIELDS,
+    CLIENT_DEFAULT_FIELDS,
+    _get_connector,
+)
+from app.utils.adapters.cache_adapter import acquire_lock, release_lock, get_cache, set_cache
+from app.utils.metrics import increment, observe, set_gauge
+
+logger = logging.getLogger("app.integrations.odoo.sync")
+
+_ODOO_DT = "%Y-%m-%d %H:%M:%S"
+_ORDER = "write_date asc, id asc"
+
+
+# --- Conversión de filas Odoo -> columnas ---
+
+def _m2o_id(value: Any) -> Optional[int]:
+    if isinstance(value, (list, tuple)) and value:
+        try:
+            return int(value[0])
+        except Exception:
+            return None
+    return None
+
+
+def _text(value: Any, size: int) -> Optional[str]:
+    if value is None or value is False:
+        return None
+    return str(value)[:size]
+
+
+def _num(value: Any) -> Optional[float]:
+    if value is None or value is False:
+        return None
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
+def _odoo_dt(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:19], _ODOO_DT)
+    except Exception:
+        return None
+
+
+def _lead_columns(row: dict) -> dict:
+    r = normalize_odoo_lead(row)
+    return {
+        "name": _text(r.get("name"), 512),
+        "type": _text(r.get("type"), 32),
+        "active": bool(r.get("active", True)),
+        "email_from": _text(r.get("email_from"), 255),
+        "phone": _text(r.get("phone"), 64),
+        "expected_revenue": _num(r.get("expected_revenue")),
+        "probability": _num(r.get("probability")),
+        "priority": _text(r.get("priority"), 8),
+        "company_id": r.get("company_id") or [],
+        "partner_id": r.get("partner_id") or [],
+        "stage_id": r.get("stage_id") or [],
+        "company_odoo_id": _m2o_id(r.get("company_id")),
+        "user_odoo_id": _m2o_id(r.get("user_id")),
+        "team_odoo_id": _m2o_id(r.get("team_id")),
+        "stage_odoo_id": _m2o_id(r.get("stage_id")),
+        "write_date": _odoo_dt(r.get("write_date")),
+    }
+
+
+def _partner_columns(row: dict) -> dict:
+    r = normalize_odoo_client(row)
+    return {
+        "name": _text(r.get("name"), 512),
+        "active": bool(r.get("active", True)),
+        "email": _text(r.get("email"), 255),
+        "phone": _text(r.get("phone"), 64),
+        "company_name": _text(r.get("company_name"), 255),
+        "street": _text(r.get("street"), 255),
+        "street2": _text(r.get("street2"), 255),
+        "city": _text(r.get("city"), 128),
+        "zip": _text(r.get("zip"), 32),
+        "website": _text(r.get("website"), 255),
+        "company_id": r.get("company_id") or [],
+        "country_id": r.get("country_id") or [],
+        "state_id": r.get("state_id") or [],
+        "activity_ids": r.get("activity_ids") or [],
+        "category_id": r.get("category_id") or [],
+        "company_odoo_id": _m2o_id(r.get("company_id")),
+        "write_date": _odoo_dt(r.get("write_date")),
+    }
+
+
+# modelo Odoo -> (tabla espejo, campos a leer, conversión)
+_SPECS: Dict[str, Tuple[Type[Any], List[str], Callable[[dict], dict]]] = {
+    "crm.lead": (
+        OdooLeadMirror,
+        list(dict.fromkeys(LEAD_DEFAULT_FIELDS + ["type", "active", "priority", "user_id", "team_id", "write_date"])),
+        _lead_columns,
+    ),
+    "res.partner": (
+        OdooPartnerMirror,
+        list(dict.fromkeys(CLIENT_DEFAULT_FIELDS + ["active", "write_date"])),
+        _partner_columns,
+    ),
+}
+SYNC_MODELS: Tuple[str, ...] = tuple(_SPECS)
+
+
+# --- Sincronización ---
+
+def _get_state(db: Session, profile: str, model: str) -> OdooSyncState:
+    st = db.query(OdooSyncState).filter(OdooSyncState.profile == profile, OdooSyncState.model == model).first()
+    if st is None:
+        st = OdooSyncState(profile=profile, model=model, last_odoo_id=0, rows_synced=0)
+        db.add(st)
+        db.flush()
+    return st
+
+
+def _watermark_domain(wm_date: Optional[datetime], wm_id: int) -> list:
+    if wm_date is None:
+        return [["id", ">", int(wm_id)]] if wm_id else []
+    wm = wm_date.strftime(_ODOO_DT)
+    return ["|", ["write_date", ">", wm], "&", ["write_date", "=", wm], ["id", ">", int(wm_id)]]
+
+
+def _upsert(db: Session, table: Type[Any], profile: str, rows: List[dict], to_columns: Callable[[dict], dict]) -> int:
+    ids = [int(r["id"]) for r in rows if r.get("id")]
+    existing = {
+        m.odoo_id: m
+        for m in db.query(table).filter(table.profile == profile, table.odoo_id.in_(ids))
+    }
+    for r in rows:
+        oid = r.get("id")
+        if not oid:
+            continue
+        cols = to_columns(r)
+        obj = existing.get(int(oid))
+        if obj is None:
+            db.add(table(profile=profile, odoo_id=int(oid), **cols))
+        else:
+            for k, v in cols.items():
+                setattr(obj, k, v)
+    return len(ids)
+
+
+def _reconcile_deleted(db: Session, conn: Any, model: str, table: Type[Any], profile: str) -> int:
+    """Elimina del espejo los ids que ya no existen en Odoo (borrado físico)."""
+    live = {int(r["id"]) for r in conn.search_read(model, [], fields=["id"], context={"active_test": False}) if r.get("id")}
+    local = [oid for (oid,) in db.query(table.odoo_id).filter(table.profile == profile)]
+    gone = [oid for oid in local if oid not in live]
+    for i in range(0, len(gone), 500):
+        db.query(table).filter(table.profile == profile, table.odoo_id.in_(gone[i:i + 500])).delete(synchronize_session=False)
+    return len(gone)
+
+
+def sync_model(model: str, *, profile: str = "default", full: bool = False, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Copia al espejo los registros de `model` modificados desde la marca de agua.
+
+    Con `full=True` reinicia la marca de agua y concilia borrados físicos.
+    El progreso se confirma por lote: si falla a mitad, la siguiente pasada continúa.
+    """
+    table, fields, to_columns = _SPECS[model]
+    batch = max(1, int(batch_size or ODOO_SYNC_BATCH_SIZE))
+    conn = _get_connector(profile)
+    ctx = {"active_test": False}
+    t0 = time.perf_counter()
+    synced = deleted = 0
+    tags = {"model": model, "profile": profile}
+    with SessionLocal() as db:
+        st = _get_state(db, profile, model)
+        st.last_run_at = datetime.now(timezone.utc)  # type: ignore[assignment]
+        wm_date: Optional[datetime] = None if full else st.last_write_date  # type: ignore[assignment]
+        wm_id = 0 if full else int(st.last_odoo_id or 0)
+        db.commit()
+        try:
+            while True:
+                rows = conn.search_read(
+                    model,
+                    _watermark_domain(wm_date, wm_id),
+                    fields=fields,
+                    order=_ORDER,
+                    limit=batch,
+                    context=ctx,
+                )
+                if rows:
+                    synced += _upsert(db, table, profile, rows, to_columns)
+                    last = rows[-1]
+                    wm_date = _odoo_dt(last.get("write_date")) or wm_date
+                    wm_id = int(last.get("id") or wm_id)
+                    st.last_write_date = wm_date  # type: ignore[assignment]
+                    st.last_odoo_id = wm_id  # type: ignore[assignment]
+                    db.commit()
+                if len(rows) < batch:
+                    break
+            if full:
+                deleted = _reconcile_deleted(db, conn, model, table, profile)
+                st.last_full_sync_at = datetime.now(timezone.utc)  # type: ignore[assignment]
+            st.rows_synced = int(st.rows_synced or 0) + synced  # type: ignore[assignment]
+            st.last_success_at = datetime.now(timezone.utc)  # type: ignore[assignment]
+            st.last_error = None  # type: ignore[assignment]
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            st = _get_state(db, profile, model)
+            st.last_error = f"{e.__class__.__name__}: {e}"[:2000]  # type: ignore[assignment]
+            db.commit()
+            increment("odoo_sync_errors", tags=tags)
+            raise
+    elapsed = time.perf_counter() - t0
+    increment("odoo_sync_rows", synced, tags=tags)
+    if deleted:
+        increment("odoo_sync_deleted", deleted, tags=tags)
+    observe("odoo_sync_seconds", elapsed, tags=tags)
+    set_gauge("odoo_sync_last_success_timestamp", time.time(), tags=tags)
+    logger.info(
+        "Odoo sync completado",
+        extra={"model": model, "profile": profile, "full": full, "rows": synced, "deleted": deleted, "seconds": round(elapsed, 3)},
+    )
+    return {"model": model, "profile": profile, "full": full, "rows": synced, "deleted": deleted, "seconds": round(elapsed, 3)}
+
+
+def _needs_full(profile: str, model: str) -> bool:
+    with SessionLocal() as db:
+        st = db.query(OdooSyncState).filter(OdooSyncState.profile == profile, OdooSyncState.model == model).first()
+        last = getattr(st, "last_full_sync_at", None) if st else None
+    if last is None:
+        return True
+    if last.tzinfo is None:
+        last = last.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - last >= timedelta(seconds=max(60, ODOO_SYNC_FULL_INTERVAL))
+
+
+def sync_all(*, profiles: Optional[Sequence[str]] = None, full: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Sincroniza todos los modelos de los perfiles dados bajo un lock de clúster.
+
+    `full=None` decide por modelo según ODOO_SYNC_FULL_INTERVAL. Devuelve una
+    lista vacía si otro worker está sincronizando.
+    """
+    token = acquire_lock("odoo_crm_sync", max(300, ODOO_SYNC_INTERVAL * 2))
+    if token is None:
+        return []
+    results: List[Dict[str, Any]] = []
+    try:
+        for profile in profiles or ODOO_SYNC_PROFILES or ["default"]:
+            for model in SYNC_MODELS:
+                try:
+                    do_full = _needs_full(profile, model) if full is None else full
+                    results.append(sync_model(model, profile=profile, full=do_full))
+                except Exception as e:
+                    logger.error("Odoo sync falló", extra={"model": model, "profile": profile, "error": str(e)})
+                    results.append({"model": model, "profile": profile, "error": str(e)})
+    finally:
+        release_lock("odoo_crm_sync", token)
+    return results
+
+
+def sync_status() -> List[Dict[str, Any]]:
+    with SessionLocal() as db:
+        rows = db.query(OdooSyncState).order_by(OdooSyncState.profile, OdooSyncState.model).all()
+        return [
+            {
+                "profile": r.profile,
+                "model": r.model,
+                "last_write_date": r.last_write_date.isoformat() if r.last_write_date else None,
+                "last_odoo_id": r.last_odoo_id,
+                "rows_synced": r.rows_synced,
+                "last_run_at": r.last_run_at.isoformat() if r.last_run_at else None,
+                "last_success_at": r.last_success_at.isoformat() if r.last_success_at else None,
+                "last_full_sync_at": r.last_full_sync_at.isoformat() if r.last_full_sync_at else None,
+                "last_error": r.last_error,
+            }
+            for r in rows
+        ]
+
+
+def mirror_ready(model: str, profile: str = "default") -> bool:
+    """True si el espejo de `model` completó al menos una pasada (positivo cacheado 60s)."""
+    key = f"odoo:mirror_ready:{profile}:{model}"
+    if get_cache(key):
+        return True
+    try:
+        with SessionLocal() as db:
+            ready = db.query(OdooSyncState.id).filter(
+                OdooSyncState.profile == profile,
+                OdooSyncState.model == model,
+                OdooSyncState.last_success_at.isnot(None),
+            ).first() is not None
+    except Exception:
+        return False
+    if ready:
+        set_cache(key, True, 60)
+    return ready
+
+
+# --- Sincronización periódica ---
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _loop() -> None:
+    delay = 5.0  # primera pasada poco después del arranque
+    while not _stop.wait(delay):
+        try:
+            sync_all()
+        except Exception as e:  # nunca tumbar el hilo
+            logger.error("Odoo sync: error en la pasada", extra={"error": str(e)})
+        delay = float(ODOO_SYNC_INTERVAL)
+
+
+def start_odoo_sync() -> bool:
+    """Arranca la sincronización periódica en este worker (idempotente)."""
+    global _thread
+    if ODOO_SYNC_INTERVAL <= 0 or not ODOO_URL:
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="odoo-crm-sync", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_odoo_sync() -> None:
+    _stop.set()
+
+
+# --- Consultas sobre el espejo ---
+
+_LEAD_ORDER = {
+    "id": OdooLeadMirror.odoo_id,
+    "name": OdooLeadMirror.name,
+    "priority": OdooLeadMirror.priority,
+    "expected_revenue": OdooLeadMirror.expected_revenue,
+    "probability": OdooLeadMirror.probability,
+    "write_date": OdooLeadMirror.write_date,
+}
+_PARTNER_ORDER = {
+    "id": OdooPartnerMirror.odoo_id,
+    "name": OdooPartnerMirror.name,
+    "complete_name": OdooPartnerMirror.name,
+    "city": OdooPartnerMirror.city,
+    "write_date": OdooPartnerMirror.write_date,
+}
+
+
+def _order_by(order: Optional[str], allowed: Dict[str, Any], default: str) -> list:
+    """Traduce un `order` estilo Odoo ("priority desc, id desc") a columnas permitidas."""
+    clauses = []
+    for part in (order or default).split(","):
+        field, _, direction = part.strip().partition(" ")
+        col = allowed.get(field.strip())
+        if col is None:
+            continue
+        clauses.append(col.desc() if direction.strip().lower() == "desc" else col.asc())
+    return clauses or _order_by(default, allowed, default)
+
+
+def _lead_out(m: OdooLeadMirror) -> Lead:
+    return Lead(
+        id=m.odoo_id,
+        name=m.name or "",
+        company_id=m.company_id or [],
+        partner_id=m.partner_id or [],
+        email_from=m.email_from,
+        phone=m.phone,
+        expected_revenue=m.expected_revenue,
+        probability=m.probability,
+        stage_id=m.stage_id or [],
+    )
+
+
+def _client_out(m: OdooPartnerMirror) -> Client:
+    return Client(
+        id=m.odoo_id,
+        name=m.name or "",
+        email=m.email,
+        phone=m.phone,
+        company_id=m.company_id or [],
+        activity_ids=m.activity_ids or [],
+        country_id=m.country_id or [],
+        company_name=m.company_name,
+        street=m.street,
+        street2=m.street2,
+        city=m.city,
+        state_id=m.state_id or [],
+        zip=m.zip,
+        website=m.website,
+        category_id=m.category_id or [],
+    )
+
+
+def query_leads(
+    *,
+    limit: int = 100,
+    offset: int = 0,
+    order: Optional[str] = None,
+    profile: str = "default",
+    include_archived: bool = False,
+    company_id: int = 1,
+    lead_type: Optional[str] = None,
+    user_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    q: Optional[str] = None,
+    default_order: str = "priority desc, id desc",
+) -> List[Lead]:
+    with SessionLocal() as db:
+        qry = db.query(OdooLeadMirror).filter(
+            OdooLeadMirror.profile == profile,
+            OdooLeadMirror.company_odoo_id == int(company_id),
+        )
+        if not include_archived:
+            qry = qry.filter(OdooLeadMirror.active.is_(True))
+        if lead_type:
+            qry = qry.filter(OdooLeadMirror.type == lead_type)
+        if user_id is not None:
+            qry = qry.filter(OdooLeadMirror.user_odoo_id == int(user_id))
+        if team_id is not None:
+            qry = qry.filter(OdooLeadMirror.team_odoo_id == int(team_id))
+        if q:
+            like = f"%{q}%"
+            qry = qry.filter(or_(OdooLeadMirror.name.ilike(like), OdooLeadMirror.email_from.ilike(like)))
+        rows = qry.order_by(*_order_by(order, _LEAD_ORDER, default_order)).offset(offset).limit(limit).all()
+        return [_lead_out(m) for m in rows]
+
+
+def query_pipeline(
+    *,
+    limit: int = 2000,
+    offset: int = 0,
+    order: Optional[str] = "priority desc, id desc",
+    profile: str = "default",
+    mine: bool = False,
+    team_id: Optional[int] = None,
+    include_archived: bool = False,
+    company_id: int = 1,
+) -> List[Lead]:
+    """Equivalente a `list_pipeline_opportunities` sobre el espejo (type = opportunity)."""
+    user_id = _get_connector(profile).uid if mine else None
+    return query_leads(
+        limit=limit,
+        offset=offset,
+        order=order,
+        profile=profile,
+        include_archived=include_archived,
+        company_id=company_id,
+        lead_type="opportunity",
+        user_id=user_id,
+        team_id=team_id,
+    )
+
+
+def query_clients(
+    *,
+    limit: int = 100,
+    offset: int = 0,
+    order: Optional[str] = None,
+    profile: str = "default",
+    include_archived: bool = False,
+    q: Optional[str] = None,
+) -> List[Client]:
+    with SessionLocal() as db:
+        qry = db.query(OdooPartnerMirror).filter(OdooPartnerMirror.profile == profile)
+        if not include_archived:
+            qry = qry.filter(OdooPartnerMirror.active.is_(True))
+        if q:
+            like = f"%{q}%"
+            qry = qry.filter(or_(OdooPartnerMirror.name.ilike(like), OdooPartnerMirror.email.ilike(like)))
+        rows = qry.order_by(*_order_by(order, _PARTNER_ORDER, "name asc, id desc")).offset(offset).limit(limit).all()
+        return [_client_out(m) for m in rows]
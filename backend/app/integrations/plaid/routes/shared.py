@@ -4,6 +4,7 @@ from app.config.settings import (
     PLAID_SECRET,
     PLAID_ENV,
 )
+from app.observability import request_timing, tracing
 
 try:
     from plaid import Configuration, ApiClient
@@ -13,6 +14,18 @@ except Exception:
     ApiClient = None  # type: ignore[assignment]
     plaid_api = None  # type: ignore[assignment]
 
+if ApiClient is not None:
+    class _TimedApiClient(ApiClient):  # type: ignore[misc, valid-type]
+        """ApiClient que suma cada llamada HTTP a Plaid al desglose de la request y a la traza."""
+
+        def call_api(self, *args, **kwargs):  # type: ignore[override]
+            resource_path = args[0] if args else kwargs.get("resource_path", "")
+            attrs = {"http.request.method": args[1] if len(args) > 1 else kwargs.get("method"), "url.path": resource_path}
+            with request_timing.timed("plaid"), tracing.span(f"plaid {resource_path}", kind=tracing.KIND_CLIENT, attributes=attrs):
+                return super().call_api(*args, **kwargs)
+else:
+    _TimedApiClient = None  # type: ignore[assignment, misc]
+
 
 def plaid_client():
     if not (PLAID_CLIENT_ID and PLAID_SECRET):
@@ -28,5 +41,5 @@ def plaid_client():
     configuration = Configuration(host=base_map.get(env, base_map["sandbox"]))
     configuration.api_key["clientId"] = PLAID_CLIENT_ID
     configuration.api_key["secret"] = PLAID_SECRET
-    client = plaid_api.PlaidApi(ApiClient(configuration))
+    client = plaid_api.PlaidApi(_TimedApiClient(configuration))
     return client
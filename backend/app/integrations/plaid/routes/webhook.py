@@ -5,6 +5,7 @@ from typing import Optional
 
 from app.config.settings import PLAID_WEBHOOK_SIGNING_KEY, PLAID_WEBHOOK_FORWARD_URL
 import httpx # type: ignore
+from app.observability.tracing import httpx_event_hooks
 from ..plaid_storage import upsert_transfer_status, insert_transfer_event
 from app.db.database import SessionLocal
 from app.db.models import PlaidIdentityVerification
@@ -128,7 +129,7 @@ async def plaid_webhook(request: Request):
     # Reenvío opcional a servicio externo si está configurado
     try:
         if PLAID_WEBHOOK_FORWARD_URL:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with httpx.AsyncClient(timeout=10.0, event_hooks=httpx_event_hooks(asynchronous=True)) as client:
                 # reenviamos body tal cual y mantenemos cabeceras mínimas
                 await client.post(PLAID_WEBHOOK_FORWARD_URL, json=body, headers={"X-Forwarded-From": "plaid-webhook"})
     except Exception:
@@ -8,6 +8,7 @@ from app.config.settings import (
     MS_TRANSLATOR_TEXT_ENDPOINT,
     MS_TRANSLATOR_RESOURCE_ENDPOINT,
 )
+from app.observability.tracing import httpx_event_hooks
 
 class TranslatorError(RuntimeError):
     pass
@@ -31,7 +32,8 @@ async def translate_text(texts: List[str], to: str, source: Optional[str] = None
     if text_type and text_type.lower() == 'html':
         url += "&textType=html"
     body = [{"text": t} for t in texts]
-    async with httpx.AsyncClient(timeout=20.0) as client:
+    # Servicio de terceros: span en la traza, sin propagar ids
+    async with httpx.AsyncClient(timeout=20.0, event_hooks=httpx_event_hooks(propagate=False, asynchronous=True)) as client:
         r = await client.post(url, headers=_headers_json(), json=body)
         if r.status_code >= 400:
             raise TranslatorError(f"Translate error {r.status_code}: {r.text}")
@@ -10,10 +10,21 @@ from app.config.settings import (
     REDOC_URL,
     OPENAPI_URL,
     ROOT_PATH,
+    PROFILER_ENABLED,
+    PROFILER_SECRET,
 )
 from app.utils.logging_config import setup_logging
 from app.db.database import init_db
+from app.services.cache_warmer import start_cache_warmer, stop_cache_warmer
+from app.utils.adapters.cache_adapter import aclose_cache
+from app.integrations.odoo.odoo_sync import start_odoo_sync, stop_odoo_sync
+from app.integrations.odoo.odoo_service import start_metadata_warm
 from app.utils.exception_handlers import add_global_exception_handler
+from app.observability.multiprocess import start_metrics_flush, stop_metrics_flush
+from app.audit.audit_pipeline import start_audit_pipeline, stop_audit_pipeline
+from app.audit.audit_store import start_audit_rollup, stop_audit_rollup
+from app.audit.dwell_store import start_dwell_flush, stop_dwell_flush
+from app.observability.tracing import start_tracing, stop_tracing
 
 def add_middlewares(app):
     from fastapi.middleware.cors import CORSMiddleware
@@ -22,6 +33,8 @@ def add_middlewares(app):
     from starlette.middleware.gzip import GZipMiddleware
     from app.core.middleware.request_id_middleware import RequestIdMiddleware
     from app.core.middleware.audit_middleware import AuditMiddleware
+    from app.core.middleware.request_timing_middleware import RequestTimingMiddleware
+    from app.core.middleware.tracing_middleware import TracingMiddleware
     from app.core.middleware.auth_middleware import AuthContextMiddleware
     from app.core.middleware.require_auth_middleware import RequireAuthMiddleware
     from app.api.odoo_webhook_router import ExtensionCompatAdapter
@@ -37,6 +50,11 @@ def add_middlewares(app):
         app.add_middleware(TrustedHostMiddleware, allowed_hosts=ALLOWED_HOSTS)
     app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=["*"])
     app.add_middleware(GZipMiddleware, minimum_size=500)
+    # Perfil por request con cabecera firmada. Va lo más adentro posible (sólo GZip y la
+    # app por debajo) para que la ventana de muestreo sea la del handler; el id es propio
+    if PROFILER_ENABLED and PROFILER_SECRET:
+        from app.core.middleware.profiling_middleware import ProfilingMiddleware
+        app.add_middleware(ProfilingMiddleware)
     # Correlation-ID para trazabilidad
     app.add_middleware(RequestIdMiddleware)
     # Interruptor remoto de disponibilidad (antes de auth para bloquear pronto)
@@ -45,8 +63,12 @@ def add_middlewares(app):
     app.add_middleware(AuthContextMiddleware)
     # Require auth for protected prefixes while keeping public endpoints open
     app.add_middleware(RequireAuthMiddleware)
+    # Desglose por dependencia (db, odoo, redis...): Server-Timing y log de requests lentas
+    app.add_middleware(RequestTimingMiddleware)
     # Auditoría privada de requests
     app.add_middleware(AuditMiddleware)
+    # Trazas: span raíz por request (el más externo, cubre auth y auditoría)
+    app.add_middleware(TracingMiddleware)
 
 def add_routers(app):
     # Router centralizado
@@ -61,6 +83,14 @@ def add_dispatcher(app):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging(LOG_LEVEL)
+    # Métricas compartidas entre workers (si METRICS_MULTIPROC_DIR está definido)
+    start_metrics_flush()
+    # Auditoría: hilo escritor por lotes (la request sólo encola)
+    start_audit_pipeline()
+    # Permanencia en páginas: agregado en memoria con volcado periódico a MySQL
+    start_dwell_flush()
+    # Trazas: exportador OTLP/JSON a fichero y/o colector (si TRACING_ENABLED)
+    start_tracing()
     # Validación de productos Plaid: advertencia/stop si transfer no está presente en producción
     try:
         from app.config.settings import PLAID_PRODUCTS, PLAID_ENV, DEBUG
@@ -81,7 +111,23 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         import logging
         logging.getLogger(__name__).error(f"DB init failed: {e}")
+    # Precalentar caché Argus en segundo plano (no bloquea el arranque)
+    start_cache_warmer()
+    # Espejo CRM de Odoo (incremental por write_date, con lock de clúster)
+    start_odoo_sync()
+    # uid/tz/fields_get de Odoo a la caché compartida antes de la primera request
+    start_metadata_warm()
+    # Particiones diarias y rollups de auditoría (con lock de clúster)
+    start_audit_rollup()
     yield
+    stop_audit_rollup()
+    stop_odoo_sync()
+    stop_cache_warmer()
+    await aclose_cache()
+    stop_dwell_flush()
+    stop_tracing()
+    stop_audit_pipeline()
+    stop_metrics_flush()
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -0,0 +1,277 @@
+"""
+Métricas multi-proceso para gunicorn: cada worker vuelca las suyas a un fichero por
+pid en METRICS_MULTIPROC_DIR y /metrics fusiona todos en el momento del scrape.
+
+- Volcado: hilo por worker cada METRICS_FLUSH_INTERVAL, al parar el worker y justo
+  antes de cada scrape (el worker que responde sale siempre al día). El fichero se
+  escribe en uno temporal y se renombra (`os.replace`): un lector nunca ve uno a medias.
+- Fusión: counters e histogramas se suman entre workers (los buckets son fijos por
+  nombre). Los gauges son valores del worker: se exportan con la etiqueta `pid` y
+  sólo los de procesos vivos.
+- Reinicios: `mark_process_dead` (hook `child_exit` de gunicorn) acumula counters e
+  histogramas del worker muerto en `archive.json` y borra su fichero, así los totales
+  del clúster no retroceden. Sin el hook, los ficheros de pids muertos se siguen
+  sumando; si un pid se reutiliza, el proceso nuevo archiva antes el fichero anterior.
+- Un worker que muere con SIGKILL pierde como mucho lo registrado desde su último volcado.
+
+Se usan ficheros JSON por pid en lugar de memoria compartida mmap: sin dependencias
+y sin coordinación en el camino caliente (el registro sigue siendo en memoria).
+"""
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:  # flock sólo existe en POSIX; en Windows (desarrollo) hay un único proceso
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+from app.config.settings import METRICS_MULTIPROC_DIR, METRICS_FLUSH_INTERVAL
+from app.utils.metrics import collect, export_raw, export_durations, export_gauges, export_histograms
+
+logger = logging.getLogger("app.metrics")
+
+_ARCHIVE = "archive.json"
+_LOCK_FILE = "archive.lock"
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_flush_lock = threading.Lock()
+_owned_pid: Optional[int] = None
+
+
+def enabled() -> bool:
+    return bool(METRICS_MULTIPROC_DIR)
+
+
+def _path(name: str) -> str:
+    return os.path.join(METRICS_MULTIPROC_DIR or "", name)
+
+
+def _pid_file(pid: int) -> str:
+    return _path(f"metrics_{pid}.json")
+
+
+@contextmanager
+def _dir_lock(exclusive: bool) -> Iterator[None]:
+    """Serializa archivado (exclusivo) y lectura (compartido) entre procesos."""
+    if fcntl is None:
+        yield
+        return
+    with open(_path(_LOCK_FILE), "a+") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _write_atomic(path: str, payload: Dict[str, Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("metric.multiproc_read_failed", extra={"path": path, "error": str(e)})
+        return None
+
+
+def _series(table: Dict) -> List[list]:
+    return [[name, [list(t) for t in labels], *value] for (name, labels), value in table.items()]
+
+
+def _local_payload() -> Dict[str, Any]:
+    collect()
+    counters, _timings = export_raw()
+    return {
+        "pid": os.getpid(),
+        "counters": [[name, [list(t) for t in labels], value] for (name, labels), value in counters.items()],
+        "durations": _series({k: [list(b), c, s, n] for k, (b, c, s, n) in export_durations().items()}),
+        "histograms": _series({k: [list(b), c, s, n] for k, (b, c, s, n) in export_histograms().items()}),
+        "gauges": [[name, [list(t) for t in labels], value] for (name, labels), value in export_gauges().items()],
+    }
+
+
+def _archive_file(path: str) -> None:
+    """Suma counters e histogramas de `path` al archivo y lo borra (gauges se descartan)."""
+    with _dir_lock(exclusive=True):
+        data = _read(path)
+        if data is None:
+            return
+        archive = _read(_path(_ARCHIVE)) or {"counters": [], "durations": [], "histograms": []}
+        merged = _Merge()
+        merged.add(archive, with_gauges=False)
+        merged.add(data, with_gauges=False)
+        _write_atomic(_path(_ARCHIVE), merged.to_payload())
+        os.unlink(path)
+
+
+def flush() -> None:
+    """Vuelca las métricas de este worker a su fichero."""
+    global _owned_pid
+    if not enabled():
+        return
+    pid = os.getpid()
+    with _flush_lock:
+        if _owned_pid != pid:
+            os.makedirs(METRICS_MULTIPROC_DIR or "", exist_ok=True)
+            # pid reutilizado (o fork): el fichero existente es de otro proceso
+            if os.path.exists(_pid_file(pid)):
+                _archive_file(_pid_file(pid))
+            _owned_pid = pid
+        _write_atomic(_pid_file(pid), _local_payload())
+
+
+def mark_process_dead(pid: int) -> None:
+    """Archiva las métricas de un worker terminado (hook `child_exit` de gunicorn)."""
+    if not enabled():
+        return
+    try:
+        _archive_file(_pid_file(pid))
+    except Exception as e:
+        logger.warning("metric.multiproc_archive_failed", extra={"pid": pid, "error": str(e)})
+
+
+def reset_dir() -> None:
+    """Vacía el directorio al arrancar el master: los counters empiezan de cero."""
+    if not enabled():
+        return
+    os.makedirs(METRICS_MULTIPROC_DIR or "", exist_ok=True)
+    for path in glob.glob(_path("*.json")):
+        os.unlink(path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Merge:
+    """Acumulador de ficheros de métricas con las mismas claves que app.utils.metrics."""
+
+    def __init__(self) -> None:
+        self.counters: Dict[tuple, int] = {}
+        self.durations: Dict[tuple, list] = {}
+        self.histograms: Dict[tuple, list] = {}
+        self.gauges: Dict[tuple, float] = {}
+
+    @staticmethod
+    def _key(name: str, labels: list, extra: Tuple[Tuple[str, str], ...] = ()) -> tuple:
+        lbl = tuple(tuple(t) for t in labels)
+        if extra:
+            lbl = tuple(sorted(lbl + extra))
+        return (name, lbl)
+
+    @staticmethod
+    def _add_hist(table: Dict[tuple, list], key: tuple, bounds: list, counts: list, total: float, n: int) -> None:
+        h = table.get(key)
+        if h is None:
+            table[key] = [tuple(bounds), list(counts), total, n]
+        elif list(h[0]) != list(bounds):
+            logger.warning("metric.multiproc_bucket_mismatch", extra={"metric": key[0]})
+        else:
+            h[1] = [a + b for a, b in zip(h[1], counts)]
+            h[2] += total
+            h[3] += n
+
+    def add(self, data: Dict[str, Any], *, with_gauges: bool) -> None:
+        for name, labels, value in data.get("counters", []):
+            key = self._key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + int(value)
+        for attr in ("durations", "histograms"):
+            table = getattr(self, attr)
+            for name, labels, bounds, counts, total, n in data.get(attr, []):
+                self._add_hist(table, self._key(name, labels), bounds, counts, total, n)
+        if with_gauges:
+            pid = (("pid", str(data.get("pid"))),)
+            for name, labels, value in data.get("gauges", []):
+                self.gauges[self._key(name, labels, pid)] = float(value)
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "counters": [[name, [list(t) for t in labels], v] for (name, labels), v in self.counters.items()],
+            "durations": _series({k: [list(h[0]), h[1], h[2], h[3]] for k, h in self.durations.items()}),
+            "histograms": _series({k: [list(h[0]), h[1], h[2], h[3]] for k, h in self.histograms.items()}),
+        }
+
+
+def collect_all():
+    """Fusiona archivo + ficheros de todos los workers.
+
+    Devuelve (counters, gauges, durations, histograms) con el mismo formato que
+    `export_raw()[0]`, `export_gauges()`, `export_durations()` y `export_histograms()`.
+    """
+    flush()
+    merged = _Merge()
+    with _dir_lock(exclusive=False):
+        archive = _read(_path(_ARCHIVE))
+        if archive:
+            merged.add(archive, with_gauges=False)
+        for path in glob.glob(_path("metrics_*.json")):
+            data = _read(path)
+            if data is None:
+                continue
+            merged.add(data, with_gauges=_alive(int(data.get("pid") or 0)))
+    return (
+        merged.counters,
+        merged.gauges,
+        {k: tuple(h) for k, h in merged.durations.items()},
+        {k: tuple(h) for k, h in merged.histograms.items()},
+    )
+
+
+def _loop() -> None:
+    while not _stop.wait(max(0.5, METRICS_FLUSH_INTERVAL)):
+        try:
+            flush()
+        except Exception as e:
+            logger.warning("metric.multiproc_flush_failed", extra={"error": str(e)})
+
+
+def start_metrics_flush() -> bool:
+    """Arranca el volcado periódico en este worker (idempotente). Devuelve si quedó activo."""
+    global _thread
+    if not enabled():
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="metrics-flush", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_metrics_flush() -> None:
+    """Detiene el hilo y hace un último volcado (parada ordenada del worker)."""
+    _stop.set()
+    try:
+        flush()
+    except Exception as e:
+        logger.warning("metric.multiproc_flush_failed", extra={"error": str(e)})
@@ -0,0 +1,185 @@
+"""
+Profiler por muestreo de pilas para workers en producción (sin dependencias).
+
+Un hilo toma cada `interval` segundos las pilas de todos los hilos del proceso
+(`sys._current_frames()`) y cuenta pilas idénticas. El resultado se devuelve en
+formato *collapsed* (`hilo;func (fichero:línea);... N`), que aceptan flamegraph.pl,
+speedscope e inferno. El código perfilado no se instrumenta: el coste es el del
+hilo de muestreo (~decenas de µs por muestra con pocos hilos) y sólo mientras corre.
+
+- Por defecto se descartan las muestras de hilos en espera (leaf en wait/select/
+  recv...): interesa dónde se quema CPU, no dónde se duerme.
+- Perfil por request: la cabecera `X-Profile-Token` (HMAC-SHA256 con
+  PROFILER_SECRET sobre `exp:MÉTODO:ruta`) activa el muestreo durante esa request;
+  el resultado se guarda en la caché compartida bajo el id devuelto en
+  `X-Profile-Id` (aleatorio, generado por el servidor).
+- Nada de esto está activo si PROFILER_ENABLED es falso (valor por defecto).
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import (
+    PROFILER_SECRET,
+    PROFILER_MAX_CONCURRENT,
+    PROFILER_RESULT_TTL,
+)
+from app.utils.adapters.cache_adapter import aset_cache, get_cache
+from app.utils.metrics import increment
+
+TOKEN_HEADER = "X-Profile-Token"
+ID_HEADER = "X-Profile-Id"
+# Vigencia máxima de un token firmado (segundos)
+MAX_TOKEN_TTL = 3600
+
+# Hojas (fichero, función) de hilos bloqueados esperando: se descartan con skip_idle
+_IDLE_LEAVES = frozenset({
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "readinto"),
+    ("socket.py", "accept"),
+    ("ssl.py", "read"),
+    ("ssl.py", "recv_into"),
+    ("base_events.py", "_run_once"),
+})
+
+_active_lock = threading.Lock()
+_active = 0
+# Idents de los hilos de muestreo (no se muestrean entre sí)
+_sampler_idents: set = set()
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        parts = filename.replace("\\", "/").split("/")
+        short = "/".join(parts[-2:]) if len(parts) > 1 else filename
+        label = _labels[code] = f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ":")
+    return label
+
+
+class Sampler:
+    """Muestreo de pilas en un hilo propio. `start()` / `stop()` -> texto collapsed."""
+
+    def __init__(self, interval: float, *, skip_idle: bool = True, max_depth: int = 128):
+        self.interval = max(0.0005, float(interval))
+        self.skip_idle = skip_idle
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def _sample(self) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident in _sampler_idents:
+                continue
+            leaf = frame.f_code
+            if self.skip_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+                continue
+            stack = []
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+                depth += 1
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        _sampler_idents.add(threading.get_ident())
+        try:
+            while not self._stop.wait(self.interval):
+                self._sample()
+        finally:
+            _sampler_idents.discard(threading.get_ident())
+
+    def start(self) -> "Sampler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        increment("profiler_samples", self.samples)
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def try_acquire_slot() -> bool:
+    """Reserva uno de los PROFILER_MAX_CONCURRENT muestreos simultáneos del worker."""
+    global _active
+    with _active_lock:
+        if _active >= max(1, PROFILER_MAX_CONCURRENT):
+            return False
+        _active += 1
+        return True
+
+
+def release_slot() -> None:
+    global _active
+    with _active_lock:
+        _active = max(0, _active - 1)
+
+
+# --- Perfil por request (cabecera firmada) ---
+
+def _signature(exp: int, method: str, path: str) -> str:
+    msg = f"{exp}:{method.upper()}:{path}".encode()
+    return hmac.new(PROFILER_SECRET.encode(), msg, hashlib.sha256).hexdigest()
+
+
+def sign_request_token(method: str, path: str, ttl: int) -> Tuple[str, int]:
+    """Token para `X-Profile-Token` válido `ttl` segundos para MÉTODO + ruta exacta."""
+    if not PROFILER_SECRET:
+        raise ValueError("PROFILER_SECRET no configurado")
+    exp = int(time.time()) + max(1, min(int(ttl), MAX_TOKEN_TTL))
+    return f"{exp}.{_signature(exp, method, path)}", exp
+
+
+def verify_request_token(token: str, method: str, path: str) -> bool:
+    if not PROFILER_SECRET or not token:
+        return False
+    exp_raw, _, sig = token.partition(".")
+    try:
+        exp = int(exp_raw)
+    except ValueError:
+        return False
+    now = time.time()
+    if exp < now or exp > now + MAX_TOKEN_TTL:
+        return False
+    return hmac.compare_digest(sig, _signature(exp, method, path))
+
+
+def _result_key(profile_id: str) -> str:
+    return f"profiler:request:{profile_id}"
+
+
+async def asave_request_profile(profile_id: str, meta: Dict[str, object], collapsed: str) -> None:
+    await aset_cache(_result_key(profile_id), {**meta, "collapsed": collapsed}, PROFILER_RESULT_TTL)
+
+
+def get_request_profile(profile_id: str) -> Optional[Dict[str, object]]:
+    data = get_cache(_result_key(profile_id))
+    return data if isinstance(data, dict) else None
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import re
 from typing import Dict, Tuple
 
 # Exportador simple de Prometheus (formato de texto) a partir de app.utils.metrics
 # Nota: Este exportador no usa prom-client. Es ligero y sin dependencias.
 
-from app.utils.metrics import export_raw
+from app.utils.metrics import export_raw, export_gauges, export_durations, export_histograms, collect
+from app.observability import multiprocess
+
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _metric_name(name: str) -> str:
+    # "odoo.execute" -> "odoo_execute" (los puntos no son válidos en Prometheus)
+    return _INVALID_NAME.sub("_", name)
 
 
 def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
@@ -18,42 +27,57 @@ def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
     return f"{{{inner}}}"
 
 
+def _group(items: Dict, suffix: str = "") -> Dict[str, list]:
+    """Agrupa series por familia (nombre saneado): cada familia se emite en un solo bloque."""
+    families: Dict[str, list] = {}
+    for (name, labels), value in sorted(items.items()):
+        families.setdefault(_metric_name(name) + suffix, []).append((labels, value))
+    return families
+
+
+def _histogram_lines(lines: list[str], families: Dict[str, list], help_text: str) -> None:
+    for name, series in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, (bounds, counts, total, n) in series:
+            acc = 0
+            for bound, c in zip(list(bounds) + [float("inf")], counts):
+                acc += c
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(tuple(labels) + (('le', le),))} {acc}")
+            lbl = _format_labels(labels)
+            lines.append(f"{name}_sum{lbl} {float(total):.6f}")
+            lines.append(f"{name}_count{lbl} {int(n)}")
+
+
 def render_prometheus_text() -> str:
-    counters, timings = export_raw()
-    # counters: Dict[(name, labels_tuple), int]
-    # timings: Dict[(name, labels_tuple), float]  acumulado en segundos
+    if multiprocess.enabled():
+        # Todos los workers de gunicorn (incluye este, recién volcado)
+        counters, gauges, durations, histograms = multiprocess.collect_all()
+    else:
+        # Los collectors publican valores mantenidos fuera de metrics (caché L1, etc.)
+        collect()
+        counters, _timings = export_raw()
+        gauges = export_gauges()
+        durations = export_durations()
+        histograms = export_histograms()
     lines: list[str] = []
 
-    # Emitir HELP/TYPE para familias detectadas
-    seen_counter: set[str] = set()
-    seen_summary: set[str] = set()
-
-    for (name, _labels), _ in counters.items():
-        if name not in seen_counter:
-            lines.append(f"# HELP {name} Counter metric")
-            lines.append(f"# TYPE {name} counter")
-            seen_counter.add(name)
-
-    for (name, _labels), _ in timings.items():
-        # Usaremos sufijos: _seconds_total y _seconds_count para una aproximación de summary
-        base = f"{name}_seconds"
-        if base not in seen_summary:
-            lines.append(f"# HELP {base} Total observed seconds (accumulated)")
-            lines.append(f"# TYPE {base}_total counter")
-            lines.append(f"# TYPE {base}_count counter")
-            seen_summary.add(base)
-
-    # Counters
-    for (name, labels), value in counters.items():
-        lbl = _format_labels(labels)
-        lines.append(f"{name}{lbl} {int(value)}")
-
-    # Timings (como total acumulado y conteo de observaciones si hay contador paralelo)
-    # No llevamos número de observaciones en el util de métricas; expondremos solo total acumulado.
-    # Para compatibilidad con scrapers, añadimos _total como acumulado y omitimos _count.
-    for (name, labels), total_seconds in timings.items():
-        base = f"{name}_seconds"
-        lbl = _format_labels(labels)
-        lines.append(f"{base}_total{lbl} {float(total_seconds):.6f}")
+    for name, series in _group(counters).items():
+        lines.append(f"# HELP {name} Counter metric")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in series:
+            lines.append(f"{name}{_format_labels(labels)} {int(value)}")
+
+    for name, series in _group(gauges).items():
+        lines.append(f"# HELP {name} Gauge metric")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in series:
+            lines.append(f"{name}{_format_labels(labels)} {float(value):.6f}")
+
+    # Duraciones (record_duration/Timer) como histogramas `<nombre>_seconds`
+    _histogram_lines(lines, _group(durations, "_seconds"), "Duration in seconds")
+    # Histogramas de observe() (buckets acumulativos + _sum + _count)
+    _histogram_lines(lines, _group(histograms), "Histogram metric")
 
     return "\n".join(lines) + "\n"
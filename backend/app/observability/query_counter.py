@@ -0,0 +1,195 @@
+"""
+Conteo de sentencias SQL por request y detección de N+1.
+
+`instrument_engine` registra listeners `before/after_cursor_execute` en el engine.
+Con una request en curso (`app.observability.request_timing`) cada sentencia se
+cuenta por su *forma* —el SQL con espacios colapsados y listas `IN (...)` /
+`VALUES (...), (...)` reducidas— junto con su tiempo. Sin request, traza ni
+`assert_max_queries` activo los listeners sólo leen los ContextVar y retornan.
+
+- Al terminar la request, `report` observa `db_queries_per_request` y
+  `db_seconds_per_request` por ruta; si una misma forma se ejecutó
+  DB_N_PLUS_ONE_THRESHOLD veces o más, incrementa `db_n_plus_one{route}` y escribe
+  un warning "db.n_plus_one" (como mucho uno por ruta y forma cada 10 minutos).
+- Cabecera de depuración `X-DB-Queries` (DB_QUERY_HEADER_ENABLED): lo ejecutado
+  hasta el inicio de la respuesta.
+- Con una traza en curso (`app.observability.tracing`) cada sentencia es además
+  un span `db <OPERACIÓN>` con la forma como `db.statement`.
+- `assert_max_queries(n)`: ayuda para tests; cuenta en todo el proceso (también el
+  hilo del TestClient) y falla listando las sentencias si se supera `n`.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.settings import DB_N_PLUS_ONE_THRESHOLD
+from app.observability import request_timing, tracing
+from app.utils.metrics import increment, observe
+
+logger = logging.getLogger("app.db.n_plus_one")
+
+HEADER = "X-DB-Queries"
+QUERY_COUNT_BUCKETS: Tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+_REPORT_INTERVAL = 600.0
+_MAX_SHAPES = 4096
+
+_WS = re.compile(r"\s+")
+_PARAM = r"(?:%\(\w+\)s|%s|\?|:\w+|'(?:[^']|'')*'|-?\d+(?:\.\d+)?|NULL)"
+_IN_LIST = re.compile(rf"\bIN \(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)", re.IGNORECASE)
+_VALUES = re.compile(r"(\bVALUES \([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+
+_shapes: Dict[str, str] = {}
+_reported: Dict[Tuple[str, str], float] = {}
+_reported_lock = threading.Lock()
+_watchers: List["QueryLog"] = []
+_watchers_lock = threading.Lock()
+
+
+def statement_shape(statement: str) -> str:
+    """Forma normalizada de una sentencia (memorizada: el SQL compilado se repite)."""
+    shape = _shapes.get(statement)
+    if shape is None:
+        shape = _WS.sub(" ", statement).strip()
+        shape = _IN_LIST.sub("IN (...)", shape)
+        shape = _VALUES.sub(r"\1, ...", shape)
+        if len(_shapes) >= _MAX_SHAPES:
+            _shapes.clear()
+        _shapes[statement] = shape
+    return shape
+
+
+class QueryLog:
+    """Sentencias vistas dentro de un `assert_max_queries`."""
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def append(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.statements.append(statement_shape(statement))
+            self.seconds += seconds
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+    if context is not None and (_watchers or request_timing.current() is not None or tracing.current_span() is not None):
+        context._qc_t0 = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ANN001
+    t0 = getattr(context, "_qc_t0", None)
+    if t0 is None:
+        return
+    dt = time.perf_counter() - t0
+    rt = request_timing.current()
+    if rt is not None:
+        rt.add_query(statement_shape(statement), dt)
+    if tracing.current_span() is not None:
+        shape = statement_shape(statement)
+        tracing.record_span(
+            f"db {shape.split(' ', 1)[0].upper()}",
+            dt,
+            attributes={"db.system": conn.dialect.name, "db.statement": shape[:2000]},
+        )
+    if _watchers:
+        with _watchers_lock:
+            watchers = list(_watchers)
+        for w in watchers:
+            w.append(statement, dt)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra los listeners de conteo en `engine` (idempotente)."""
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+
+
+def repeated_shapes(rt: request_timing.RequestTiming, threshold: int = DB_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int, float]]:
+    """Formas ejecutadas `threshold` veces o más en la request (candidatas a N+1)."""
+    if threshold <= 0:
+        return []
+    return [s for s in rt.query_stats()[2] if s[1] >= threshold]
+
+
+def header_value(rt: request_timing.RequestTiming) -> str:
+    """Valor de `X-DB-Queries`: `count=N; ms=T; top=Kx <sentencia>`."""
+    count, seconds, shapes = rt.query_stats()
+    value = f"count={count}; ms={seconds * 1000.0:.1f}"
+    if shapes and shapes[0][1] > 1:
+        top = shapes[0][0][:160].encode("ascii", "replace").decode("ascii")
+        value += f"; top={shapes[0][1]}x {top}"
+    return value
+
+
+def report(route: str, rt: request_timing.RequestTiming, *, correlation_id: Optional[str] = None) -> None:
+    """Métricas de la request terminada y aviso de N+1 (llamado por RequestTimingMiddleware)."""
+    count, seconds, shapes = rt.query_stats()
+    if not count:
+        return
+    tags = {"route": route}
+    observe("db_queries_per_request", count, buckets=QUERY_COUNT_BUCKETS, tags=tags)
+    observe("db_seconds_per_request", seconds, tags=tags)
+    if DB_N_PLUS_ONE_THRESHOLD <= 0:
+        return
+    for shape, n, s in shapes:
+        if n < DB_N_PLUS_ONE_THRESHOLD:
+            break
+        increment("db_n_plus_one", tags=tags)
+        now = time.monotonic()
+        with _reported_lock:
+            last = _reported.get((route, shape))
+            if last is not None and now - last < _REPORT_INTERVAL:
+                continue
+            if len(_reported) >= 1000:
+                _reported.clear()
+            _reported[(route, shape)] = now
+        logger.warning(
+            f"db.n_plus_one {route} {n}x {shape[:300]}",
+            extra={
+                "correlation_id": correlation_id,
+                "route": route,
+                "executions": n,
+                "db_ms": round(s * 1000.0, 2),
+                "request_queries": count,
+                "statement": shape,
+            },
+        )
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryLog]:
+    """Falla con AssertionError si el bloque ejecuta más de `limit` sentencias.
+
+    Uso en tests::
+
+        with assert_max_queries(3):
+            client.get("/releases?limit=20")
+
+    Cuenta todas las sentencias del proceso sobre engines instrumentados; los
+    hilos de fondo (volcados de auditoría, sync) conviene pararlos en el test.
+    """
+    log = QueryLog()
+    with _watchers_lock:
+        _watchers.append(log)
+    try:
+        yield log
+    finally:
+        with _watchers_lock:
+            _watchers.remove(log)
+    if log.count > limit:
+        listing = "\n".join(f"  {i}. {s[:300]}" for i, s in enumerate(log.statements, 1))
+        raise AssertionError(f"{log.count} queries ejecutadas, máximo {limit}:\n{listing}")
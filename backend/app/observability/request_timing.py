@@ -0,0 +1,123 @@
+"""
+Desglose del tiempo de cada request por dependencia (db, odoo, redis, plaid, n8n...).
+
+`RequestTimingMiddleware` abre un `RequestTiming` en un ContextVar; los puntos de
+integración llaman a `add(dep, segundos)` o usan `timed(dep)`. Sin request en curso
+(hilos de fondo, scripts) `add` sólo lee el ContextVar y retorna.
+
+- Los endpoints sync corren en el threadpool con una copia del contexto: ven el
+  mismo objeto. Los pools propios deben enviar las tareas con `copy_context().run`
+  (ver `odoo_service._prefetch`).
+- Con llamadas en paralelo la suma por dependencia puede superar el tiempo de
+  pared; `other` (tiempo propio: normalización, serialización...) se recorta a 0.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_current: ContextVar[Optional["RequestTiming"]] = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    __slots__ = ("started", "deps", "queries", "_lock")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        # dependencia -> [segundos, llamadas]
+        self.deps: Dict[str, List[float]] = {}
+        # forma de sentencia SQL -> [ejecuciones, segundos] (ver app.observability.query_counter)
+        self.queries: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, dep: str, seconds: float) -> None:
+        with self._lock:
+            d = self.deps.get(dep)
+            if d is None:
+                self.deps[dep] = [seconds, 1]
+            else:
+                d[0] += seconds
+                d[1] += 1
+
+    def add_query(self, shape: str, seconds: float) -> None:
+        """Cuenta una sentencia SQL: suma a la dependencia `db` y a su forma."""
+        with self._lock:
+            d = self.deps.get("db")
+            if d is None:
+                self.deps["db"] = [seconds, 1]
+            else:
+                d[0] += seconds
+                d[1] += 1
+            q = self.queries.get(shape)
+            if q is None:
+                self.queries[shape] = [1, seconds]
+            else:
+                q[0] += 1
+                q[1] += seconds
+
+    def query_stats(self) -> Tuple[int, float, List[Tuple[str, int, float]]]:
+        """(sentencias, segundos en BD, [(forma, ejecuciones, segundos)] de más a menos repetida)."""
+        with self._lock:
+            shapes = sorted(((k, int(v[0]), v[1]) for k, v in self.queries.items()), key=lambda x: -x[1])
+        return sum(n for _k, n, _s in shapes), sum(s for _k, _n, s in shapes), shapes
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self, total: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """{dep: {"ms", "calls"}} más `other` (total - suma de dependencias)."""
+        total = self.elapsed() if total is None else total
+        with self._lock:
+            items = [(k, v[0], int(v[1])) for k, v in self.deps.items()]
+        out = {k: {"ms": round(s * 1000.0, 2), "calls": n} for k, s, n in sorted(items)}
+        spent = sum(s for _k, s, _n in items)
+        out["other"] = {"ms": round(max(0.0, total - spent) * 1000.0, 2), "calls": 0}
+        return out
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Valor de la cabecera Server-Timing (ms, con número de llamadas en `desc`)."""
+        total = self.elapsed() if total is None else total
+        parts = []
+        for dep, v in self.summary(total).items():
+            if dep == "other":
+                parts.append(f"app;dur={v['ms']:.1f}")
+            else:
+                parts.append(f'{dep};dur={v["ms"]:.1f};desc="{v["calls"]} calls"')
+        parts.append(f"total;dur={total * 1000.0:.1f}")
+        return ", ".join(parts)
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def begin() -> Tuple[RequestTiming, Token]:
+    """Abre el contexto de la request actual. Devuelve el acumulador y el token para `end`."""
+    rt = RequestTiming()
+    return rt, _current.set(rt)
+
+
+def end(token: Token) -> None:
+    _current.reset(token)
+
+
+def add(dep: str, seconds: float) -> None:
+    rt = _current.get()
+    if rt is not None:
+        rt.add(dep, seconds)
+
+
+@contextmanager
+def timed(dep: str) -> Iterator[None]:
+    rt = _current.get()
+    if rt is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        rt.add(dep, time.perf_counter() - t0)
@@ -0,0 +1,420 @@
+"""
+Trazas distribuidas ligeras (sin SDK) con export OTLP/JSON.
+
+`TracingMiddleware` abre un span SERVER por request; dentro cuelgan spans de las
+llamadas a Odoo, sentencias SQL, operaciones de Redis y HTTP saliente (n8n,
+Plaid...). Al cerrar la request la traza entera se encola y un hilo la exporta
+cada TRACE_EXPORT_INTERVAL segundos como `ExportTraceServiceRequest` (OTLP/JSON):
+una línea por lote en TRACE_EXPORT_FILE y/o POST a TRACE_EXPORT_ENDPOINT
+(un OpenTelemetry Collector, Jaeger o Tempo aceptan ese formato tal cual).
+
+- Ids: sólo un `traceparent` (W3C) válido continúa una traza y decide su
+  muestreo; si no, el trace id lo genera el servidor. El X-Request-ID entrante
+  (lo controla el cliente) queda como atributo `http.request_id`. Sin X-Request-ID
+  entrante, el trace id pasa a ser el correlation id de logs y auditoría.
+- Muestreo: TRACE_SAMPLE_RATE sobre el trace id (misma decisión en todos los
+  workers y servicios). Con TRACE_SLOW_MS > 0 se registran todas las requests y
+  se exportan además las lentas y las 5xx; cuesta unos µs por span.
+- Sin traza en curso (no muestreada, hilos de fondo) todo se reduce a leer un
+  ContextVar.
+- Propagación saliente: `httpx_event_hooks()` para `httpx.Client` /
+  `AsyncClient(event_hooks=...)` añade `traceparent` y `X-Request-ID` y un span
+  CLIENT por petición (propagate=False para terceros). Se usan hooks y no un
+  transporte propio para no perder los proxies de entorno (HTTP(S)_PROXY/NO_PROXY).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from app.config.settings import (
+    TRACING_ENABLED,
+    TRACE_SAMPLE_RATE,
+    TRACE_SLOW_MS,
+    TRACE_SERVICE_NAME,
+    TRACE_EXPORT_FILE,
+    TRACE_EXPORT_FILE_MAX_BYTES,
+    TRACE_EXPORT_FILE_BACKUPS,
+    TRACE_EXPORT_ENDPOINT,
+    TRACE_EXPORT_INTERVAL,
+    TRACE_QUEUE_SIZE,
+    TRACE_MAX_SPANS,
+)
+from app.utils.logging_config import correlation_id
+from app.utils.metrics import increment, observe
+
+logger = logging.getLogger("app.tracing")
+
+# SpanKind y StatusCode de OTLP
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+TRACEPARENT_HEADER = "traceparent"
+REQUEST_ID_HEADER = "X-Request-ID"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_ZERO_TRACE = "0" * 32
+_EXPORT_BATCH = 200
+
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+_queue: "queue.Queue[Trace]" = queue.Queue(max(1, TRACE_QUEUE_SIZE))
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_file_sink: Optional[Any] = None
+_client: Optional[httpx.Client] = None
+
+
+class Trace:
+    """Spans terminados de una traza en este worker."""
+
+    __slots__ = ("trace_id", "sampled", "spans", "dropped", "_lock")
+
+    def __init__(self, trace_id: str, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def finished(self) -> List["Span"]:
+        with self._lock:
+            return list(self.spans)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "status", "status_message")
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        kind: int = KIND_INTERNAL,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start_ns: Optional[int] = None,
+    ) -> None:
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        self.status = STATUS_ERROR
+        if isinstance(error, BaseException):
+            self.attributes.setdefault("error.type", error.__class__.__name__)
+        self.status_message = str(error)[:500]
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        self.trace.add(self)
+
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _ratio_sampled(trace_id: str) -> bool:
+    # Como TraceIdRatioBased de OpenTelemetry: los 8 bytes bajos del id contra el umbral
+    return int(trace_id[16:], 16) < TRACE_SAMPLE_RATE * (1 << 64)
+
+
+def begin_request(method: str, path: str, traceparent: Optional[str], request_id: Optional[str]) -> Optional[Tuple[Span, Token]]:
+    """Span raíz de la request si se registra; None si la traza no se muestrea."""
+    if not TRACING_ENABLED or not (TRACE_EXPORT_FILE or TRACE_EXPORT_ENDPOINT):
+        return None
+    parent_id: Optional[str] = None
+    m = _TRACEPARENT.match((traceparent or "").strip().lower())
+    if m and m.group(1) != _ZERO_TRACE:
+        trace_id, parent_id = m.group(1), m.group(2)
+        sampled = bool(int(m.group(3), 16) & 1)
+    else:
+        trace_id = os.urandom(16).hex()
+        sampled = _ratio_sampled(trace_id)
+    if not sampled and TRACE_SLOW_MS <= 0:
+        return None
+    attrs: Dict[str, Any] = {"http.request.method": method, "url.path": path}
+    if request_id:
+        attrs["http.request_id"] = request_id
+    span = Span(Trace(trace_id, sampled), f"{method} {path}", KIND_SERVER, parent_id, attrs)
+    return span, _current.set(span)
+
+
+def end_request(span: Span, token: Token, *, status: int, route: Optional[str]) -> None:
+    """Cierra el span raíz y encola la traza si está muestreada, es lenta o falló."""
+    _current.reset(token)
+    if route:
+        span.name = f"{span.attributes.get('http.request.method', '')} {route}"
+        span.attributes["http.route"] = route
+    span.attributes["http.response.status_code"] = status
+    if status >= 500 and span.status != STATUS_ERROR:
+        span.set_error(f"HTTP {status}")
+    span.end()
+    trace = span.trace
+    if trace.sampled or span.status == STATUS_ERROR or (TRACE_SLOW_MS > 0 and span.duration_ms() >= TRACE_SLOW_MS):
+        _enqueue(trace)
+
+
+@contextmanager
+def span(name: str, *, kind: int = KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Span]]:
+    """Span hijo del actual durante el bloque (no hace nada sin traza en curso)."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    s = Span(parent.trace, name, kind, parent.span_id, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def record_span(
+    name: str,
+    seconds: float,
+    *,
+    kind: int = KIND_CLIENT,
+    attributes: Optional[Dict[str, Any]] = None,
+    error: Optional[Any] = None,
+) -> None:
+    """Span hijo del actual que terminó ahora y duró `seconds` (hooks con su propio t0)."""
+    parent = _current.get()
+    if parent is None:
+        return
+    end_ns = time.time_ns()
+    s = Span(parent.trace, name, kind, parent.span_id, attributes, start_ns=end_ns - int(seconds * 1e9))
+    if error is not None:
+        s.set_error(error)
+    s.end(end_ns)
+
+
+# --- HTTP saliente (httpx) ---
+
+# Span CLIENT abierto por petición saliente (hook de request -> hook de response)
+_http_spans: "weakref.WeakKeyDictionary[httpx.Request, Span]" = weakref.WeakKeyDictionary()
+
+
+def _on_http_request(request: httpx.Request, propagate: bool) -> None:
+    parent = _current.get()
+    s: Optional[Span] = None
+    if parent is not None:
+        s = Span(
+            parent.trace,
+            f"HTTP {request.method}",
+            KIND_CLIENT,
+            parent.span_id,
+            {
+                "http.request.method": request.method,
+                "server.address": request.url.host,
+                "url.full": str(request.url.copy_with(query=None, fragment=None)),
+            },
+        )
+        _http_spans[request] = s
+    if propagate:
+        cid = correlation_id.get()
+        if cid and REQUEST_ID_HEADER not in request.headers:
+            request.headers[REQUEST_ID_HEADER] = cid
+        if s is not None:
+            request.headers[TRACEPARENT_HEADER] = s.traceparent()
+
+
+def _on_http_response(response: httpx.Response) -> None:
+    s = _http_spans.pop(response.request, None)
+    if s is None:
+        return
+    s.set_attribute("http.response.status_code", response.status_code)
+    if response.status_code >= 400:
+        s.set_error(f"HTTP {response.status_code}")
+    s.end()
+
+
+def httpx_event_hooks(*, propagate: bool = True, asynchronous: bool = False) -> Dict[str, List[Any]]:
+    """`event_hooks` para httpx: span CLIENT por petición y propagación de ids.
+
+    Con `asynchronous=True` para `httpx.AsyncClient`. Una petición que falla sin
+    respuesta (timeout, conexión) no deja span propio: el error queda en el padre.
+    """
+    if asynchronous:
+        async def on_request(request: httpx.Request) -> None:
+            _on_http_request(request, propagate)
+
+        async def on_response(response: httpx.Response) -> None:
+            _on_http_response(response)
+    else:
+        def on_request(request: httpx.Request) -> None:
+            _on_http_request(request, propagate)
+
+        def on_response(response: httpx.Response) -> None:
+            _on_http_response(response)
+    return {"request": [on_request], "response": [on_response]}
+
+
+# --- Export OTLP/JSON ---
+
+def _enqueue(trace: Trace) -> None:
+    try:
+        _queue.put_nowait(trace)
+    except queue.Full:
+        increment("trace_dropped")
+
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attrs: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _any_value(v)} for k, v in attrs.items() if v is not None]
+
+
+def _otlp_span(s: Span) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "traceId": s.trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": _attributes(s.attributes),
+        "status": {"code": s.status, "message": s.status_message} if s.status_message else {"code": s.status},
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    return out
+
+
+def to_otlp(traces: List[Trace]) -> Dict[str, Any]:
+    """Lote de trazas como ExportTraceServiceRequest (OTLP/JSON, ids en hex)."""
+    spans = [_otlp_span(s) for t in traces for s in t.finished()]
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _attributes({
+                        "service.name": TRACE_SERVICE_NAME,
+                        "process.pid": os.getpid(),
+                        "host.name": os.uname().nodename if hasattr(os, "uname") else None,
+                    })
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def _export(traces: List[Trace]) -> None:
+    payload = to_otlp(traces)
+    spans = len(payload["resourceSpans"][0]["scopeSpans"][0]["spans"])
+    t0 = time.perf_counter()
+    if _file_sink is not None:
+        try:
+            _file_sink.write([payload])
+        except Exception as e:
+            increment("trace_export_errors", tags={"exporter": "file"})
+            logger.warning("tracing.export_failed", extra={"exporter": "file", "error": str(e)})
+    if _client is not None:
+        try:
+            _client.post(TRACE_EXPORT_ENDPOINT, json=payload).raise_for_status()
+        except Exception as e:
+            increment("trace_export_errors", tags={"exporter": "otlp_http"})
+            logger.warning("tracing.export_failed", extra={"exporter": "otlp_http", "error": str(e)})
+    increment("trace_exported", len(traces))
+    increment("trace_spans_exported", spans)
+    observe("trace_export_seconds", time.perf_counter() - t0)
+
+
+def flush() -> int:
+    """Exporta lo encolado en lotes. Devuelve cuántas trazas."""
+    total = 0
+    while True:
+        batch: List[Trace] = []
+        try:
+            while len(batch) < _EXPORT_BATCH:
+                batch.append(_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not batch:
+            return total
+        _export(batch)
+        total += len(batch)
+
+
+def _loop() -> None:
+    while not _stop.wait(max(0.5, TRACE_EXPORT_INTERVAL)):
+        flush()
+
+
+def start_tracing() -> bool:
+    """Arranca el exportador en este worker si TRACING_ENABLED y hay algún destino."""
+    global _thread, _file_sink, _client
+    if not TRACING_ENABLED or not (TRACE_EXPORT_FILE or TRACE_EXPORT_ENDPOINT):
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    if TRACE_EXPORT_FILE and _file_sink is None:
+        from app.audit.audit_pipeline import RotatingFileSink
+
+        _file_sink = RotatingFileSink(TRACE_EXPORT_FILE, max_bytes=TRACE_EXPORT_FILE_MAX_BYTES, backups=TRACE_EXPORT_FILE_BACKUPS)
+    if TRACE_EXPORT_ENDPOINT and _client is None:
+        _client = httpx.Client(timeout=10.0)
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="trace-exporter", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_tracing() -> None:
+    """Detiene el hilo y exporta lo pendiente (parada ordenada del worker)."""
+    global _thread, _file_sink, _client
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=max(1.0, TRACE_EXPORT_INTERVAL))
+        _thread = None
+    flush()
+    if _file_sink is not None:
+        _file_sink.close()
+        _file_sink = None
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,29 @@
+"""Sincroniza el espejo local de CRM Odoo (crm.lead, res.partner).
+Run manually or via cron:
+    python -m app.scripts.sync_odoo_crm            # incremental (write_date)
+    python -m app.scripts.sync_odoo_crm --full     # reinicia marcas y concilia borrados
+"""
+from __future__ import annotations
+import argparse
+from app.db.database import init_db
+from app.integrations.odoo.odoo_sync import sync_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--full", action="store_true", help="Pasada completa")
+    parser.add_argument("--profile", action="append", help="Perfil Odoo (repetible); por defecto ODOO_SYNC_PROFILES")
+    args = parser.parse_args()
+    init_db()
+    results = sync_all(profiles=args.profile, full=True if args.full else None)
+    if not results:
+        print("Otra sincronización está en curso; nada que hacer.")
+    for r in results:
+        if "error" in r:
+            print(f"{r['profile']}/{r['model']}: ERROR {r['error']}")
+        else:
+            print(f"{r['profile']}/{r['model']}: {r['rows']} filas, {r['deleted']} borradas en {r['seconds']}s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,289 @@
+"""Precalentamiento de la caché para las consultas Argus más calientes.
+
+Tras un deploy o un flush de Redis los primeros usuarios pagaban la latencia
+completa de Odoo. El warmer mantiene un registro de consultas calentables y las
+recalcula al arrancar y periódicamente:
+
+- Sólo un worker del clúster ejecuta cada pasada (lock SET NX en Redis).
+- Las consultas se lanzan con un pool acotado (CACHE_WARMER_CONCURRENCY) para
+  no exceder el presupuesto de concurrencia contra Odoo.
+- Cada pasada se ejecuta en modo `cache_refresh`: se ignoran las lecturas y se
+  reescriben las claves (incluidas las copias :backup).
+- El estado de la última pasada (cobertura, errores, duración) se guarda en la
+  caché compartida para que cualquier worker pueda reportarlo.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.config.settings import (
+    CACHE_WARMER_ENABLED,
+    CACHE_WARMER_INTERVAL,
+    CACHE_WARMER_CONCURRENCY,
+    CACHE_WARMER_STARTUP_DELAY,
+)
+from app.utils.adapters.cache_adapter import (
+    acquire_lock,
+    release_lock,
+    cache_refresh,
+    get_cache,
+    set_cache,
+)
+from app.utils.metrics import increment, observe, set_gauge
+
+logger = logging.getLogger("app.services.cache_warmer")
+
+_LOCK_NAME = "cache_warmer"
+_STATUS_KEY = "warmer:status"
+# Misma clave que usa preferences_router para los destacados del mercado
+_FEATURED_PREF_KEY = "market_featured"
+_MAX_ERRORS = 20
+
+
+@dataclass(frozen=True)
+class WarmTarget:
+    """Una consulta calentable: `run()` llama al servicio con los parámetros del endpoint."""
+
+    name: str
+    group: str
+    run: Callable[[], Any]
+
+
+# grupo -> proveedor de objetivos; las fases se ejecutan en orden y en paralelo dentro de cada una
+_registry: Dict[str, Callable[[], List[WarmTarget]]] = {}
+_phases: Dict[str, int] = {}
+_state_lock = threading.Lock()
+_local_status: Dict[str, Any] = {}
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def register_warmer(group: str, provider: Callable[[], List[WarmTarget]], *, phase: int = 0) -> None:
+    """Registra un proveedor de objetivos. Las fases menores se calientan primero."""
+    _registry[group] = provider
+    _phases[group] = phase
+
+
+# --- Objetivos por defecto (parámetros por defecto de los routers) ---
+
+def _product_targets() -> List[WarmTarget]:
+    from app.integrations.argus.argus_service import get_argus_product_descriptions
+
+    return [WarmTarget("argus.products", "products", get_argus_product_descriptions)]
+
+
+def _prices_today_targets() -> List[WarmTarget]:
+    from app.integrations.argus.argus_service import get_argus_prices_today
+
+    # GET /argus/prices/today sin parámetros (shape=compact)
+    return [WarmTarget("argus.prices_today.compact", "prices_today", lambda: get_argus_prices_today(shape="compact"))]
+
+
+def _today_change_targets() -> List[WarmTarget]:
+    from app.analytics.argus_analytics_service import get_today_with_change
+
+    return [WarmTarget("analytics.today_with_change", "today_change", lambda: get_today_with_change(limit=4000))]
+
+
+def _top_movers_targets() -> List[WarmTarget]:
+    from app.analytics.argus_analytics_service import get_top_movers
+
+    return [
+        WarmTarget(f"analytics.top_movers.{d}", "top_movers", lambda d=d: get_top_movers(direction=d))
+        for d in ("down", "up")
+    ]
+
+
+def _featured_descriptions() -> List[str]:
+    """Productos destacados de todos los usuarios, con la descripción original de Argus.
+
+    preferences_router guarda los ítems en minúsculas; se mapean sin distinguir
+    mayúsculas contra el catálogo de productos (ya caliente en la fase anterior).
+    """
+    from app.db.database import SessionLocal
+    from app.db.models import UserPreference
+    from app.integrations.argus.argus_service import get_argus_product_descriptions
+
+    wanted: Set[str] = set()
+    with SessionLocal() as db:
+        for (value,) in db.query(UserPreference.value).filter(UserPreference.key == _FEATURED_PREF_KEY):
+            items = value.get("items") if isinstance(value, dict) else None
+            if isinstance(items, list):
+                wanted.update(str(i).strip().lower() for i in items if str(i).strip())
+    if not wanted:
+        return []
+    by_lower = {d.lower(): d for d in get_argus_product_descriptions()}
+    missing = sorted(w for w in wanted if w not in by_lower)
+    if missing:
+        logger.debug("Destacados sin producto Argus", extra={"items": missing[:10], "count": len(missing)})
+    return sorted(by_lower[w] for w in wanted if w in by_lower)
+
+
+def _featured_series_targets() -> List[WarmTarget]:
+    from app.analytics.argus_analytics_service import get_series
+
+    return [
+        WarmTarget(f"analytics.series:{d}", "featured_series", lambda d=d: get_series(description=d))
+        for d in _featured_descriptions()
+    ]
+
+
+register_warmer("products", _product_targets, phase=0)
+register_warmer("prices_today", _prices_today_targets, phase=0)
+register_warmer("today_change", _today_change_targets, phase=0)
+register_warmer("top_movers", _top_movers_targets, phase=1)
+register_warmer("featured_series", _featured_series_targets, phase=1)
+
+
+# --- Ejecución ---
+
+def _run_target(target: WarmTarget, scope: Set[str]) -> Optional[str]:
+    """Ejecuta un objetivo en modo refresco. Devuelve el error o None."""
+    t0 = time.perf_counter()
+    try:
+        with cache_refresh(scope):
+            target.run()
+        return None
+    except Exception as e:
+        return f"{e.__class__.__name__}: {e}"
+    finally:
+        observe("cache_warmer_target_seconds", time.perf_counter() - t0, tags={"group": target.group})
+
+
+def _run_pass(trigger: str) -> Dict[str, Any]:
+    started = time.time()
+    t0 = time.perf_counter()
+    groups: Dict[str, Dict[str, int]] = {}
+    errors: List[Dict[str, str]] = []
+    scope: Set[str] = set()
+    workers = max(1, CACHE_WARMER_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cache-warmer") as pool:
+        for phase in sorted(set(_phases.values())):
+            targets: List[WarmTarget] = []
+            for group, provider in _registry.items():
+                if _phases[group] != phase:
+                    continue
+                groups.setdefault(group, {"total": 0, "ok": 0, "failed": 0})
+                try:
+                    targets.extend(provider())
+                except Exception as e:
+                    groups[group]["failed"] += 1
+                    groups[group]["total"] += 1
+                    errors.append({"target": f"{group}:<registry>", "error": f"{e.__class__.__name__}: {e}"})
+            results = list(pool.map(lambda t: (t, _run_target(t, scope)), targets))
+            for target, err in results:
+                g = groups[target.group]
+                g["total"] += 1
+                if err is None:
+                    g["ok"] += 1
+                else:
+                    g["failed"] += 1
+                    errors.append({"target": target.name, "error": err})
+    total = sum(g["total"] for g in groups.values())
+    ok = sum(g["ok"] for g in groups.values())
+    return {
+        "trigger": trigger,
+        "started_at": started,
+        "finished_at": time.time(),
+        "duration_seconds": round(time.perf_counter() - t0, 3),
+        "targets": total,
+        "warmed": ok,
+        "coverage": round(ok / total, 4) if total else 1.0,
+        "groups": groups,
+        "errors": errors[:_MAX_ERRORS],
+    }
+
+
+def run_once(trigger: str = "manual") -> Optional[Dict[str, Any]]:
+    """Ejecuta una pasada si este worker obtiene el lock de clúster.
+
+    Devuelve el estado de la pasada, o None si otro worker la está ejecutando.
+    """
+    ttl = max(60, CACHE_WARMER_INTERVAL or 0)
+    token = acquire_lock(_LOCK_NAME, ttl)
+    if token is None:
+        increment("cache_warmer_runs", tags={"result": "skipped"})
+        return None
+    try:
+        status = _run_pass(trigger)
+    finally:
+        release_lock(_LOCK_NAME, token)
+    result = "ok" if not status["errors"] else ("partial" if status["warmed"] else "failed")
+    status["result"] = result
+    increment("cache_warmer_runs", tags={"result": result})
+    observe("cache_warmer_run_seconds", status["duration_seconds"])
+    set_gauge("cache_warmer_coverage_ratio", status["coverage"])
+    if result != "failed":
+        set_gauge("cache_warmer_last_success_timestamp", status["finished_at"])
+    with _state_lock:
+        _local_status.clear()
+        _local_status.update(status)
+    # Compartido entre workers: cualquiera puede reportar la última pasada del clúster
+    set_cache(_STATUS_KEY, status, ttl_seconds=max(3600, 3 * (CACHE_WARMER_INTERVAL or 0)))
+    log = logger.info if result == "ok" else logger.warning
+    log(
+        "Cache warmer: pasada completada",
+        extra={k: status[k] for k in ("trigger", "result", "targets", "warmed", "duration_seconds")},
+    )
+    return status
+
+
+def _loop() -> None:
+    # Jitter para que los workers no compitan por el lock en el mismo instante
+    if _stop.wait(CACHE_WARMER_STARTUP_DELAY + random.uniform(0, 2)):
+        return
+    trigger = "startup"
+    while True:
+        try:
+            run_once(trigger)
+        except Exception as e:  # nunca tumbar el hilo
+            logger.error("Cache warmer: error en la pasada", extra={"error": str(e)})
+        if CACHE_WARMER_INTERVAL <= 0:
+            return
+        trigger = "schedule"
+        if _stop.wait(CACHE_WARMER_INTERVAL + random.uniform(0, 5)):
+            return
+
+
+def start_cache_warmer() -> bool:
+    """Arranca el hilo del warmer en este worker (idempotente). Devuelve si quedó activo."""
+    global _thread
+    if not CACHE_WARMER_ENABLED:
+        return False
+    if _thread is not None and _thread.is_alive():
+        return True
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="cache-warmer", daemon=True)
+    _thread.start()
+    return True
+
+
+def stop_cache_warmer() -> None:
+    _stop.set()
+
+
+def trigger_async(trigger: str = "manual") -> None:
+    """Lanza una pasada en segundo plano (para el endpoint de administración)."""
+    threading.Thread(target=run_once, args=(trigger,), name="cache-warmer-manual", daemon=True).start()
+
+
+def warmer_status() -> Dict[str, Any]:
+    """Estado del warmer: configuración, registro y última pasada del clúster."""
+    last = get_cache(_STATUS_KEY)
+    if last is None:
+        with _state_lock:
+            last = dict(_local_status) or None
+    return {
+        "enabled": CACHE_WARMER_ENABLED,
+        "running_here": bool(_thread is not None and _thread.is_alive()),
+        "interval_seconds": CACHE_WARMER_INTERVAL,
+        "concurrency": CACHE_WARMER_CONCURRENCY,
+        "registry": {g: _phases[g] for g in _registry},
+        "last_run": last,
+    }
@@ -4,19 +4,69 @@ Cache con TTL con backend dual: in-memory (por defecto) o Redis si REDIS_URL est
 
 - Seguro para multi-worker cuando se usa Redis.
 - Resiliente: si Redis falla, hace fallback a memoria sin romper el flujo.
+- `aget_cache`/`aset_cache`/`adelete_cache` usan redis.asyncio con un pool
+  compartido para no bloquear el event loop en endpoints `async def`.
+- La memoria local (L1) está acotada por entradas y bytes por namespace y se
+  purga en segundo plano; ver `memory_cache.BoundedTTLCache`.
 """
+import os
+import sys
+import json
 import time
+import asyncio
+import uuid
+import weakref
+import socket
 import logging
 import pickle
-from typing import Any, Optional, Callable, TypeVar, Tuple, Dict, cast
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Callable, TypeVar, Tuple, Dict, Iterable, Iterator, List, Set, cast
 from functools import wraps
 
-from app.config.settings import REDIS_URL, APP_NAME
+from app.config.settings import (
+    REDIS_URL,
+    APP_NAME,
+    CACHE_L1_MAX_ENTRIES,
+    CACHE_L1_MAX_MB,
+    CACHE_L1_BUDGETS,
+    CACHE_L1_SHADOW_TTL,
+    CACHE_L1_SWEEP_INTERVAL,
+    CACHE_INVALIDATION_BUS,
+    CACHE_L1_COHERENT_TTL,
+    CACHE_REDIS_ASYNC_MAX_CONNECTIONS,
+)
+from app.utils.adapters.memory_cache import BoundedTTLCache, key_namespace
+from app.utils.metrics import increment, observe, set_gauge, set_counter, register_collector, SIZE_BUCKETS
+from app.observability import request_timing, tracing
 
 logger = logging.getLogger("app.utils.cache")
 
-# --- In-memory store (fallback) ---
-_store: Dict[str, Tuple[float, Any]] = {}
+_MB = 1024 * 1024
+
+
+def _parse_budgets(items: list[str]) -> Dict[str, Tuple[int, int]]:
+    """Convierte ["argus=64:5000", "rbac=4"] en {ns: (max_entries, max_bytes)}."""
+    out: Dict[str, Tuple[int, int]] = {}
+    for item in items:
+        try:
+            ns, _, spec = item.partition("=")
+            mb, _, entries = spec.partition(":")
+            out[ns.strip()] = (int(entries) if entries else CACHE_L1_MAX_ENTRIES, int(float(mb) * _MB))
+        except Exception:
+            logger.warning("CACHE_L1_BUDGETS: entrada inválida ignorada", extra={"item": item})
+    return out
+
+
+# --- In-memory store (L1 acotada; fallback cuando no hay Redis) ---
+_l1 = BoundedTTLCache(
+    max_entries=CACHE_L1_MAX_ENTRIES,
+    max_bytes=int(CACHE_L1_MAX_MB * _MB),
+    budgets=_parse_budgets(CACHE_L1_BUDGETS),
+)
+_sweeper_pid: Optional[int] = None
+_sweeper_lock = threading.Lock()
 
 # --- Redis (opcional) ---
 _redis = None  # tipo dinámico para evitar dependencia dura
@@ -59,72 +109,713 @@ def _deserialize(data: bytes) -> Any:
     return pickle.loads(data)
 
 
-def set_cache(key: str, value: Any, ttl_seconds: int) -> None:
-    """Guarda un valor en caché con TTL en segundos. Usa Redis si está disponible."""
-    ttl = max(0, int(ttl_seconds))
-    # Siempre escribir en memoria (backup local)
-    _store[_mkey(key)] = (_now() + ttl, value)
-    if not _redis_enabled or _redis is None or ttl == 0:
+def _sizeof(value: Any, raw: Optional[bytes] = None) -> int:
+    """Tamaño aproximado en bytes: el pickle si ya existe, si no se serializa una vez."""
+    if raw is not None:
+        return len(raw)
+    try:
+        return len(_serialize(value))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def _sweep_loop(interval: int) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            _l1.sweep()
+        except Exception as e:  # pragma: no cover - defensivo
+            logger.warning("Error purgando cache L1", extra={"error": str(e)})
+
+
+def _ensure_sweeper() -> None:
+    """Arranca (una vez por proceso) el hilo que purga expiradas.
+
+    Se inicia perezosamente y se re-lanza tras un fork (gunicorn preload),
+    porque los hilos no sobreviven al fork.
+    """
+    global _sweeper_pid
+    if CACHE_L1_SWEEP_INTERVAL <= 0 or _sweeper_pid == os.getpid():
         return
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid():
+            return
+        t = threading.Thread(target=_sweep_loop, args=(CACHE_L1_SWEEP_INTERVAL,), name="cache-l1-sweeper", daemon=True)
+        t.start()
+        _sweeper_pid = os.getpid()
+
+
+def _l1_put(key: str, value: Any, ttl: float, raw: Optional[bytes] = None) -> None:
+    _ensure_sweeper()
+    _l1.set(key, value, ttl, _sizeof(value, raw))
+
+
+def _collect_l1_metrics() -> None:
+    for pool, st in _l1.stats().items():
+        tags = {"namespace": pool}
+        set_gauge("cache_l1_entries", st["entries"], tags=tags)
+        set_gauge("cache_l1_resident_bytes", st["bytes"], tags=tags)
+        set_gauge("cache_l1_max_bytes", st["max_bytes"], tags=tags)
+        set_counter("cache_l1_hits", st["hits"], tags=tags)
+        set_counter("cache_l1_misses", st["misses"], tags=tags)
+        set_counter("cache_l1_evictions", st["evictions"], tags=tags)
+        set_counter("cache_l1_expirations", st["expirations"], tags=tags)
+
+
+register_collector(_collect_l1_metrics)
+
+
+# --- Bus de invalidación (Redis pub/sub) ---
+# Cada escritura/borrado publica la invalidación y todos los workers la aplican
+# a su L1. Mientras el bus está suscrito, la L1 se lee antes que Redis y las
+# copias sombra viven CACHE_L1_COHERENT_TTL en vez de CACHE_L1_SHADOW_TTL.
+_BUS_CHANNEL = f"{_CACHE_PREFIX}invalidate"
+_BOOT_ID = uuid.uuid4().hex[:8]
+_bus_pid: Optional[int] = None
+_bus_ready = False
+_bus_lock = threading.Lock()
+# Generación de invalidaciones: evita guardar una sombra leída de Redis si
+# llegó una invalidación mientras la lectura estaba en vuelo.
+_inval_gen = 0
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{_BOOT_ID}"
+
+
+def _apply_invalidation(msg: dict) -> None:
+    global _inval_gen
+    _inval_gen += 1
+    op = msg.get("op")
+    if op == "keys":
+        for k in msg.get("keys") or []:
+            _l1.delete(str(k))
+    elif op == "prefix":
+        _l1.clear(msg.get("prefix") or None)
+    elif op == "all":
+        _l1.clear(None)
+
+
+def _bus_loop() -> None:
+    """Hilo suscriptor: aplica invalidaciones remotas a la L1 de este proceso."""
+    global _bus_ready
+    import redis  # type: ignore
+
+    me = _worker_id()
+    backoff = 1.0
+    while True:
+        pubsub = None
+        try:
+            client = redis.Redis.from_url(REDIS_URL, decode_responses=False, health_check_interval=15)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(_BUS_CHANNEL)
+            # Pudimos perder mensajes mientras no estábamos suscritos: empezar limpio
+            _apply_invalidation({"op": "all"})
+            _bus_ready = True
+            backoff = 1.0
+            while True:
+                msg = pubsub.get_message(timeout=1.0)
+                if not msg or msg.get("type") != "message":
+                    continue
+                try:
+                    data = json.loads(msg["data"])
+                except Exception:
+                    continue
+                if data.get("src") != me:
+                    _apply_invalidation(data)
+        except Exception as e:
+            if _bus_ready:
+                logger.warning("Bus de invalidación desconectado; L1 en modo sombra corta", extra={"error": str(e)})
+            _bus_ready = False
+            try:
+                if pubsub is not None:
+                    pubsub.close()
+            except Exception:
+                pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+def _ensure_bus() -> bool:
+    """Arranca el suscriptor (una vez por proceso) y devuelve si está listo."""
+    global _bus_pid, _bus_ready
+    if not (CACHE_INVALIDATION_BUS and _redis_enabled and _redis is not None):
+        return False
+    if _bus_pid != os.getpid():
+        with _bus_lock:
+            if _bus_pid != os.getpid():
+                _bus_ready = False
+                t = threading.Thread(target=_bus_loop, name="cache-invalidation-bus", daemon=True)
+                t.start()
+                _bus_pid = os.getpid()
+    return _bus_ready
+
+
+def _shadow_ttl() -> int:
+    return CACHE_L1_COHERENT_TTL if _bus_ready else CACHE_L1_SHADOW_TTL
+
+
+def _invalidation_payload(**fields: Any) -> bytes:
+    return json.dumps({"src": _worker_id(), **fields}).encode("utf-8")
+
+
+# Modo refresco (cache warmer): get_cache falla a propósito para forzar el
+# recálculo, salvo las claves ya reescritas dentro del mismo `scope`.
+_refresh_scope: ContextVar[Optional[Set[str]]] = ContextVar("cache_refresh_scope", default=None)
+
+
+@contextmanager
+def cache_refresh(scope: Optional[Set[str]] = None) -> Iterator[Set[str]]:
+    """Ignora las lecturas de get_cache en este contexto para reescribir las claves.
+
+    `scope` puede compartirse entre hilos de una misma pasada: una clave que ya
+    se reescribió en la pasada vuelve a leerse con normalidad, así las consultas
+    anidadas (p. ej. top movers sobre today-with-change) no repiten trabajo.
+    """
+    token = _refresh_scope.set(scope if scope is not None else set())
     try:
-        _redis.set(name=_mkey(key), value=_serialize(value), ex=ttl)
-    except Exception as e:  # Fallback silencioso a memoria
-        logger.warning("Error escribiendo en Redis cache", extra={"key": key, "error": str(e)})
+        yield cast(Set[str], _refresh_scope.get())
+    finally:
+        _refresh_scope.reset(token)
+
+
+def _bypassed(key: str) -> bool:
+    scope = _refresh_scope.get()
+    return scope is not None and key not in scope
+
+
+def _mark_refreshed(keys: Iterable[str]) -> None:
+    scope = _refresh_scope.get()
+    if scope is not None:
+        scope.update(keys)
+
+
+def _record(event: str, key: str, **tags: str) -> None:
+    """Contador por namespace (segmento antes del primer ':') para hit ratio."""
+    increment(f"cache_{event}", tags={"namespace": key_namespace(key), **tags})
+
+
+def _redis_done(op: str, t0: float) -> None:
+    dt = time.perf_counter() - t0
+    observe("cache_redis_latency_seconds", dt, tags={"op": op})
+    request_timing.add("redis", dt)
+    tracing.record_span(f"redis {op}", dt, attributes={"db.system": "redis", "db.operation": op})
+
+
+def _redis_failed(op: str, e: Exception, **extra: Any) -> None:
+    increment("cache_redis_errors", tags={"op": op, "kind": e.__class__.__name__})
+    logger.warning(f"Error en Redis cache ({op})", extra={"error": str(e), **extra})
+
+
+# --- Etiquetas (tags) ---
+# Cada etiqueta es un SET de Redis con las claves (sin prefijo) que la llevan.
+# El TTL del SET sigue al miembro más longevo (EXPIRE NX + EXPIRE GT; en Redis < 7
+# un script equivalente), así los SET se limpian solos cuando expiran sus claves.
+_EXTEND_TTL_LUA = (
+    "local t = redis.call('ttl', KEYS[1]) "
+    "if t >= 0 and t >= tonumber(ARGV[1]) then return 0 end "
+    "return redis.call('expire', KEYS[1], ARGV[1])"
+)
+_tag_expire_flags: Optional[bool] = None  # EXPIRE NX/GT requiere Redis >= 7
+_local_tags: Dict[str, Dict[str, float]] = {}  # sólo sin Redis: tag -> {clave: expira}
+_local_tags_guard = threading.Lock()
+
+
+def _tag_key(tag: str) -> str:
+    return _mkey(f"tag:{tag}")
+
+
+def _expire_flags_supported() -> bool:
+    global _tag_expire_flags
+    if _tag_expire_flags is None:
+        try:
+            major = int(str(_redis.info("server").get("redis_version", "0")).split(".")[0])  # type: ignore[union-attr]
+            _tag_expire_flags = major >= 7
+        except Exception:
+            _tag_expire_flags = False
+        if not _tag_expire_flags:
+            logger.info("Redis < 7: el TTL de los SET de etiquetas se extiende con un script Lua")
+    return _tag_expire_flags
+
+
+def _pipe_tags(pipe: Any, key: str, tags: List[str], ttl: int) -> None:
+    """Encola SADD + EXPIRE de cada etiqueta en un pipeline (sync o async)."""
+    if not tags:
+        return
+    flags = _expire_flags_supported()
+    for tag in tags:
+        tkey = _tag_key(tag)
+        pipe.sadd(tkey, key)
+        if flags:
+            pipe.expire(tkey, ttl, nx=True)
+            pipe.expire(tkey, ttl, gt=True)
+        else:
+            # Sólo extiende: un TTL corto no debe acortar el SET de claves más longevas
+            pipe.eval(_EXTEND_TTL_LUA, 1, tkey, ttl)
+
+
+def _local_tag(key: str, tags: List[str], ttl: int) -> None:
+    now = _now()
+    with _local_tags_guard:
+        for tag in tags:
+            members = _local_tags.setdefault(tag, {})
+            for k in [k for k, exp in members.items() if exp <= now]:
+                members.pop(k, None)
+            members[key] = now + ttl
+
+
+def _pop_local_tags(tags: Iterable[str]) -> Set[str]:
+    now = _now()
+    keys: Set[str] = set()
+    with _local_tags_guard:
+        for tag in tags:
+            keys.update(k for k, exp in (_local_tags.pop(tag, None) or {}).items() if exp > now)
+    return keys
+
+
+def _record_tag_invalidation(tags: List[str], keys: int) -> None:
+    for tag in tags:
+        increment("cache_tag_invalidations", tags={"tag": key_namespace(tag)})
+    increment("cache_tag_invalidated_keys", keys)
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Elimina exactamente las claves asociadas a las etiquetas (y los SET de etiquetas).
+
+    Dos round trips acotados al tamaño de las etiquetas: SMEMBERS en pipeline y
+    luego DEL + PUBLISH en otro pipeline. Devuelve cuántas claves se eliminaron.
+    """
+    tag_list = [t for t in dict.fromkeys(tags) if t]
+    if not tag_list:
+        return 0
+    keys = _pop_local_tags(tag_list)
+    if _redis_enabled and _redis is not None:
+        t0 = time.perf_counter()
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            for tag in tag_list:
+                pipe.smembers(_tag_key(tag))
+            for members in pipe.execute():
+                keys.update(m.decode() if isinstance(m, bytes) else str(m) for m in members or ())
+            pipe = _redis.pipeline(transaction=False)
+            pipe.delete(*[_tag_key(t) for t in tag_list], *[_mkey(k) for k in keys])
+            if keys and _ensure_bus():
+                pipe.publish(_BUS_CHANNEL, _invalidation_payload(op="keys", keys=sorted(keys)))
+            pipe.execute()
+            _redis_done("invalidate_tags", t0)
+        except Exception as e:
+            _redis_failed("invalidate_tags", e, tags=tag_list)
+    for k in keys:
+        _l1.delete(k)
+    _record_tag_invalidation(tag_list, len(keys))
+    return len(keys)
+
+
+def set_cache(key: str, value: Any, ttl_seconds: int, *, tags: Optional[Iterable[str]] = None) -> None:
+    """Guarda un valor en caché con TTL en segundos. Usa Redis si está disponible.
+
+    `tags` asocia la clave a etiquetas (p. ej. "user:12", "session:<sid>") que
+    luego se invalidan con `invalidate_tags` sin recorrer el keyspace.
+    """
+    ttl = max(0, int(ttl_seconds))
+    tag_list = list(dict.fromkeys(tags or ()))
+    raw: Optional[bytes] = None
+    if _redis_enabled and _redis is not None and ttl > 0:
+        t0 = time.perf_counter()
+        try:
+            raw = _serialize(value)
+            if tag_list or _ensure_bus():
+                # SET + SADD/EXPIRE de etiquetas + PUBLISH en un solo round trip
+                pipe = _redis.pipeline(transaction=False)
+                pipe.set(name=_mkey(key), value=raw, ex=ttl)
+                _pipe_tags(pipe, key, tag_list, ttl)
+                if _ensure_bus():
+                    pipe.publish(_BUS_CHANNEL, _invalidation_payload(op="keys", keys=[key]))
+                pipe.execute()
+            else:
+                _redis.set(name=_mkey(key), value=raw, ex=ttl)
+            _redis_done("set", t0)
+        except Exception as e:  # Fallback silencioso a memoria
+            _redis_failed("set", e, key=key)
+    if raw is not None:
+        observe("cache_value_bytes", len(raw), buckets=SIZE_BUCKETS, tags={"namespace": key_namespace(key)})
+    elif tag_list and ttl > 0:
+        _local_tag(key, tag_list, ttl)
+    # Siempre escribir en memoria (backup local)
+    _l1_put(key, value, ttl, raw)
+    _mark_refreshed((key,))
 
 
 def get_cache(key: str) -> Optional[Any]:
-    """Obtiene un valor del caché si no ha expirado. Prefiere Redis si está disponible."""
-    # Intentar Redis primero
+    """Obtiene un valor del caché si no ha expirado.
+
+    Con el bus de invalidación activo se sirve primero desde memoria; si no,
+    prefiere Redis y usa la memoria como respaldo.
+    """
+    if _bypassed(key):
+        return None
+    coherent = _ensure_bus()
+    if coherent:
+        found, value = _l1.get(key)
+        if found:
+            _record("hits", key, tier="l1")
+            return value
+    # Intentar Redis
     if _redis_enabled and _redis is not None:
+        t0 = time.perf_counter()
         try:
+            gen = _inval_gen
             raw = _redis.get(_mkey(key))
+            _redis_done("get", t0)
             if raw is not None:
                 try:
                     val = _deserialize(raw) # pyright: ignore[reportArgumentType]
-                    # Opcional: propagar a memoria para acceso local rápido
-                    _store[_mkey(key)] = (_now() + 60, val)  # pequeño TTL de sombra
+                    # Propagar a memoria para acceso local rápido (si no hubo invalidación en vuelo)
+                    if gen == _inval_gen:
+                        _l1_put(key, val, _shadow_ttl(), raw)
+                    _record("hits", key, tier="redis")
                     return val
                 except Exception:
                     # Si no se puede deserializar, borrar y seguir con memoria
+                    _record("corrupt", key)
                     _redis.delete(_mkey(key))
+            elif coherent:
+                _record("misses", key)
+                return None
         except Exception as e:
-            logger.warning("Error leyendo de Redis cache", extra={"key": key, "error": str(e)})
+            _redis_failed("get", e, key=key)
     # Fallback a memoria
-    item = _store.get(_mkey(key))
-    if not item:
-        return None
-    expires_at, value = item
-    if _now() >= expires_at:
-        _store.pop(_mkey(key), None)
-        return None
+    found, value = _l1.get(key)
+    _record("hits" if found else "misses", key, **({"tier": "l1"} if found else {}))
     return value
 
 
+def get_many(keys: Iterable[str]) -> Dict[str, Optional[Any]]:
+    """Lee varias claves con un único MGET. Devuelve {clave: valor o None}.
+
+    Con el bus activo, las claves presentes en L1 no viajan a Redis.
+    """
+    wanted = list(dict.fromkeys(keys))
+    out: Dict[str, Optional[Any]] = {k: None for k in wanted}
+    if not wanted:
+        return out
+    coherent = _ensure_bus()
+    pending: List[str] = []
+    for k in wanted:
+        if coherent:
+            found, value = _l1.get(k)
+            if found:
+                out[k] = value
+                _record("hits", k, tier="l1")
+                continue
+        pending.append(k)
+    if not pending:
+        return out
+    if _redis_enabled and _redis is not None:
+        t0 = time.perf_counter()
+        try:
+            gen = _inval_gen
+            raws = _redis.mget([_mkey(k) for k in pending])
+            _redis_done("mget", t0)
+            broken: List[str] = []
+            for k, raw in zip(pending, raws):
+                if raw is None:
+                    continue
+                try:
+                    val = _deserialize(raw)  # pyright: ignore[reportArgumentType]
+                except Exception:
+                    _record("corrupt", k)
+                    broken.append(_mkey(k))
+                    continue
+                out[k] = val
+                _record("hits", k, tier="redis")
+                if gen == _inval_gen:
+                    _l1_put(k, val, _shadow_ttl(), raw)
+            if broken:
+                _redis.delete(*broken)
+            pending = [k for k in pending if out[k] is None]
+            if coherent:
+                for k in pending:
+                    _record("misses", k)
+                return out
+        except Exception as e:
+            _redis_failed("mget", e, keys=len(pending))
+    # Fallback a memoria
+    for k in pending:
+        found, out[k] = _l1.get(k)
+        _record("hits" if found else "misses", k, **({"tier": "l1"} if found else {}))
+    return out
+
+
+def set_many(entries: Iterable[Tuple[str, Any, int]]) -> None:
+    """Guarda varias (clave, valor, ttl_segundos) en un único pipeline de Redis."""
+    items = [(k, v, max(0, int(ttl))) for k, v, ttl in entries]
+    if not items:
+        return
+    raws: Dict[str, bytes] = {}
+    if _redis_enabled and _redis is not None:
+        t0 = time.perf_counter()
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            for k, v, ttl in items:
+                if ttl <= 0:
+                    continue
+                raws[k] = _serialize(v)
+                pipe.set(name=_mkey(k), value=raws[k], ex=ttl)
+            if raws:
+                if _ensure_bus():
+                    pipe.publish(_BUS_CHANNEL, _invalidation_payload(op="keys", keys=list(raws)))
+                pipe.execute()
+                _redis_done("pipeline", t0)
+        except Exception as e:
+            _redis_failed("pipeline", e, keys=len(items))
+    for k, v, ttl in items:
+        raw = raws.get(k)
+        if raw is not None:
+            observe("cache_value_bytes", len(raw), buckets=SIZE_BUCKETS, tags={"namespace": key_namespace(k)})
+        _l1_put(k, v, ttl, raw)
+    _mark_refreshed(k for k, _v, _ttl in items)
+
+
+def delete_cache(key: str) -> None:
+    """Elimina una clave exacta en memoria y Redis, e invalida la L1 del resto de workers."""
+    _l1.delete(key)
+    if _redis_enabled and _redis is not None:
+        t0 = time.perf_counter()
+        try:
+            pipe = _redis.pipeline(transaction=False)
+            pipe.delete(_mkey(key))
+            if _ensure_bus():
+                pipe.publish(_BUS_CHANNEL, _invalidation_payload(op="keys", keys=[key]))
+            pipe.execute()
+            _redis_done("delete", t0)
+        except Exception as e:
+            _redis_failed("delete", e, key=key)
+
+
 def clear_cache(prefix: Optional[str] = None) -> None:
     """Limpia el caché completo o sólo claves con prefijo.
 
-    En Redis, usa SCAN para evitar bloquear.
+    En Redis, usa SCAN para evitar bloquear, y publica la invalidación por
+    prefijo para que el resto de workers limpie su L1. Su coste crece con el
+    tamaño total de Redis: en rutas calientes usar `invalidate_tags`.
     """
     p = _mkey(prefix or "")
     # Limpiar memoria
-    if not prefix:
-        for k in list(_store.keys()):
-            if k.startswith(_CACHE_PREFIX):
-                _store.pop(k, None)
-    else:
-        for k in list(_store.keys()):
-            if k.startswith(p):
-                _store.pop(k, None)
+    _l1.clear(prefix or None)
     # Limpiar Redis
     if _redis_enabled and _redis is not None:
+        t0 = time.perf_counter()
         try:
             pattern = f"{p}*" if prefix else f"{_CACHE_PREFIX}*"
             # scan_iter es lazy y seguro
             keys = list(_redis.scan_iter(match=pattern, count=500))
             if keys:
                 _redis.delete(*keys)
+            if _ensure_bus():
+                _redis.publish(_BUS_CHANNEL, _invalidation_payload(op="prefix" if prefix else "all", prefix=prefix))
+            _redis_done("scan_delete", t0)
         except Exception as e:
-            logger.warning("Error limpiando Redis cache", extra={"prefix": prefix, "error": str(e)})
+            _redis_failed("scan_delete", e, prefix=prefix)
+
+
+def record_backup_fallback(key: str, served: bool) -> None:
+    """Registra que el origen falló y se recurrió a la copia de respaldo de `key`.
+
+    `served` indica si había respaldo y se devolvió un valor stale.
+    """
+    _record("backup_fallbacks", key)
+    if served:
+        _record("stale_served", key)
+
+
+# --- API asíncrona (redis.asyncio) ---
+# Para endpoints `async def`: el cliente síncrono bloquearía el event loop
+# durante cada round trip. Un pool por event loop (sus conexiones sólo sirven en
+# ese loop); al recolectarse el loop se libera su cliente.
+_aredis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_aredis_pid: Optional[int] = None
+
+
+def _get_aredis():
+    """Cliente redis.asyncio del event loop en curso; se recrea tras fork."""
+    global _aredis_pid
+    if not (_redis_enabled and REDIS_URL):
+        return None
+    loop = asyncio.get_running_loop()
+    if _aredis_pid != os.getpid():
+        # Los pools heredados del padre comparten sockets con él: no se reutilizan
+        _aredis_clients.clear()
+        _aredis_pid = os.getpid()
+    client = _aredis_clients.get(loop)
+    if client is None:
+        try:
+            import redis.asyncio as aioredis  # type: ignore
+
+            pool = aioredis.ConnectionPool.from_url(REDIS_URL, max_connections=max(1, CACHE_REDIS_ASYNC_MAX_CONNECTIONS))
+            client = aioredis.Redis(connection_pool=pool, decode_responses=False)
+        except Exception as e:
+            logger.warning("No se pudo iniciar redis.asyncio; se usa la caché en memoria", extra={"error": str(e)})
+            return None
+        # Los loops ya cerrados no volverán a usar su cliente
+        for old in [lp for lp in list(_aredis_clients.keys()) if lp.is_closed()]:
+            _aredis_clients.pop(old, None)
+        _aredis_clients[loop] = client
+    return client
+
+
+async def aget_cache(key: str) -> Optional[Any]:
+    """Equivalente asíncrono de get_cache (misma semántica L1/Redis/fallback)."""
+    if _bypassed(key):
+        return None
+    coherent = _ensure_bus()
+    if coherent:
+        found, value = _l1.get(key)
+        if found:
+            _record("hits", key, tier="l1")
+            return value
+    client = _get_aredis()
+    if client is not None:
+        t0 = time.perf_counter()
+        try:
+            gen = _inval_gen
+            raw = await client.get(_mkey(key))
+            _redis_done("aget", t0)
+            if raw is not None:
+                try:
+                    val = _deserialize(raw)
+                    if gen == _inval_gen:
+                        _l1_put(key, val, _shadow_ttl(), raw)
+                    _record("hits", key, tier="redis")
+                    return val
+                except Exception:
+                    _record("corrupt", key)
+                    await client.delete(_mkey(key))
+            elif coherent:
+                _record("misses", key)
+                return None
+        except Exception as e:
+            _redis_failed("aget", e, key=key)
+    found, value = _l1.get(key)
+    _record("hits" if found else "misses", key, **({"tier": "l1"} if found else {}))
+    return value
+
+
+async def aset_cache(
+    key: str,
+    value: Any,
+    ttl_seconds: int,
+    *,
+    nx: bool = False,
+    tags: Optional[Iterable[str]] = None,
+) -> bool:
+    """Equivalente asíncrono de set_cache.
+
+    Con `nx=True` sólo escribe si la clave no existe (SET NX atómico en Redis),
+    útil para deduplicar. Devuelve si se escribió.
+    """
+    ttl = max(0, int(ttl_seconds))
+    tag_list = list(dict.fromkeys(tags or ()))
+    raw: Optional[bytes] = None
+    client = _get_aredis() if ttl > 0 else None
+    if client is not None:
+        t0 = time.perf_counter()
+        try:
+            raw = _serialize(value)
+            pipe = client.pipeline(transaction=False)
+            pipe.set(name=_mkey(key), value=raw, ex=ttl, nx=nx)
+            _pipe_tags(pipe, key, tag_list, ttl)
+            # Con NX la clave no existía: no hay L1 remota que invalidar
+            if not nx and _ensure_bus():
+                pipe.publish(_BUS_CHANNEL, _invalidation_payload(op="keys", keys=[key]))
+            written = (await pipe.execute())[0]
+            _redis_done("apipeline", t0)
+            if nx and not written:
+                return False
+        except Exception as e:
+            _redis_failed("apipeline", e, key=key)
+            raw = None
+    if nx and raw is None and _l1.get(key)[0]:
+        return False
+    if raw is not None:
+        observe("cache_value_bytes", len(raw), buckets=SIZE_BUCKETS, tags={"namespace": key_namespace(key)})
+    elif tag_list and ttl > 0:
+        _local_tag(key, tag_list, ttl)
+    _l1_put(key, value, ttl, raw)
+    _mark_refreshed((key,))
+    return True
+
+
+async def adelete_cache(key: str) -> None:
+    """Equivalente asíncrono de delete_cache."""
+    _l1.delete(key)
+    client = _get_aredis()
+    if client is not None:
+        t0 = time.perf_counter()
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(_mkey(key))
+            if _ensure_bus():
+                pipe.publish(_BUS_CHANNEL, _invalidation_payload(op="keys", keys=[key]))
+            await pipe.execute()
+            _redis_done("adelete", t0)
+        except Exception as e:
+            _redis_failed("adelete", e, key=key)
+
+
+async def aclose_cache() -> None:
+    """Cierra el pool asíncrono del event loop en curso (shutdown del lifespan)."""
+    client = _aredis_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+_RELEASE_LUA = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+_local_locks: Dict[str, Tuple[str, float]] = {}
+_local_locks_guard = threading.Lock()
+
+
+def acquire_lock(name: str, ttl_seconds: int) -> Optional[str]:
+    """Lock de clúster con SET NX EX. Devuelve un token, o None si otro proceso lo tiene.
+
+    Sin Redis (o si Redis falla) el lock sólo es válido dentro de este proceso.
+    """
+    key = f"lock:{name}"
+    token = uuid.uuid4().hex
+    ttl = max(1, int(ttl_seconds))
+    if _redis_enabled and _redis is not None:
+        try:
+            return token if _redis.set(_mkey(key), token.encode(), nx=True, ex=ttl) else None
+        except Exception as e:
+            _redis_failed("lock", e, key=key)
+    with _local_locks_guard:
+        held = _local_locks.get(key)
+        if held is not None and held[1] > _now():
+            return None
+        _local_locks[key] = (token, _now() + ttl)
+        return token
+
+
+def release_lock(name: str, token: str) -> None:
+    """Libera el lock sólo si sigue siendo nuestro (no pisa a quien lo tomó tras expirar)."""
+    key = f"lock:{name}"
+    with _local_locks_guard:
+        held = _local_locks.get(key)
+        if held is not None and held[0] == token:
+            _local_locks.pop(key, None)
+    if _redis_enabled and _redis is not None:
+        try:
+            _redis.eval(_RELEASE_LUA, 1, _mkey(key), token.encode())
+        except Exception:
+            try:
+                # Sin scripting: comparar y borrar (ventana de carrera mínima)
+                if _redis.get(_mkey(key)) == token.encode():
+                    _redis.delete(_mkey(key))
+            except Exception as e:
+                _redis_failed("unlock", e, key=key)
 
 
 def cacheable(ttl_seconds: int = 60):
@@ -150,3 +841,13 @@ def cacheable(ttl_seconds: int = 60):
 def is_redis_enabled() -> bool:
     """Indica si el backend Redis está activo."""
     return bool(_redis_enabled and _redis is not None)
+
+
+def is_invalidation_bus_ready() -> bool:
+    """Indica si este worker está suscrito al bus de invalidación (L1 coherente)."""
+    return bool(_bus_ready and _bus_pid == os.getpid())
+
+
+def l1_stats() -> Dict[str, Dict[str, int]]:
+    """Estadísticas de la caché L1 de este worker, por pool/namespace."""
+    return _l1.stats()
@@ -0,0 +1,157 @@
+"""
+Caché L1 en memoria, acotada por número de entradas y por bytes.
+
+- LRU por namespace (segmento de la clave antes del primer ':').
+- TTL por entrada; las expiradas se purgan al leerlas o con `sweep()`.
+- Presupuestos independientes por namespace (p. ej. argus, session, rbac) para
+  que un namespace ruidoso no desaloje a los demás. Los namespaces sin
+  presupuesto propio comparten el pool "default".
+
+No depende de Redis; `cache_adapter` la usa como primer nivel.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_POOL = "default"
+
+# (expires_at, value, size_bytes)
+_Entry = Tuple[float, Any, int]
+
+
+def key_namespace(key: str) -> str:
+    """Segmento de la clave antes del primer ':' (clave sin prefijo de app)."""
+    head, sep, _ = key.partition(":")
+    return head if sep else DEFAULT_POOL
+
+
+class _Pool:
+    __slots__ = ("name", "max_entries", "max_bytes", "items", "bytes", "hits", "misses", "evictions", "expirations")
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int) -> None:
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.items: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+
+class BoundedTTLCache:
+    """Caché LRU+TTL thread-safe con límite de entradas y bytes por pool."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        max_bytes: int,
+        budgets: Optional[Dict[str, Tuple[int, int]]] = None,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _Pool] = {DEFAULT_POOL: _Pool(DEFAULT_POOL, max_entries, max_bytes)}
+        for ns, (entries, nbytes) in (budgets or {}).items():
+            self._pools[ns] = _Pool(ns, entries, nbytes)
+
+    # --- helpers ---
+    def pool_name(self, key: str) -> str:
+        ns = key_namespace(key)
+        return ns if ns in self._pools else DEFAULT_POOL
+
+    def _pool(self, key: str) -> _Pool:
+        return self._pools[self.pool_name(key)]
+
+    @staticmethod
+    def _drop(pool: _Pool, key: str) -> None:
+        entry = pool.items.pop(key, None)
+        if entry is not None:
+            pool.bytes -= entry[2]
+
+    # --- API ---
+    def get(self, key: str, now: Optional[float] = None) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, valor). Marca la entrada como usada recientemente."""
+        now = time.time() if now is None else now
+        with self._lock:
+            pool = self._pool(key)
+            entry = pool.items.get(key)
+            if entry is None:
+                pool.misses += 1
+                return False, None
+            if now >= entry[0]:
+                self._drop(pool, key)
+                pool.expirations += 1
+                pool.misses += 1
+                return False, None
+            pool.items.move_to_end(key)
+            pool.hits += 1
+            return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float, size: int, now: Optional[float] = None) -> bool:
+        """Inserta/reemplaza una entrada. Devuelve False si excede el presupuesto del pool."""
+        now = time.time() if now is None else now
+        size = max(0, int(size))
+        with self._lock:
+            pool = self._pool(key)
+            self._drop(pool, key)
+            if ttl_seconds <= 0 or size > pool.max_bytes:
+                return False
+            pool.items[key] = (now + float(ttl_seconds), value, size)
+            pool.bytes += size
+            while pool.items and (len(pool.items) > pool.max_entries or pool.bytes > pool.max_bytes):
+                _k, (_exp, _v, sz) = pool.items.popitem(last=False)
+                pool.bytes -= sz
+                pool.evictions += 1
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._drop(self._pool(key), key)
+
+    def clear(self, prefix: Optional[str] = None) -> int:
+        """Elimina todo o sólo las claves con prefijo. Devuelve cuántas se eliminaron."""
+        removed = 0
+        with self._lock:
+            for pool in self._pools.values():
+                if not prefix:
+                    removed += len(pool.items)
+                    pool.items.clear()
+                    pool.bytes = 0
+                    continue
+                for k in [k for k in pool.items if k.startswith(prefix)]:
+                    self._drop(pool, k)
+                    removed += 1
+        return removed
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Purga entradas expiradas de todos los pools. Devuelve cuántas se purgaron."""
+        now = time.time() if now is None else now
+        purged = 0
+        with self._lock:
+            for pool in self._pools.values():
+                expired = [k for k, (exp, _v, _s) in pool.items.items() if now >= exp]
+                for k in expired:
+                    self._drop(pool, k)
+                pool.expirations += len(expired)
+                purged += len(expired)
+        return purged
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                name: {
+                    "entries": len(p.items),
+                    "bytes": p.bytes,
+                    "max_entries": p.max_entries,
+                    "max_bytes": p.max_bytes,
+                    "hits": p.hits,
+                    "misses": p.misses,
+                    "evictions": p.evictions,
+                    "expirations": p.expirations,
+                }
+                for name, p in self._pools.items()
+            }
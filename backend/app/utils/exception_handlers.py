@@ -25,7 +25,11 @@ def add_global_exception_handler(app: FastAPI) -> None:
             "message": str(exc),
             "details": exc.details,
         }
-        return JSONResponse(status_code=exc.status_code, content=payload)
+        headers = None
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            headers = {"Retry-After": str(max(1, int(round(retry_after))))}
+        return JSONResponse(status_code=exc.status_code, content=payload, headers=headers)
 
     # Manejo genérico para otras excepciones no controladas
     @app.exception_handler(Exception)
@@ -34,6 +34,14 @@ class OdooServiceError(ExternalServiceError):
         super().__init__(message, service="odoo", code=code, status_code=status_code, details=details)
 
 
+class OdooUnavailableError(OdooServiceError):
+    """Odoo rechazado localmente (circuito abierto o límite de concurrencia): no se llegó a llamar."""
+
+    def __init__(self, message: str, *, code: str = "odoo_unavailable", retry_after: float | None = None, details: Optional[dict[str, Any]] = None):
+        super().__init__(message, code=code, status_code=503, details=details)
+        self.retry_after = retry_after
+
+
 class PlaidServiceError(ExternalServiceError):
     def __init__(self, message: str, *, code: str = "plaid_error", status_code: int = 502, details: Optional[dict[str, Any]] = None):
         super().__init__(message, service="plaid", code=code, status_code=status_code, details=details)
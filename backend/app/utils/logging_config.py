@@ -1,48 +1,223 @@
-
 """
 Configuración de logging para la aplicación.
+
+Con LOG_ASYNC (por defecto) los loggers no escriben en el hilo que loguea: un
+`QueueHandler` encola el registro y un `QueueListener` (hilo propio) lo formatea
+y lo escribe en stdout/stderr. En el hilo de la request sólo queda el muestreo
+(LOG_SAMPLING), `getMessage()` y sellar el `correlation_id` de la request, que
+RequestIdMiddleware deja en un ContextVar.
+
+- Con la cola llena (LOG_QUEUE_SIZE) el registro se descarta y se cuenta en
+  `log_dropped`: el logging no debe frenar las requests.
+- El muestreo sólo aplica a DEBUG/INFO; WARNING y superiores pasan siempre.
 """
+import atexit
+import json
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from app.config.settings import LOG_ASYNC, LOG_QUEUE_SIZE, LOG_SAMPLING
+from app.utils.metrics import increment
+
+# Correlation id de la request en curso (lo fija RequestIdMiddleware)
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s - %(message)s"
+ACCESS_FORMAT = '%(asctime)s %(levelname)s %(name)s - "%(message)s"'
+_ACCESS_LOGGERS = ("uvicorn.access", "gunicorn.access")
+
+# Atributos propios de LogRecord: todo lo demás en el registro son extras
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "correlation_id",
+    "taskName",
+}
+_encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
 
 class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, msg, correlation_id, extras y exc."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._ts_cache = (-1, "")
+
+    def _ts(self, created: float) -> str:
+        # strftime una vez por segundo: el formato no lleva fracción
+        sec = int(created)
+        cached_sec, text = self._ts_cache
+        if cached_sec != sec:
+            text = time.strftime("%Y-%m-%dT%H:%M:%S%z", self.converter(sec))
+            self._ts_cache = (sec, text)
+        return text
+
     def format(self, record: logging.LogRecord) -> str:  # type: ignore[override]
-        import json
         payload = {
-            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "ts": self._ts(record.created),
             "level": record.levelname,
             "logger": record.name,
             "msg": record.getMessage(),
         }
-        # Extras comunes
-        cid = getattr(record, "correlation_id", None)
+        cid = getattr(record, "correlation_id", None) or correlation_id.get()
         if cid:
             payload["correlation_id"] = cid
-        return json.dumps(payload, ensure_ascii=False)
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        try:
+            return _encode(payload)
+        except ValueError:
+            # Referencias circulares en algún extra
+            return _encode({k: v if isinstance(v, (str, int, float, bool, type(None))) else repr(v) for k, v in payload.items()})
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar una fracción de los DEBUG/INFO de los loggers configurados.
+
+    `rates` es {prefijo de logger: fracción}; gana el prefijo más largo que coincide.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None) -> None:
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._by_name: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            pass
+        rate, best = None, -1
+        for prefix, r in self.rates.items():
+            if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                rate, best = r, len(prefix)
+        self._by_name[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:  # type: ignore[override]
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1.0 or (rate > 0.0 and random.random() < rate):
+            return True
+        increment("log_sampled_out", tags={"logger": record.name})
+        return False
+
+
+def parse_sampling(entries: List[str]) -> Dict[str, float]:
+    """"app.audit=0.1" -> {"app.audit": 0.1}; las entradas inválidas se ignoran."""
+    rates: Dict[str, float] = {}
+    for entry in entries:
+        name, _, raw = entry.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(raw)))
+        except ValueError:
+            continue
+    return rates
+
+
+class _LoggerFilter(logging.Filter):
+    """Reparte en el listener: logs de acceso a un handler, el resto al otro."""
+
+    def __init__(self, access: bool) -> None:
+        super().__init__()
+        self.access = access
+
+    def filter(self, record: logging.LogRecord) -> bool:  # type: ignore[override]
+        return record.name.startswith(_ACCESS_LOGGERS) == self.access
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Encola el registro sin formatear; con la cola llena lo descarta y lo cuenta."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Congela el mensaje (los args pueden mutar después) y el contexto de la request;
+        # exc_info se conserva y el traceback se formatea en el listener
+        record.msg = record.getMessage()
+        record.args = None
+        if getattr(record, "correlation_id", None) is None:
+            cid = correlation_id.get()
+            if cid is not None:
+                record.correlation_id = cid
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            increment("log_dropped")
+
+
+def stop_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor (al salir o al reconfigurar)."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def _stream_handler(formatter: logging.Formatter, access: bool) -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(formatter)
+    handler.addFilter(_LoggerFilter(access))
+    return handler
+
 
 def setup_logging(level: str = "INFO") -> None:
     """Configura el logging global de la app y servidores ASGI."""
+    global _listener
     fmt = os.getenv("LOG_FORMAT", "text").lower()
-    is_json = fmt == "json"
+    formatter_cls = JsonFormatter if fmt == "json" else logging.Formatter
+    # Al reconfigurar, el listener anterior se detiene cuando sus handlers ya no están en uso
+    previous, _listener = _listener, None
+
+    if LOG_ASYNC:
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(max(1, LOG_QUEUE_SIZE))
+        _listener = logging.handlers.QueueListener(
+            log_queue,
+            _stream_handler(formatter_cls(DEFAULT_FORMAT), access=False),
+            _stream_handler(formatter_cls(ACCESS_FORMAT), access=True),
+            respect_handler_level=True,
+        )
+        handlers = {
+            "default": {"()": _QueueHandler, "queue": log_queue, "filters": ["sampling"]},
+            "access": {"()": _QueueHandler, "queue": log_queue, "filters": ["sampling"]},
+        }
+    else:
+        handlers = {
+            "default": {"class": "logging.StreamHandler", "formatter": "default", "filters": ["sampling"]},
+            "access": {"class": "logging.StreamHandler", "formatter": "access", "filters": ["sampling"]},
+        }
+
     logging.config.dictConfig(
         {
             "version": 1,
             "disable_existing_loggers": False,
             "formatters": {
-                "default": {
-                    "()": JsonFormatter if is_json else logging.Formatter,
-                    "format": "%(asctime)s %(levelname)s %(name)s - %(message)s",
-                },
-                "access": {
-                    "()": JsonFormatter if is_json else logging.Formatter,
-                    "format": '%(asctime)s %(levelname)s %(name)s - "%(message)s"',
-                },
+                "default": {"()": formatter_cls, "format": DEFAULT_FORMAT},
+                "access": {"()": formatter_cls, "format": ACCESS_FORMAT},
             },
-            "handlers": {
-                "default": {"class": "logging.StreamHandler", "formatter": "default"},
-                "access": {"class": "logging.StreamHandler", "formatter": "access"},
+            "filters": {
+                "sampling": {"()": SamplingFilter, "rates": parse_sampling(LOG_SAMPLING)},
             },
+            "handlers": handlers,
             "loggers": {
                 "": {"handlers": ["default"], "level": level},
                 "uvicorn": {"handlers": ["default"], "level": level, "propagate": False},
@@ -58,3 +233,10 @@ def setup_logging(level: str = "INFO") -> None:
             },
         }
     )
+    if _listener is not None:
+        _listener.start()
+    if previous is not None:
+        previous.stop()
+
+
+atexit.register(stop_logging)
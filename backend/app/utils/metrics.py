@@ -1,51 +1,224 @@
 """
-Métricas ligeras en memoria (counters/durations) con logging opcional.
+Métricas ligeras en memoria (counters/durations/gauges/histogramas) con logging opcional.
 
 Evita dependencias externas. Para producción, puede reemplazarse por Prometheus/StatsD.
+
+- `record_duration`/`Timer` y `observe` guardan histogramas reales (conteo por bucket,
+  suma y n), exportados en formato histogram de Prometheus. Los buckets salen de
+  METRICS_LATENCY_BUCKETS, de METRICS_HISTOGRAM_BUCKETS (por métrica) o de
+  `set_buckets`; se fijan por nombre en la primera observación.
+- Registro con lock striping: cada hilo escribe en una de METRICS_LOCK_STRIPES
+  franjas con su propio lock, así los caminos calientes (Odoo, caché) no compiten
+  por un único lock global. Exportar fusiona las franjas.
+- Gauges, `set_counter` y collectors (valores de baja frecuencia) usan `_lock`.
 """
 from __future__ import annotations
 
-from typing import Dict, Tuple, Optional
+from bisect import bisect_left
+from itertools import count
+from typing import Callable, Dict, List, Tuple, Optional, Sequence
 import threading
 import time
 import logging
 
+from app.config.settings import METRICS_LATENCY_BUCKETS, METRICS_HISTOGRAM_BUCKETS, METRICS_LOCK_STRIPES
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
 _lock = threading.Lock()
-_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
-_timings: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_gauges: Dict[_Key, float] = {}
+# Valores absolutos publicados por collectors (`set_counter`); prevalecen al exportar
+_counter_values: Dict[_Key, int] = {}
+# Límites superiores de los buckets por nombre de histograma/duración
+_bounds: Dict[str, Tuple[float, ...]] = {}
+# Callbacks que publican valores mantenidos fuera de este módulo (p. ej. stats de caché)
+_collectors: List[Callable[[], None]] = []
 logger = logging.getLogger("app.metrics")
 
 
+class _Stripe:
+    """Franja de registro: counters e histogramas de los hilos asignados a ella."""
+
+    __slots__ = ("lock", "counters", "durations", "histograms")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counters: Dict[_Key, int] = {}
+        # key -> [conteos por bucket (+Inf al final), suma, n]
+        self.durations: Dict[_Key, list] = {}
+        self.histograms: Dict[_Key, list] = {}
+
+
+_stripes: List[_Stripe] = [_Stripe() for _ in range(max(1, METRICS_LOCK_STRIPES))]
+_local = threading.local()
+_next_stripe = count()
+
+
+def _stripe() -> _Stripe:
+    # Asignación round-robin por hilo (los idents de hilo no se reparten bien con módulo)
+    try:
+        return _local.stripe
+    except AttributeError:
+        s = _local.stripe = _stripes[next(_next_stripe) % len(_stripes)]
+        return s
+
+
 def _normalize_tags(tags: Optional[dict] = None) -> Tuple[Tuple[str, str], ...]:
     if not tags:
         return tuple()
     return tuple(sorted((str(k), str(v)) for k, v in tags.items()))
 
 
+def _parse_bounds(values: Sequence) -> Tuple[float, ...]:
+    return tuple(sorted({float(b) for b in values}))
+
+
+# Buckets por defecto (segundos) para latencias; estilo Prometheus
+LATENCY_BUCKETS: Tuple[float, ...] = _parse_bounds(METRICS_LATENCY_BUCKETS) or (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Buckets por defecto (bytes) para tamaños de payload
+SIZE_BUCKETS: Tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def set_buckets(name: str, buckets: Sequence[float]) -> None:
+    """Fija los buckets de un histograma o duración antes de su primera observación."""
+    bounds = _parse_bounds(buckets)
+    if not bounds:
+        raise ValueError(f"buckets vacíos para {name}")
+    with _lock:
+        current = _bounds.get(name)
+        if current is not None and current != bounds:
+            logger.warning("metric.buckets_already_set", extra={"metric": name, "buckets": list(current)})
+            return
+        _bounds[name] = bounds
+
+
+def _resolve_bounds(name: str, buckets: Optional[Sequence[float]]) -> Tuple[float, ...]:
+    bounds = _bounds.get(name)
+    if bounds is None:
+        with _lock:
+            bounds = _bounds.get(name)
+            if bounds is None:
+                bounds = _bounds[name] = _parse_bounds(buckets) if buckets else LATENCY_BUCKETS
+    return bounds
+
+
+def _load_configured_buckets() -> None:
+    for entry in METRICS_HISTOGRAM_BUCKETS:
+        name, _, raw = entry.partition("=")
+        try:
+            set_buckets(name.strip(), [b for b in raw.split("|") if b.strip()])
+        except ValueError as e:
+            logger.warning("metric.invalid_buckets", extra={"entry": entry, "error": str(e)})
+
+
+_load_configured_buckets()
+
+
 def increment(name: str, value: int = 1, *, tags: Optional[dict] = None) -> None:
     key = (name, _normalize_tags(tags))
-    with _lock:
-        _counters[key] = _counters.get(key, 0) + int(value)
+    s = _stripe()
+    with s.lock:
+        s.counters[key] = s.counters.get(key, 0) + int(value)
     # Log a nivel debug para no inundar
     logger.debug("metric.increment", extra={"metric": name, "value": value, "tags": dict(tags or {})})
 
 
-def record_duration(name: str, seconds: float, *, tags: Optional[dict] = None) -> None:
+def _record(table: Dict[_Key, list], lock: threading.Lock, key: _Key, bounds: Tuple[float, ...], v: float) -> None:
+    with lock:
+        h = table.get(key)
+        if h is None:
+            h = table[key] = [[0] * (len(bounds) + 1), 0.0, 0]
+        h[0][bisect_left(bounds, v)] += 1
+        h[1] += v
+        h[2] += 1
+
+
+def record_duration(
+    name: str, seconds: float, *, tags: Optional[dict] = None, buckets: Optional[Sequence[float]] = None
+) -> None:
+    """Registra una duración (segundos) en el histograma `<name>_seconds`."""
+    s = _stripe()
+    _record(s.durations, s.lock, (name, _normalize_tags(tags)), _resolve_bounds(name, buckets), float(seconds))
+    logger.debug("metric.duration", extra={"metric": name, "seconds": seconds, "tags": dict(tags or {})})
+
+
+def observe(name: str, value: float, *, buckets: Optional[Sequence[float]] = None, tags: Optional[dict] = None) -> None:
+    """Registra una observación en un histograma (acumulativo al exportar).
+
+    Los buckets se fijan por nombre en la primera observación (o con `set_buckets`).
+    """
+    s = _stripe()
+    _record(s.histograms, s.lock, (name, _normalize_tags(tags)), _resolve_bounds(name, buckets), float(value))
+
+
+def histogram_quantile(buckets: Sequence[float], counts: Sequence[int], q: float) -> Optional[float]:
+    """Cuantil aproximado (interpolación lineal dentro del bucket, como Prometheus).
+
+    `counts` son conteos no acumulados con el bucket +Inf al final; si el cuantil
+    cae en +Inf se devuelve el último límite finito.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, c in enumerate(counts):
+        if seen + c >= rank and c:
+            if i >= len(buckets):
+                return float(buckets[-1]) if buckets else None
+            lower = float(buckets[i - 1]) if i > 0 else 0.0
+            return lower + (float(buckets[i]) - lower) * ((rank - seen) / c)
+        seen += c
+    return float(buckets[-1]) if buckets else None
+
+
+def set_gauge(name: str, value: float, *, tags: Optional[dict] = None) -> None:
+    """Fija el valor actual de un gauge (bytes residentes, entradas, etc.)."""
     key = (name, _normalize_tags(tags))
     with _lock:
-        _timings[key] = _timings.get(key, 0.0) + float(seconds)
-    logger.debug("metric.duration", extra={"metric": name, "seconds": seconds, "tags": dict(tags or {})})
+        _gauges[key] = float(value)
+
+
+def set_counter(name: str, value: int, *, tags: Optional[dict] = None) -> None:
+    """Fija el valor absoluto de un contador que se lleva fuera de este módulo.
+
+    Pensado para collectors que ya acumulan sus propios totales monotónicos.
+    """
+    key = (name, _normalize_tags(tags))
+    with _lock:
+        _counter_values[key] = int(value)
+
+
+def register_collector(fn: Callable[[], None]) -> None:
+    """Registra un callback que se ejecuta antes de exportar métricas."""
+    with _lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+
+
+def collect() -> None:
+    """Ejecuta los collectors registrados; un fallo en uno no afecta al resto."""
+    with _lock:
+        fns = list(_collectors)
+    for fn in fns:
+        try:
+            fn()
+        except Exception as e:
+            logger.warning("metric.collector_failed", extra={"collector": getattr(fn, "__name__", str(fn)), "error": str(e)})
 
 
 class Timer:
-    def __init__(self, name: str, *, tags: Optional[dict] = None):
+    def __init__(self, name: str, *, tags: Optional[dict] = None, buckets: Optional[Sequence[float]] = None):
         self.name = name
         self.tags = tags or {}
+        self.buckets = buckets
         self._t0 = time.perf_counter()
 
     def stop(self) -> float:
         dt = time.perf_counter() - self._t0
-        record_duration(self.name, dt, tags=self.tags)
+        record_duration(self.name, dt, tags=self.tags, buckets=self.buckets)
         return dt
 
     def __enter__(self):
@@ -56,15 +229,73 @@ class Timer:
         return False
 
 
+# --- Exportación (fusiona las franjas) ---
+
+def _merged_counters() -> Dict[_Key, int]:
+    out: Dict[_Key, int] = {}
+    for s in _stripes:
+        with s.lock:
+            items = list(s.counters.items())
+        for k, v in items:
+            out[k] = out.get(k, 0) + v
+    with _lock:
+        out.update(_counter_values)
+    return out
+
+
+def _merged_histograms(attr: str) -> Dict[_Key, tuple]:
+    merged: Dict[_Key, list] = {}
+    for s in _stripes:
+        with s.lock:
+            items = [(k, list(h[0]), h[1], h[2]) for k, h in getattr(s, attr).items()]
+        for k, counts, total, n in items:
+            m = merged.get(k)
+            if m is None:
+                merged[k] = [counts, total, n]
+            else:
+                m[0] = [a + b for a, b in zip(m[0], counts)]
+                m[1] += total
+                m[2] += n
+    return {k: (_bounds[k[0]], m[0], m[1], m[2]) for k, m in merged.items()}
+
+
+def _quantiles(bounds: Sequence[float], counts: Sequence[int]) -> dict:
+    return {f"p{int(q * 100)}": histogram_quantile(bounds, counts, q) for q in (0.5, 0.95, 0.99)}
+
+
 def snapshot() -> dict:
-    """Devuelve una copia simple de counters y timings para depuración."""
+    """Devuelve una copia simple de counters, timings y gauges para depuración."""
+    collect()
+    durations = _merged_histograms("durations")
     with _lock:
-        return {
-            "counters": {str(k): v for k, v in _counters.items()},
-            "timings": {str(k): v for k, v in _timings.items()},
-        }
+        gauges = {str(k): v for k, v in _gauges.items()}
+    return {
+        "counters": {str(k): v for k, v in _merged_counters().items()},
+        "timings": {
+            str(k): {"count": n, "sum": total, **_quantiles(bounds, counts)}
+            for k, (bounds, counts, total, n) in durations.items()
+        },
+        "gauges": gauges,
+        "histograms": {str(k): {"count": h[3], "sum": h[2]} for k, h in _merged_histograms("histograms").items()},
+    }
+
 
 def export_raw():
-    """Devuelve copias inmutables (shallow) para exportadores de métricas."""
+    """Devuelve copias inmutables (shallow) para exportadores: (counters, suma de segundos por duración)."""
+    return _merged_counters(), {k: total for k, (_b, _c, total, _n) in _merged_histograms("durations").items()}
+
+
+def export_gauges():
+    """Copia de los gauges actuales (los collectors deben ejecutarse antes con `collect()`)."""
     with _lock:
-        return dict(_counters), dict(_timings)
+        return dict(_gauges)
+
+
+def export_durations():
+    """Copia de las duraciones: {key: (buckets, conteos_no_acumulados, suma_segundos, n)}."""
+    return _merged_histograms("durations")
+
+
+def export_histograms():
+    """Copia de los histogramas: {key: (buckets, conteos_no_acumulados, suma, n)}."""
+    return _merged_histograms("histograms")
@@ -1,3 +1,5 @@
+import os
+
 bind = "0.0.0.0:8000"
 workers = 2
 worker_class = "uvicorn.workers.UvicornWorker"
@@ -6,4 +8,20 @@ accesslog = "-"
 errorlog = "-"
 loglevel = "info"
 # timeout generoso si Odoo responde lento
-timeout = 240
\ No newline at end of file
+timeout = 240
+
+# Métricas multi-proceso: /metrics fusiona las de todos los workers. Se fija aquí
+# (en el master) para que los workers lo hereden al hacer fork.
+os.environ.setdefault("METRICS_MULTIPROC_DIR", "/tmp/hso-metrics")
+
+
+def on_starting(server):
+    # Arranque del master: counters desde cero
+    from app.observability.multiprocess import reset_dir
+    reset_dir()
+
+
+def child_exit(server, worker):
+    # Conserva counters/histogramas del worker que sale y descarta sus gauges
+    from app.observability.multiprocess import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,354 @@
+"""Benchmark de carga de /argus/prices, /argus-analytics/* y bulk_history contra un Odoo falso.
+
+Por defecto arranca todo en local:
+  1. scripts/fake_odoo_server.py en un hilo (latencia/fallos configurables),
+  2. la API con uvicorn en un subproceso apuntando a ese Odoo (warmer y sync
+     del espejo desactivados para no contaminar las cifras),
+y lanza cada escenario con N clientes concurrentes durante D segundos.
+
+Con --base-url se mide una API ya levantada (por ejemplo apuntando a
+fake_odoo_server.py arrancado aparte); --odoo-url permite leer sus /__stats.
+
+El token es un JWT con sub "0" (usuario estático, no toca la BD) firmado con
+JWT_SECRET_KEY/JWT_ALGORITHM/JWT_AUDIENCE de la configuración; o --token.
+
+Uso:
+    python scripts/bench_argus.py                                  # todos los escenarios, mezcla "hot"
+    python scripts/bench_argus.py --mix cold -c 32 -d 20           # parámetros variados: fuerza Odoo
+    python scripts/bench_argus.py -s prices -s bulk_history --latency-ms 80 --fail-rate 0.05
+    python scripts/bench_argus.py --base-url http://127.0.0.1:8000 --odoo-url http://127.0.0.1:8069
+    python scripts/bench_argus.py --json bench.json                # resultados para comparar entre ramas
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# (método, ruta, params/json) generado por cada escenario
+RequestSpec = Tuple[str, str, Dict[str, Any]]
+
+
+# --- Escenarios ---
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, List[str], bool], RequestSpec]
+    description: str = ""
+
+
+def _window(rnd: random.Random, cold: bool) -> Tuple[str, str]:
+    today = date.today()
+    if not cold:
+        return (today - timedelta(days=30)).isoformat(), today.isoformat()
+    end = today - timedelta(days=rnd.randint(0, 60))
+    return (end - timedelta(days=rnd.randint(3, 45))).isoformat(), end.isoformat()
+
+
+def _prices(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    pool = products if cold else products[:5]
+    params: Dict[str, Any] = {"limit": 80, "shape": "compact"}
+    if rnd.random() < 0.7:
+        params["product_description"] = rnd.choice(pool)
+    if cold:
+        params["offset"] = rnd.choice((0, 0, 80, 160))
+        params["date_from"], params["date_to"] = _window(rnd, cold)
+    return "GET", "/argus/prices", params
+
+
+def _prices_today(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    params: Dict[str, Any] = {"shape": "compact"}
+    if cold:
+        params["limit"] = rnd.choice((40, 80, 200))
+        params["product_description"] = rnd.choice(products)
+    return "GET", "/argus/prices/today", params
+
+
+def _today_change(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    params: Dict[str, Any] = {}
+    if cold:
+        params["date"] = (date.today() - timedelta(days=rnd.randint(0, 20))).isoformat()
+    return "GET", "/argus-analytics/today-with-change", params
+
+
+def _series(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    params: Dict[str, Any] = {"description": rnd.choice(products if cold else products[:5]), "ma": "7,30"}
+    if cold:
+        params["date_from"], params["date_to"] = _window(rnd, cold)
+    return "GET", "/argus-analytics/series", params
+
+
+def _forward_curve(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    return "GET", "/argus-analytics/forward-curve", {"description": rnd.choice(products if cold else products[:5])}
+
+
+def _top_movers(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    return "GET", "/argus-analytics/top-movers", {"direction": rnd.choice(("up", "down")), "metric": rnd.choice(("pct", "abs"))}
+
+
+def _bulk_history(rnd: random.Random, products: List[str], cold: bool) -> RequestSpec:
+    n = rnd.randint(5, 20) if cold else 8
+    chosen = rnd.sample(products, min(n, len(products))) if cold else products[:n]
+    body: Dict[str, Any] = {"products": chosen, "limit_per_product": rnd.choice((2, 5, 10)) if cold else 2}
+    return "POST", "/argus/prices/bulk_history", {"json": body}
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("prices", _prices, "GET /argus/prices (compact)"),
+    Scenario("prices_today", _prices_today, "GET /argus/prices/today"),
+    Scenario("today_with_change", _today_change, "GET /argus-analytics/today-with-change"),
+    Scenario("series", _series, "GET /argus-analytics/series"),
+    Scenario("forward_curve", _forward_curve, "GET /argus-analytics/forward-curve"),
+    Scenario("top_movers", _top_movers, "GET /argus-analytics/top-movers"),
+    Scenario("bulk_history", _bulk_history, "POST /argus/prices/bulk_history"),
+)}
+
+
+# --- Medición ---
+
+@dataclass
+class Result:
+    scenario: str
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    elapsed: float = 0.0
+    odoo_calls: Optional[int] = None
+
+    def add(self, status: str, seconds: float) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latencies.append(seconds)
+        if not status.startswith("2"):
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies)
+        n = len(lat)
+
+        def pct(p: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(n - 1, int(p * n))] * 1000, 2)
+
+        return {
+            "scenario": self.scenario,
+            "requests": n,
+            "errors": self.errors,
+            "rps": round(n / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(lat[-1] * 1000, 2) if lat else None,
+            "statuses": dict(sorted(self.statuses.items())),
+            "odoo_calls_per_request": round(self.odoo_calls / n, 2) if self.odoo_calls is not None and n else None,
+        }
+
+
+async def _worker(client: httpx.AsyncClient, scenario: Scenario, products: List[str], cold: bool,
+                  deadline: float, result: Result, seed: int, max_requests: Optional[int], counter: List[int]) -> None:
+    rnd = random.Random(seed)
+    while time.perf_counter() < deadline:
+        if max_requests is not None:
+            if counter[0] >= max_requests:
+                return
+            counter[0] += 1
+        method, path, params = scenario.build(rnd, products, cold)
+        t0 = time.perf_counter()
+        try:
+            if method == "GET":
+                r = await client.get(path, params=params)
+            else:
+                r = await client.request(method, path, **params)
+            status = str(r.status_code)
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = e.__class__.__name__
+        result.add(status, time.perf_counter() - t0)
+
+
+def _odoo_calls(odoo_url: Optional[str]) -> Optional[int]:
+    if not odoo_url:
+        return None
+    try:
+        with urllib.request.urlopen(f"{odoo_url.rstrip('/')}/__stats", timeout=5) as r:
+            stats = json.loads(r.read())
+        return int(sum(v["calls"] for v in stats["calls"].values()))
+    except Exception:
+        return None
+
+
+async def run_scenario(base_url: str, token: str, scenario: Scenario, products: List[str], *, concurrency: int,
+                       duration: float, requests: Optional[int], cold: bool, timeout: float,
+                       odoo_url: Optional[str], warmup: float, seed: int = 1) -> Result:
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout, limits=limits) as client:
+        if warmup > 0:
+            await asyncio.gather(*(
+                _worker(client, scenario, products, cold, time.perf_counter() + warmup, Result(scenario.name), seed * 1000 + 500 + i, None, [0])
+                for i in range(concurrency)
+            ))
+        before = _odoo_calls(odoo_url)
+        result = Result(scenario.name)
+        counter = [0]
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, scenario, products, cold, t0 + duration, result, seed * 1000 + i, requests, counter)
+            for i in range(concurrency)
+        ))
+        result.elapsed = time.perf_counter() - t0
+        after = _odoo_calls(odoo_url)
+        if before is not None and after is not None:
+            result.odoo_calls = after - before
+    return result
+
+
+# --- Entorno local (Odoo falso + API) ---
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _mint_token(secret: str, algorithm: str, audience: str) -> str:
+    from jose import jwt
+
+    now = int(time.time())
+    return jwt.encode({"sub": "0", "aud": audience, "iat": now, "exp": now + 6 * 3600}, secret, algorithm=algorithm)
+
+
+def _wait_ready(url: str, proc: Optional[subprocess.Popen], timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise SystemExit(f"La API terminó al arrancar (código {proc.returncode})")
+        try:
+            with urllib.request.urlopen(f"{url}/healthz", timeout=2):
+                return
+        except Exception:
+            time.sleep(0.3)
+    raise SystemExit(f"La API no respondió en {url}/healthz tras {timeout}s")
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    cols = ("scenario", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "odoo_calls_per_request")
+    heads = ("escenario", "reqs", "errores", "req/s", "p50 ms", "p95 ms", "p99 ms", "max ms", "odoo/req")
+    table = [heads] + [tuple("-" if r.get(c) is None else str(r.get(c)) for c in cols) for r in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(cols))]
+    for i, row in enumerate(table):
+        print("  ".join(v.ljust(widths[j]) if j == 0 else v.rjust(widths[j]) for j, v in enumerate(row)))
+        if i == 0:
+            print("  ".join("-" * w for w in widths))
+    for r in rows:
+        bad = {k: v for k, v in r["statuses"].items() if not k.startswith("2")}
+        if bad:
+            print(f"  {r['scenario']}: respuestas no 2xx {bad}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="Escenario (repetible); por defecto todos")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Segundos por escenario")
+    parser.add_argument("-n", "--requests", type=int, default=None, help="Tope de peticiones por escenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de calentamiento (no se miden)")
+    parser.add_argument("--mix", choices=("hot", "cold"), default="hot", help="hot: pocas combinaciones (caché); cold: parámetros variados")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_out", help="Escribe los resultados en este fichero")
+    parser.add_argument("--base-url", help="API ya levantada; si se omite se arranca una local con uvicorn")
+    parser.add_argument("--odoo-url", help="Odoo falso externo (para contar llamadas vía /__stats)")
+    parser.add_argument("--token", help="JWT a usar; por defecto uno con sub '0' firmado con la config")
+    parser.add_argument("--api-workers", type=int, default=1, help="Workers de uvicorn al arrancar la API local")
+    odoo = parser.add_argument_group("Odoo falso (modo local)")
+    odoo.add_argument("--products", type=int, default=60)
+    odoo.add_argument("--days", type=int, default=120)
+    odoo.add_argument("--latency-ms", type=float, default=30.0)
+    odoo.add_argument("--jitter-ms", type=float, default=20.0)
+    odoo.add_argument("--row-us", type=float, default=0.5)
+    odoo.add_argument("--odoo-workers", type=int, default=16)
+    odoo.add_argument("--fail-rate", type=float, default=0.0)
+    odoo.add_argument("--fault-rate", type=float, default=0.0)
+    odoo.add_argument("--hang-rate", type=float, default=0.0)
+    a = parser.parse_args()
+
+    from app.config.settings import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_AUDIENCE
+
+    proc: Optional[subprocess.Popen] = None
+    base_url, odoo_url = a.base_url, a.odoo_url
+    if base_url is None:
+        from fake_odoo_server import start_server
+
+        server, _chaos = start_server(
+            products=a.products, days=a.days, latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, row_us=a.row_us,
+            workers=a.odoo_workers, fail_rate=a.fail_rate, fault_rate=a.fault_rate, hang_rate=a.hang_rate,
+        )
+        odoo_url = f"http://127.0.0.1:{server.server_address[1]}"
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = {
+            **os.environ,
+            "ODOO_URL": odoo_url, "ODOO_DB": "fake", "ODOO_USER": "bench", "ODOO_PASSWORD": "bench",
+            "ODOO_STAGING_URL": "", "CACHE_WARMER_ENABLED": "false", "ODOO_SYNC_INTERVAL": "0",
+            "JWT_SECRET_KEY": JWT_SECRET_KEY, "JWT_ALGORITHM": JWT_ALGORITHM, "JWT_AUDIENCE": JWT_AUDIENCE,
+            "LOG_LEVEL": os.environ.get("BENCH_API_LOG_LEVEL", "WARNING"),
+        }
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(a.api_workers), "--log-level", "warning", "--no-access-log"]
+        print(f"Odoo falso: {odoo_url} | API: {base_url} ({a.api_workers} worker/s)")
+        proc = subprocess.Popen(cmd, cwd=str(BACKEND), env=env)
+    try:
+        _wait_ready(base_url, proc)
+        token = a.token or _mint_token(JWT_SECRET_KEY, JWT_ALGORITHM, JWT_AUDIENCE)
+        with httpx.Client(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=a.timeout) as c:
+            r = c.get("/argus/prices/products")
+            r.raise_for_status()
+            products = sorted(r.json())
+        if not products:
+            raise SystemExit("La API no devolvió productos Argus: ¿apunta al Odoo correcto?")
+        names = a.scenario or list(SCENARIOS)
+        print(f"{len(products)} productos | mezcla={a.mix} | concurrencia={a.concurrency} | {a.duration}s por escenario\n")
+        results = []
+        for name in names:
+            res = asyncio.run(run_scenario(
+                base_url, token, SCENARIOS[name], products,
+                concurrency=a.concurrency, duration=a.duration, requests=a.requests, cold=a.mix == "cold",
+                timeout=a.timeout, odoo_url=odoo_url, warmup=a.warmup, seed=a.seed,
+            ))
+            results.append(res.summary())
+        _print_table(results)
+        if a.json_out:
+            meta = {k: v for k, v in vars(a).items() if k not in ("token", "json_out")}
+            Path(a.json_out).write_text(json.dumps({"config": meta, "results": results}, indent=2))
+            print(f"\nResultados en {a.json_out}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,171 @@
+"""Overhead por request de la pila de middlewares (app.main.add_middlewares).
+
+Llama a la app ASGI directamente (sin red ni servidor) y compara:
+  - bare: mismas rutas y handlers de error, sin middlewares,
+  - full: la app tal cual la construye app.main.create_app(),
+sobre un endpoint trivial (/healthz por defecto), secuencial y con concurrencia.
+La diferencia full - bare es el coste de los middlewares.
+
+También mide el tiempo hasta el primer byte de una respuesta en streaming
+(5 bloques separados por --stream-gap-ms) para comprobar que la pila no la retiene.
+
+Uso:
+    python scripts/bench_middleware.py
+    python scripts/bench_middleware.py -n 20000 -c 32 --path /healthz --json mw.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+from app.main import add_routers, create_app  # noqa: E402
+from app.utils.exception_handlers import add_global_exception_handler  # noqa: E402
+
+STREAM_PATH = "/__bench/stream"
+
+
+def _bare_app() -> FastAPI:
+    app = FastAPI()
+    add_global_exception_handler(app)
+    add_routers(app)
+    return app
+
+
+def _add_stream_route(app: FastAPI, gap: float) -> None:
+    async def chunks():
+        for i in range(5):
+            yield f"chunk-{i}\n".encode()
+            await asyncio.sleep(gap)
+
+    @app.get(STREAM_PATH)
+    async def stream():  # noqa: ANN202
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def _scope(path: str) -> Dict[str, Any]:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def _call(app, path: str) -> Dict[str, Any]:
+    """Una request ASGI; devuelve status, latencia total y tiempo hasta el primer byte de cuerpo."""
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    out: Dict[str, Any] = {"status": 0, "ttfb": None}
+    t0 = time.perf_counter()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body") and out["ttfb"] is None:
+            out["ttfb"] = time.perf_counter() - t0
+
+    await app(_scope(path), receive, send)
+    out["seconds"] = time.perf_counter() - t0
+    return out
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(app, path: str, n: int, concurrency: int) -> Dict[str, Any]:
+    for _ in range(min(500, n)):
+        await _call(app, path)
+    lat: List[float] = []
+    t0 = time.perf_counter()
+    if concurrency <= 1:
+        for _ in range(n):
+            lat.append((await _call(app, path))["seconds"])
+    else:
+        for _ in range(0, n, concurrency):
+            res = await asyncio.gather(*(_call(app, path) for _ in range(concurrency)))
+            lat.extend(r["seconds"] for r in res)
+    wall = time.perf_counter() - t0
+    statuses = {(await _call(app, path))["status"]}
+    return {
+        "requests": len(lat),
+        "rps": round(len(lat) / wall, 1),
+        "mean_us": round(statistics.fmean(lat) * 1e6, 1),
+        "p50_us": round(_pct(lat, 0.5) * 1e6, 1),
+        "p99_us": round(_pct(lat, 0.99) * 1e6, 1),
+        "status": sorted(statuses),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    gap = args.stream_gap_ms / 1000.0
+    apps = {"bare": _bare_app(), "full": create_app()}
+    results: Dict[str, Any] = {}
+    for name, app in apps.items():
+        _add_stream_route(app, gap)
+        seq = await _run(app, args.path, args.requests, 1)
+        conc = await _run(app, args.path, args.requests, args.concurrency)
+        stream = await _call(app, STREAM_PATH)
+        results[name] = {
+            "sequential": seq,
+            f"concurrency_{args.concurrency}": conc,
+            "stream_ttfb_ms": round((stream["ttfb"] or 0) * 1000, 1),
+            "stream_total_ms": round(stream["seconds"] * 1000, 1),
+        }
+    results["overhead_us"] = {
+        "sequential_mean": round(results["full"]["sequential"]["mean_us"] - results["bare"]["sequential"]["mean_us"], 1),
+        f"concurrency_{args.concurrency}_mean": round(
+            results["full"][f"concurrency_{args.concurrency}"]["mean_us"]
+            - results["bare"][f"concurrency_{args.concurrency}"]["mean_us"],
+            1,
+        ),
+    }
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--requests", type=int, default=10000)
+    ap.add_argument("-c", "--concurrency", type=int, default=16)
+    ap.add_argument("--path", default="/healthz")
+    ap.add_argument("--stream-gap-ms", type=float, default=50.0)
+    ap.add_argument("--json", help="Guarda los resultados en este fichero")
+    args = ap.parse_args()
+    results = asyncio.run(main_async(args))
+    print(json.dumps(results, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
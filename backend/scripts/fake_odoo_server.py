@@ -0,0 +1,716 @@
+"""Servidor Odoo falso (XML-RPC + JSON-RPC) para pruebas de carga sin tocar el Odoo real.
+
+Implementa lo que usan los conectores del backend:
+    common: version, login, authenticate
+    object: execute_kw -> search_read, search, read, search_count, read_group, fields_get
+sobre un dataset sintético y determinista de argus.price, api.news, crm.lead,
+res.partner y res.users.
+
+Inyección de latencia y fallos (flags o en caliente con POST /__control):
+    --latency-ms / --jitter-ms   latencia base por llamada
+    --row-us                     coste extra por fila escaneada (microsegundos)
+    --workers                    llamadas atendidas a la vez (las demás esperan, como los workers de Odoo)
+    --fail-rate                  fracción de respuestas HTTP 503 (ProtocolError en el cliente)
+    --fault-rate                 fracción de Faults de Odoo (error lógico)
+    --hang-rate / --hang-seconds fracción de llamadas que se cuelgan (provoca timeouts del cliente)
+
+Uso:
+    python scripts/fake_odoo_server.py --port 8069 --latency-ms 40 --jitter-ms 20
+    ODOO_URL=http://127.0.0.1:8069 ODOO_DB=fake ODOO_USER=bench ODOO_PASSWORD=bench uvicorn app.main:app
+
+    curl -X POST localhost:8069/__control -d '{"fail_rate": 0.5}'   # degradar en caliente
+    curl localhost:8069/__stats                                     # llamadas por modelo/método
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import json
+import random
+import threading
+import time
+import xmlrpc.client
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+UID = 2
+SERVER_VERSION = {"server_version": "17.0-fake", "server_version_info": [17, 0, 0, "final", 0, ""], "protocol_version": 1}
+
+
+# --- Dataset sintético ---
+
+_PRODUCTS = [
+    "Propane Mont Belvieu", "Butane Mont Belvieu", "Ethane Mont Belvieu", "Isobutane Mont Belvieu",
+    "Natural Gasoline Mont Belvieu", "Propane Conway", "Butane Conway", "Propane Far East Index",
+    "Butane Far East Index", "Propane CIF ARA", "Butane CIF ARA", "Propane Saudi CP",
+    "Butane Saudi CP", "Propane Sonatrach", "Ethylene USGC", "Propylene USGC",
+    "Benzene USGC", "Toluene USGC", "Mixed Xylenes USGC", "Styrene USGC",
+    "Methanol USGC", "MTBE USGC", "Naphtha CIF NWE", "Gasoil 0.1% CIF NWE",
+    "Jet CIF NWE", "Fuel Oil 3.5% FOB Rotterdam", "WTI Cushing", "Brent Dated",
+    "Dubai", "LNG DES NWE",
+]
+_DELIVERY = ["Pipeline", "FOB", "CIF", "DES", "Rail"]
+_UNITS = [(1, "USD/t"), (2, "USc/gal"), (3, "USD/bl"), (4, "USD/mmBtu")]
+_FORWARDS = ["Spot", "Month 1", "Month 2", "Month 3"]
+_STAGES = [(1, "New"), (2, "Qualified"), (3, "Proposition"), (4, "Won")]
+_TEAMS = [(1, "Sales"), (2, "Trading")]
+_USERS = [(2, "Bench User"), (6, "Ana Pérez"), (7, "Luis Gómez")]
+_COUNTRIES = [(156, "Mexico"), (233, "United States"), (38, "Canada")]
+
+
+def _m2o(pair: Tuple[int, str]) -> list:
+    return [pair[0], pair[1]]
+
+
+def build_dataset(*, products: int, days: int, news: int, leads: int, partners: int, seed: int = 7) -> Dict[str, List[dict]]:
+    rnd = random.Random(seed)
+    today = date.today()
+    now = datetime.utcnow().replace(microsecond=0)
+    prices: List[dict] = []
+    pid = 0
+    names = (_PRODUCTS * (products // len(_PRODUCTS) + 1))[:products]
+    for i, base_name in enumerate(names):
+        name = base_name if i < len(_PRODUCTS) else f"{base_name} #{i // len(_PRODUCTS) + 1}"
+        unit = _UNITS[i % len(_UNITS)]
+        delivery = _DELIVERY[i % len(_DELIVERY)]
+        forwards = _FORWARDS[: 1 + (i % 3)]
+        base = rnd.uniform(50, 900)
+        for fwd_idx, fwd in enumerate(forwards):
+            value = base * (1 + 0.01 * fwd_idx)
+            for d in range(days - 1, -1, -1):
+                day = today - timedelta(days=d)
+                if day.weekday() >= 5:
+                    continue
+                value = max(1.0, value * (1 + rnd.gauss(0, 0.012)))
+                pid += 1
+                pub = day.isoformat()
+                prices.append({
+                    "id": pid,
+                    "product_description": name,
+                    "repository_id": 1000 + i,
+                    "quote_id": 5000 + i * 10 + fwd_idx,
+                    "code_id": f"PA{i:05d}{fwd_idx}",
+                    "timestamp_id": 1,
+                    "continuous_forward": fwd_idx > 0,
+                    "publication_date": pub,
+                    "fmt_date": pub,
+                    "value": round(value, 3),
+                    "value_mid": round(value, 3),
+                    "value_close": round(value * 1.001, 3),
+                    "value_open": round(value * 0.999, 3),
+                    "forward_period": fwd,
+                    "forward_year": day.year,
+                    "diff_base_roll": False,
+                    "pricetype_id": 1,
+                    "decimal_places": 3,
+                    "unit_id1": unit[0],
+                    "unit_id2": unit[0] + 10,
+                    "delivery_mode_label": delivery,
+                    "delivery_mode_name": delivery,
+                    "delivery_mode_from_metadata": delivery,
+                    "delivery_mode_raw": delivery,
+                    "delivery_mode_num": _DELIVERY.index(delivery) + 1,
+                    "delivery_mode_id": [_DELIVERY.index(delivery) + 1, delivery],
+                    "diff_base_value": False,
+                    "diff_base_timing_id": 0,
+                    "date_modified": f"{pub} 18:00:00",
+                    "correction": False,
+                    "error_id": 0,
+                    "tag": name.split()[0].lower(),
+                    "units_display": unit[1],
+                    "unit_from_metadata": unit[1],
+                    "currency_unit_id": [1, "USD"],
+                    "currency_id": [1, "USD"],
+                    "currency_from_metadata": "USD",
+                    "measure_unit_id": [unit[0], unit[1].split("/")[-1]],
+                })
+    news_rows = []
+    for n in range(1, news + 1):
+        day = today - timedelta(days=n // 5)
+        news_rows.append({
+            "id": n,
+            "news_id": f"N{100000 + n}",
+            "headline": f"{rnd.choice(_PRODUCTS)} {rnd.choice(['firms', 'softens', 'steady', 'rallies'])} on {rnd.choice(['supply', 'demand', 'freight', 'weather'])}",
+            "publication_date": f"{day.isoformat()} {8 + n % 10:02d}:00:00",
+            "date_modified": f"{day.isoformat()} 19:00:00",
+            "free": n % 3 == 0,
+            "featured": n % 11 == 0,
+            "language_id": [1, "English"],
+            "news_type_id": [1 + n % 3, ["Market", "Analysis", "Flash"][n % 3]],
+            "region_ids": [1 + n % 4],
+            "sector_ids": [1 + n % 6],
+            "context_ids": [],
+            "stream_ids": [1],
+            "text_html": "<p>" + " ".join(rnd.choice(["lorem", "ipsum", "argus", "price", "cargo", "spot"]) for _ in range(200)) + "</p>",
+        })
+    partners_rows = []
+    for n in range(1, partners + 1):
+        country = _COUNTRIES[n % len(_COUNTRIES)]
+        partners_rows.append({
+            "id": n,
+            "name": f"Cliente {n:05d}",
+            "active": n % 17 != 0,
+            "email": f"cliente{n}@example.com",
+            "phone": f"+52 55 {n:04d} 0000",
+            "company_id": [1, "HSO"],
+            "company_name": f"Empresa {n % 300}",
+            "street": f"Calle {n}",
+            "street2": False,
+            "city": ["CDMX", "Houston", "Calgary"][n % 3],
+            "state_id": False,
+            "zip": f"{10000 + n}",
+            "country_id": _m2o(country),
+            "website": False,
+            "activity_ids": [],
+            "category_id": [1 + n % 4],
+            "write_date": (now - timedelta(minutes=n)).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    lead_rows = []
+    for n in range(1, leads + 1):
+        stage = _STAGES[n % len(_STAGES)]
+        partner = partners_rows[n % len(partners_rows)] if partners_rows else None
+        lead_rows.append({
+            "id": n,
+            "name": f"Oportunidad {n:05d}",
+            "type": "opportunity" if n % 3 else "lead",
+            "active": n % 13 != 0,
+            "email_from": f"lead{n}@example.com",
+            "phone": f"+1 713 {n:04d}",
+            "expected_revenue": round(rnd.uniform(1000, 250000), 2),
+            "probability": float(rnd.choice([10, 25, 50, 75, 90])),
+            "priority": str(n % 4),
+            "company_id": [1, "HSO"] if n % 10 else [2, "HSO Energy"],
+            "partner_id": [partner["id"], partner["name"]] if partner else False,
+            "stage_id": _m2o(stage),
+            "user_id": _m2o(_USERS[n % len(_USERS)]),
+            "team_id": _m2o(_TEAMS[n % len(_TEAMS)]),
+            "write_date": (now - timedelta(seconds=n * 7)).strftime("%Y-%m-%d %H:%M:%S"),
+            "create_date": (now - timedelta(days=n % 400)).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    users = [{"id": UID, "name": "Bench User", "login": "bench", "tz": "America/Mexico_City", "active": True}]
+    return {"argus.price": prices, "api.news": news_rows, "crm.lead": lead_rows, "res.partner": partners_rows, "res.users": users}
+
+
+# --- Motor de consultas (subconjunto de la semántica del ORM) ---
+
+class OdooFault(Exception):
+    pass
+
+
+def _scalar(v: Any) -> Any:
+    """many2one [id, nombre] -> id (como compara el ORM)."""
+    if isinstance(v, list) and len(v) == 2 and isinstance(v[0], int) and isinstance(v[1], str):
+        return v[0]
+    return v
+
+
+def _like(pattern: str, value: Any, *, ci: bool, exact: bool = False) -> bool:
+    if value in (None, False):
+        return False
+    text = str(value[1] if isinstance(value, list) and len(value) == 2 else value)
+    pat = str(pattern)
+    if ci:
+        text, pat = text.lower(), pat.lower()
+    if exact:
+        import fnmatch
+        return fnmatch.fnmatchcase(text, pat.replace("%", "*").replace("_", "?"))
+    return pat in text
+
+
+def _leaf(rec: dict, leaf: Any) -> bool:
+    field, op, value = leaf
+    op = str(op).lower()
+    raw = rec.get(field)
+    if op in ("like", "ilike", "not like", "not ilike", "=like", "=ilike"):
+        hit = _like(value, raw, ci="ilike" in op, exact=op.startswith("="))
+        return not hit if op.startswith("not") else hit
+    v = _scalar(raw)
+    if isinstance(v, list):  # x2many: cualquier id coincide
+        ids = set(v)
+        if op in ("in", "="):
+            wanted = set(value) if isinstance(value, (list, tuple)) else {value}
+            return bool(ids & wanted) if value not in (False, None) else not ids
+        if op in ("not in", "!="):
+            wanted = set(value) if isinstance(value, (list, tuple)) else {value}
+            return not (ids & wanted) if value not in (False, None) else bool(ids)
+        raise OdooFault(f"Operador no soportado en x2many: {op}")
+    if op in ("=", "=="):
+        return (not v) if value is False else v == value
+    if op in ("!=", "<>"):
+        return bool(v) if value is False else v != value
+    if op == "in":
+        return v in value or (False in value and not v)
+    if op == "not in":
+        return v not in value
+    if op == "child_of":
+        return v == value or (isinstance(value, list) and v in value)
+    if v in (None, False):
+        return False
+    try:
+        if op == "<":
+            return v < value
+        if op == ">":
+            return v > value
+        if op == "<=":
+            return v <= value
+        if op == ">=":
+            return v >= value
+    except TypeError:
+        return False
+    raise OdooFault(f"Operador de dominio no soportado: {op}")
+
+
+def compile_domain(domain: List[Any]) -> Callable[[dict], bool]:
+    """Dominio en notación polaca ('&' implícito, '|', '!') -> predicado."""
+    tokens = list(domain or [])
+    pos = 0
+
+    def parse() -> Callable[[dict], bool]:
+        nonlocal pos
+        if pos >= len(tokens):
+            raise OdooFault(f"Dominio mal formado: {domain!r}")
+        tok = tokens[pos]
+        pos += 1
+        if tok == "&":
+            a, b = parse(), parse()
+            return lambda r: a(r) and b(r)
+        if tok == "|":
+            a, b = parse(), parse()
+            return lambda r: a(r) or b(r)
+        if tok == "!":
+            a = parse()
+            return lambda r: not a(r)
+        if isinstance(tok, (list, tuple)) and len(tok) == 3:
+            leaf = tuple(tok)
+            return lambda r: _leaf(r, leaf)
+        raise OdooFault(f"Elemento de dominio inválido: {tok!r}")
+
+    terms = []
+    while pos < len(tokens):
+        terms.append(parse())
+    return lambda r: all(t(r) for t in terms)
+
+
+def _sort(rows: List[dict], order: Optional[str]) -> List[dict]:
+    specs = [p.strip().split() for p in (order or "id asc").split(",") if p.strip()]
+    out = list(rows)
+    for spec in reversed(specs):
+        field = spec[0]
+        desc = len(spec) > 1 and spec[1].lower() == "desc"
+        # NULLs al final en ambos sentidos, como PostgreSQL con asc y Odoo con desc
+        present = [r for r in out if _scalar(r.get(field)) not in (None, False)]
+        missing = [r for r in out if _scalar(r.get(field)) in (None, False)]
+        present.sort(key=lambda r: _scalar(r.get(field)), reverse=desc)
+        out = present + missing
+    return out
+
+
+def _group_value(rec: dict, spec: str) -> Tuple[Any, Any]:
+    """(clave de agrupación, valor mostrado) para 'campo' o 'campo:granularidad'."""
+    field, _, gran = spec.partition(":")
+    v = rec.get(field)
+    if gran and isinstance(v, str) and len(v) >= 10:
+        d = datetime.strptime(v[:10], "%Y-%m-%d")
+        if gran == "day":
+            return v[:10], d.strftime("%d %b %Y")
+        if gran == "week":
+            return d.strftime("%G-%V"), d.strftime("W%V %G")
+        if gran == "year":
+            return v[:4], v[:4]
+        if gran == "quarter":
+            q = (d.month - 1) // 3 + 1
+            return f"{d.year}-Q{q}", f"Q{q} {d.year}"
+        # month (por defecto en Odoo)
+        return v[:7], f"{calendar.month_name[d.month]} {d.year}"
+    key = _scalar(v)
+    if isinstance(key, list):
+        key = tuple(key)
+    return key, v
+
+
+class FakeOdoo:
+    def __init__(self, data: Dict[str, List[dict]]):
+        self.data = data
+        self.by_id = {m: {r["id"]: r for r in rows} for m, rows in data.items()}
+        self.schema = {m: self._infer_schema(rows) for m, rows in data.items()}
+
+    @staticmethod
+    def _infer_schema(rows: List[dict]) -> Dict[str, dict]:
+        schema: Dict[str, dict] = {}
+        for r in rows[:200]:
+            for k, v in r.items():
+                if k in schema and schema[k]["type"] != "boolean":
+                    continue
+                if isinstance(v, bool):
+                    t = "boolean"
+                elif isinstance(v, int):
+                    t = "integer"
+                elif isinstance(v, float):
+                    t = "float"
+                elif isinstance(v, list) and len(v) == 2 and isinstance(v[1], str):
+                    t = "many2one"
+                elif isinstance(v, list):
+                    t = "many2many"
+                else:
+                    t = "char"
+                schema[k] = {"type": t, "string": k.replace("_", " ").title()}
+        return schema
+
+    def _rows(self, model: str) -> List[dict]:
+        if model not in self.data:
+            raise OdooFault(f"Object {model} doesn't exist")
+        return self.data[model]
+
+    def _filter(self, model: str, domain: list, context: Optional[dict]) -> List[dict]:
+        rows = self._rows(model)
+        pred = compile_domain(domain)
+        mentions_active = any(isinstance(t, (list, tuple)) and t and t[0] == "active" for t in domain or [])
+        active_test = (context or {}).get("active_test", True) and "active" in self.schema[model] and not mentions_active
+        return [r for r in rows if (not active_test or r.get("active", True)) and pred(r)]
+
+    def _project(self, model: str, rows: List[dict], fields: Optional[List[str]]) -> List[dict]:
+        if not fields:
+            return [dict(r) for r in rows]
+        schema = self.schema[model]
+        unknown = [f for f in fields if f not in schema]
+        if unknown:
+            raise OdooFault(f"Invalid field {unknown[0]!r} on model {model!r}")
+        return [{"id": r["id"], **{f: r.get(f, False) for f in fields}} for r in rows]
+
+    def execute(self, model: str, method: str, args: list, kwargs: dict) -> Tuple[Any, int]:
+        """Devuelve (resultado, filas escaneadas) para simular el coste."""
+        kwargs = dict(kwargs or {})
+        ctx = kwargs.get("context") or {}
+        if method in ("search_read", "search", "search_count"):
+            domain = args[0] if args else kwargs.get("domain", [])
+            rows = self._filter(model, domain, ctx)
+            scanned = len(self._rows(model))
+            if method == "search_count":
+                return len(rows), scanned
+            rows = _sort(rows, kwargs.get("order"))
+            offset = int(kwargs.get("offset") or 0)
+            limit = kwargs.get("limit")
+            rows = rows[offset: offset + int(limit)] if limit else rows[offset:]
+            if method == "search":
+                return [r["id"] for r in rows], scanned
+            fields = kwargs.get("fields") or (args[1] if len(args) > 1 else None)
+            return self._project(model, rows, fields), scanned
+        if method == "read":
+            ids = args[0] if args else []
+            fields = kwargs.get("fields") or (args[1] if len(args) > 1 else None)
+            index = self.by_id.get(model) or {}
+            if model not in self.data:
+                raise OdooFault(f"Object {model} doesn't exist")
+            rows = [index[i] for i in ids if i in index]
+            return self._project(model, rows, fields), len(ids)
+        if method == "fields_get":
+            self._rows(model)
+            return {k: dict(v) for k, v in self.schema[model].items()}, 0
+        if method == "read_group":
+            return self._read_group(model, args, kwargs, ctx)
+        raise OdooFault(f"Método no soportado por el servidor falso: {model}.{method}")
+
+    def _read_group(self, model: str, args: list, kwargs: dict, ctx: dict) -> Tuple[Any, int]:
+        domain = args[0] if args else kwargs.get("domain", [])
+        fields = list(args[1] if len(args) > 1 else kwargs.get("fields", []))
+        groupby = args[2] if len(args) > 2 else kwargs.get("groupby", [])
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby or [])
+        lazy = kwargs.get("lazy", True)
+        if lazy and groupby:
+            groupby = groupby[:1]
+        rows = self._filter(model, domain, ctx)
+        groups: Dict[tuple, List[dict]] = {}
+        labels: Dict[tuple, list] = {}
+        for r in rows:
+            keyvals = [_group_value(r, g) for g in groupby]
+            key = tuple(k for k, _ in keyvals)
+            groups.setdefault(key, []).append(r)
+            labels.setdefault(key, [v for _, v in keyvals])
+        if not groupby and not rows:
+            groups[()] = []
+            labels[()] = []
+        schema = self.schema[model]
+        out = []
+        for key, members in sorted(groups.items(), key=lambda kv: tuple(str(k) for k in kv[0])):
+            g: Dict[str, Any] = {}
+            for spec, label in zip(groupby, labels[key]):
+                g[spec] = label
+                g[spec.split(":")[0]] = label
+            count_key = f"{groupby[0].split(':')[0]}_count" if lazy and groupby else "__count"
+            g[count_key] = len(members)
+            g["__count"] = len(members)
+            g["__domain"] = list(domain or [])
+            for spec in fields:
+                name, _, agg = spec.partition(":")
+                if name in g or spec in groupby:
+                    continue
+                if not agg:
+                    if schema.get(name, {}).get("type") not in ("integer", "float"):
+                        continue
+                    agg = "sum"
+                vals = [_scalar(m.get(name)) for m in members if _scalar(m.get(name)) not in (None, False)]
+                if agg == "count":
+                    res: Any = len(vals)
+                elif agg == "count_distinct":
+                    res = len(set(vals))
+                elif not vals:
+                    res = False
+                elif agg == "max":
+                    res = max(vals)
+                elif agg == "min":
+                    res = min(vals)
+                elif agg == "avg":
+                    res = sum(vals) / len(vals)
+                elif agg == "sum":
+                    res = sum(vals)
+                else:
+                    raise OdooFault(f"Agregado no soportado: {agg}")
+                g[name] = res
+            out.append(g)
+        offset = int(kwargs.get("offset") or 0)
+        limit = kwargs.get("limit")
+        out = out[offset: offset + int(limit)] if limit else out[offset:]
+        return out, len(rows)
+
+
+# --- Inyección de latencia / fallos ---
+
+class Chaos:
+    def __init__(self, **cfg: Any):
+        self.cfg: Dict[str, Any] = {
+            "latency_ms": 0.0,
+            "jitter_ms": 0.0,
+            "row_us": 0.0,
+            "fail_rate": 0.0,
+            "fault_rate": 0.0,
+            "hang_rate": 0.0,
+            "hang_seconds": 60.0,
+        }
+        self.cfg.update({k: v for k, v in cfg.items() if v is not None})
+        self._workers = threading.BoundedSemaphore(max(1, int(cfg.get("workers") or 64)))
+        self.cfg["workers"] = int(cfg.get("workers") or 64)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.inflight = 0
+
+    def update(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            for k, v in changes.items():
+                if k not in self.cfg:
+                    raise KeyError(k)
+                if k == "workers":
+                    self._workers = threading.BoundedSemaphore(max(1, int(v)))
+                self.cfg[k] = type(self.cfg[k])(v)
+            return dict(self.cfg)
+
+    def record(self, name: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            s = self.stats.setdefault(name, {"calls": 0, "seconds": 0.0, "errors": 0})
+            s["calls"] += 1
+            s["seconds"] += seconds
+            if outcome != "ok":
+                s["errors"] += 1
+
+    def run(self, name: str, fn: Callable[[], Tuple[Any, int]]) -> Tuple[str, Any]:
+        """Ejecuta `fn` con latencia/fallos inyectados. Devuelve (resultado, valor)."""
+        cfg = self.cfg
+        t0 = time.perf_counter()
+        with self._workers:
+            with self._lock:
+                self.inflight += 1
+            try:
+                roll = random.random()
+                if roll < cfg["hang_rate"]:
+                    time.sleep(cfg["hang_seconds"])
+                    outcome: Tuple[str, Any] = ("http_error", 504)
+                elif roll < cfg["hang_rate"] + cfg["fail_rate"]:
+                    outcome = ("http_error", 503)
+                elif roll < cfg["hang_rate"] + cfg["fail_rate"] + cfg["fault_rate"]:
+                    outcome = ("fault", "Injected fault (fake Odoo)")
+                else:
+                    try:
+                        result, scanned = fn()
+                        extra = scanned * cfg["row_us"] / 1e6
+                        outcome = ("ok", result)
+                    except OdooFault as e:
+                        extra = 0.0
+                        outcome = ("fault", str(e))
+                    delay = cfg["latency_ms"] / 1000 + random.uniform(0, cfg["jitter_ms"] / 1000) + extra
+                    left = delay - (time.perf_counter() - t0)
+                    if left > 0:
+                        time.sleep(left)
+            finally:
+                with self._lock:
+                    self.inflight -= 1
+        self.record(name, time.perf_counter() - t0, outcome[0])
+        return outcome
+
+
+# --- HTTP ---
+
+def make_handler(odoo: FakeOdoo, chaos: Chaos, *, db: str, login: str, password: str):
+    def authenticate(dbname: str, user: str, pw: str) -> Any:
+        return UID if (dbname == db and user == login and pw == password) else False
+
+    def dispatch(service: str, method: str, params: list) -> Tuple[str, Any]:
+        if service == "common":
+            if method == "version":
+                return "ok", SERVER_VERSION
+            if method in ("login", "authenticate"):
+                return chaos.run(f"common.{method}", lambda: (authenticate(*params[:3]), 0))
+            return "fault", f"Método common desconocido: {method}"
+        if service == "object" and method == "execute_kw":
+            dbname, uid, pw, model, meth = params[:5]
+            args = params[5] if len(params) > 5 else []
+            kwargs = params[6] if len(params) > 6 else {}
+            if dbname != db or uid != UID or pw != password:
+                return "fault", "Access Denied"
+            return chaos.run(f"{model}.{meth}", lambda: odoo.execute(model, meth, list(args), dict(kwargs)))
+        return "fault", f"Servicio desconocido: {service}.{method}"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt: str, *args: Any) -> None:  # silencio: el benchmark genera miles
+            pass
+
+        def _send(self, status: int, body: bytes, ctype: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, payload: Any) -> None:
+            self._send(status, json.dumps(payload, default=str).encode(), "application/json")
+
+        def do_GET(self) -> None:
+            if self.path.startswith("/__stats"):
+                with chaos._lock:
+                    stats = {k: dict(v) for k, v in chaos.stats.items()}
+                self._json(200, {"config": chaos.cfg, "inflight": chaos.inflight, "calls": stats,
+                                 "rows": {m: len(r) for m, r in odoo.data.items()}})
+            elif self.path.startswith("/web/webclient/version_info"):
+                self._json(200, SERVER_VERSION)
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path.startswith("/__control"):
+                try:
+                    self._json(200, chaos.update(json.loads(body or b"{}")))
+                except (KeyError, ValueError) as e:
+                    self._json(400, {"error": f"parámetro inválido: {e}"})
+                return
+            if self.path.startswith("/jsonrpc"):
+                self._jsonrpc(body)
+                return
+            if self.path.startswith("/xmlrpc/2/") or self.path.startswith("/xmlrpc/"):
+                self._xmlrpc(self.path.rstrip("/").rsplit("/", 1)[-1], body)
+                return
+            self._send(404, b"not found", "text/plain")
+
+        def _xmlrpc(self, service: str, body: bytes) -> None:
+            try:
+                params, method = xmlrpc.client.loads(body, use_builtin_types=True)
+            except Exception as e:
+                self._send(400, str(e).encode(), "text/plain")
+                return
+            kind, value = dispatch(service, method, list(params))
+            if kind == "http_error":
+                self._send(int(value), b"Service Unavailable", "text/plain")
+                return
+            if kind == "fault":
+                payload = xmlrpc.client.dumps(xmlrpc.client.Fault(1, value), methodresponse=True, allow_none=True)
+            else:
+                payload = xmlrpc.client.dumps((value,), methodresponse=True, allow_none=True)
+            self._send(200, payload.encode(), "text/xml")
+
+        def _jsonrpc(self, body: bytes) -> None:
+            try:
+                req = json.loads(body)
+                p = req.get("params") or {}
+                kind, value = dispatch(p.get("service", ""), p.get("method", ""), list(p.get("args") or []))
+            except Exception as e:
+                self._json(400, {"error": str(e)})
+                return
+            if kind == "http_error":
+                self._send(int(value), b"Service Unavailable", "text/plain")
+                return
+            resp: Dict[str, Any] = {"jsonrpc": "2.0", "id": req.get("id")}
+            if kind == "fault":
+                resp["error"] = {"code": 200, "message": "Odoo Server Error",
+                                 "data": {"name": "odoo.exceptions.UserError", "message": value}}
+            else:
+                resp["result"] = value
+            self._json(200, resp)
+
+    return Handler
+
+
+def start_server(
+    *,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    db: str = "fake",
+    login: str = "bench",
+    password: str = "bench",
+    products: int = 60,
+    days: int = 120,
+    news: int = 2000,
+    leads: int = 5000,
+    partners: int = 3000,
+    **chaos_cfg: Any,
+) -> Tuple[ThreadingHTTPServer, Chaos]:
+    """Arranca el servidor en un hilo daemon (para el benchmark). Devuelve (server, chaos)."""
+    data = build_dataset(products=products, days=days, news=news, leads=leads, partners=partners)
+    chaos = Chaos(**chaos_cfg)
+    odoo = FakeOdoo(data)
+    server = ThreadingHTTPServer((host, port), make_handler(odoo, chaos, db=db, login=login, password=password))
+    server.daemon_threads = True
+    server.odoo = odoo  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name="fake-odoo", daemon=True).start()
+    return server, chaos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8069)
+    parser.add_argument("--db", default="fake")
+    parser.add_argument("--login", default="bench")
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--news", type=int, default=2000)
+    parser.add_argument("--leads", type=int, default=5000)
+    parser.add_argument("--partners", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--row-us", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    a = parser.parse_args()
+    server, chaos = start_server(
+        host=a.host, port=a.port, db=a.db, login=a.login, password=a.password,
+        products=a.products, days=a.days, news=a.news, leads=a.leads, partners=a.partners,
+        latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, row_us=a.row_us, workers=a.workers,
+        fail_rate=a.fail_rate, fault_rate=a.fault_rate, hang_rate=a.hang_rate, hang_seconds=a.hang_seconds,
+    )
+    host, port = server.server_address[:2]
+    print(f"Fake Odoo en http://{host}:{port} (db={a.db} login={a.login}) - Ctrl+C para salir")
+    print("  " + ", ".join(f"{m}: {len(r)} filas" for m, r in server.odoo.data.items()))  # type: ignore[attr-defined]
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# Los tests no dependen de servicios externos: sin Redis (caché en memoria) ni sinks de BD
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("AUDIT_SINKS", "")
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
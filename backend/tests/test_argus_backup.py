@@ -0,0 +1,30 @@
+import pytest
+
+from app.integrations.argus import argus_service
+from app.utils.adapters.cache_adapter import set_cache
+
+
+def test_odoo_failure_serves_backup_without_rereading_primary(monkeypatch):
+    key = "argus:news:detail:991"
+    set_cache(f"{key}:backup", {"headline": "stale"}, 60)
+    reads = []
+    real_get = argus_service.get_cache
+    monkeypatch.setattr(argus_service, "get_cache", lambda k: reads.append(k) or real_get(k))
+
+    def failing_connector():
+        raise ConnectionError("odoo down")
+
+    monkeypatch.setattr(argus_service, "_get_connector", failing_connector)
+
+    assert argus_service.get_argus_news_detail(991) == {"headline": "stale"}
+    # Lectura inicial + doble comprobación en el lock; el fallback sólo lee el respaldo
+    assert reads == [key, key, f"{key}:backup"]
+
+
+def test_odoo_failure_without_backup_raises(monkeypatch):
+    def failing_connector():
+        raise ConnectionError("odoo down")
+
+    monkeypatch.setattr(argus_service, "_get_connector", failing_connector)
+    with pytest.raises(ConnectionError):
+        argus_service.get_argus_news_detail(992)
@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+
+from app.audit.audit_pipeline import AuditPipeline, AuditSink
+
+
+class _ListSink(AuditSink):
+    name = "list"
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, batch):
+        self.events.extend(batch)
+
+
+class _FailingSink(AuditSink):
+    name = "failing"
+
+    def write(self, batch):
+        raise RuntimeError("down")
+
+
+def _pipeline(*sinks):
+    return AuditPipeline(list(sinks), queue_size=10, batch_size=10, flush_interval=0.01)
+
+
+def test_sink_without_write_fails_on_creation():
+    class _NoWrite(AuditSink):
+        name = "broken"
+
+    with pytest.raises(TypeError):
+        _NoWrite()
+
+
+def test_batch_counts_as_written_if_any_sink_accepts():
+    good = _ListSink()
+    p = _pipeline(_FailingSink(), good)
+    p._write([{"a": 1}, {"a": 2}])
+    st = p.stats()
+    assert st["written"] == 2
+    assert st["dropped_sink_error"] == 2
+    assert len(good.events) == 2
+
+
+def test_batch_not_written_when_every_sink_fails(caplog):
+    p = _pipeline(_FailingSink())
+    with caplog.at_level(logging.WARNING, logger="app.audit.pipeline"):
+        p._write([{"a": 1}])
+    st = p.stats()
+    assert st["written"] == 0
+    assert st["dropped_sink_error"] == 1
+    assert any(r.getMessage() == "audit.sink_failed" and r.sink == "failing" for r in caplog.records)
@@ -0,0 +1,44 @@
+import logging
+from contextlib import contextmanager
+from datetime import date
+
+from app.audit import audit_store
+
+
+class _FakeEngine:
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, *args):
+        self.statements.append(str(statement))
+
+
+def test_maintain_partitions_creates_drops_and_logs(monkeypatch, caplog):
+    fake = _FakeEngine()
+    monkeypatch.setattr(audit_store, "engine", fake)
+    monkeypatch.setattr(audit_store, "_is_mysql", lambda: True)
+    monkeypatch.setattr(audit_store, "AUDIT_RETENTION_DAYS", 2)
+    monkeypatch.setattr(audit_store, "AUDIT_PARTITION_DAYS_AHEAD", 1)
+    monkeypatch.setattr(
+        audit_store,
+        "list_partitions",
+        lambda: [{"name": n} for n in ("p20250101", "p20250102", "p20250103", "p_future")],
+    )
+
+    with caplog.at_level(logging.INFO, logger="app.audit.store"):
+        result = audit_store.maintain_partitions(today=date(2025, 1, 4))
+
+    assert result == {
+        "partitioned": True,
+        "created": ["p20250104", "p20250105"],
+        "dropped": ["p20250101"],
+    }
+    assert any("REORGANIZE PARTITION p_future" in s for s in fake.statements)
+    assert any("DROP PARTITION p20250101" in s for s in fake.statements)
+    record = next(r for r in caplog.records if r.getMessage() == "audit.partitions")
+    assert record.partitions_created == ["p20250104", "p20250105"]
+    assert record.partitions_dropped == ["p20250101"]
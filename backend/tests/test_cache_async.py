@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from app.utils.adapters import cache_adapter as cache
+
+pytest.importorskip("redis.asyncio")
+
+
+async def _client():
+    return cache._get_aredis()
+
+
+def test_async_client_is_kept_per_event_loop(monkeypatch):
+    # Crear el cliente no abre conexiones: basta una URL cualquiera
+    monkeypatch.setattr(cache, "_redis_enabled", True)
+    monkeypatch.setattr(cache, "REDIS_URL", "redis://127.0.0.1:1/0")
+    monkeypatch.setattr(cache, "_aredis_clients", type(cache._aredis_clients)())
+
+    loop_a, loop_b = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        a1 = loop_a.run_until_complete(_client())
+        b = loop_b.run_until_complete(_client())
+        a2 = loop_a.run_until_complete(_client())
+        assert a1 is a2  # volver a un loop no crea (ni filtra) otro pool
+        assert a1 is not b
+        assert len(cache._aredis_clients) == 2
+
+        loop_a.run_until_complete(cache.aclose_cache())
+        assert loop_a not in cache._aredis_clients
+    finally:
+        loop_a.close()
+        loop_b.close()
+
+    loop_c = asyncio.new_event_loop()
+    try:
+        loop_c.run_until_complete(_client())
+        # Los loops cerrados se descartan al crear el siguiente cliente
+        assert list(cache._aredis_clients.keys()) == [loop_c]
+    finally:
+        loop_c.close()
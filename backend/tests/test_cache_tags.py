@@ -0,0 +1,43 @@
+from app.core.auth import session_manager
+from app.utils.adapters import cache_adapter as cache
+
+
+def test_invalidate_tags_removes_only_tagged_keys():
+    cache.set_cache("t:a", 1, 60, tags=("user:1",))
+    cache.set_cache("t:b", 2, 60, tags=("user:1", "session:x"))
+    cache.set_cache("t:c", 3, 60, tags=("user:2",))
+
+    assert cache.invalidate_tags("user:1") == 2
+    assert cache.get_cache("t:a") is None
+    assert cache.get_cache("t:b") is None
+    assert cache.get_cache("t:c") == 3
+    # La etiqueta ya se consumió
+    assert cache.invalidate_tags("user:1") == 0
+
+
+def test_invalidate_tags_skips_expired_members(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, "_now", lambda: now[0])
+    cache.set_cache("t:short", 1, 5, tags=("user:3",))
+    now[0] += 10
+    assert cache.invalidate_tags("user:3") == 0
+
+
+def test_session_invalidation_also_drops_untagged_key():
+    # Entrada escrita sin etiqueta (anterior a las etiquetas)
+    cache.set_cache("session:active:abc", True, 60)
+    session_manager.invalidate_session_cache("abc")
+    assert cache.get_cache("session:active:abc") is None
+
+
+def test_user_invalidation_drops_rbac_and_profile():
+    roles_key, perms_key = session_manager.rbac_cache_keys(7)
+    cache.set_cache(roles_key, ["admin"], 60, tags=(session_manager.user_cache_tag(7),))
+    cache.set_cache(perms_key, ["due.view"], 60)
+    cache.set_cache("profile:7", {"id": 7}, 60)
+    cache.set_cache("session:active:s7", True, 60, tags=("session:s7", session_manager.user_cache_tag(7)))
+
+    session_manager.invalidate_user_cache(7)
+
+    for key in (roles_key, perms_key, "profile:7", "session:active:s7"):
+        assert cache.get_cache(key) is None
@@ -0,0 +1,47 @@
+from app.integrations.odoo import odoo_connector
+from app.integrations.odoo.odoo_connector import OdooConnector
+
+
+def _connector(monkeypatch, calls):
+    conn = OdooConnector("https://odoo.test", "db", "user", "secret")
+    conn._uid = 7
+
+    def execute_kw(model, method, args, kwargs):
+        calls.append((model, method))
+        if method == "fields_get":
+            return {"id": {}, "name": {}}
+        return [{"tz": "Europe/Madrid"}]
+
+    monkeypatch.setattr(conn, "_execute_kw", execute_kw)
+    monkeypatch.setattr(conn, "warm_metadata", lambda models=None: {})
+    return conn
+
+
+def test_metadata_memo_avoids_shared_cache_reads(monkeypatch):
+    calls, reads = [], []
+    real_get = odoo_connector.get_cache
+    monkeypatch.setattr(odoo_connector, "get_cache", lambda key: reads.append(key) or real_get(key))
+    conn = _connector(monkeypatch, calls)
+
+    for _ in range(3):
+        assert conn.get_user_tz() == "Europe/Madrid"
+        assert conn._get_model_fields("crm.lead") == {"id", "name"}
+    assert len(calls) == 2
+    assert len(reads) == 2  # sólo el primer acceso a cada nombre
+
+    # Otro conector del mismo servidor lo toma de la caché compartida
+    other = _connector(monkeypatch, calls)
+    assert other.get_user_tz() == "Europe/Madrid"
+    assert len(calls) == 2
+
+
+def test_refresh_metadata_clears_memo(monkeypatch):
+    calls = []
+    conn = _connector(monkeypatch, calls)
+    conn.get_user_tz()
+    before = len(calls)
+    conn.refresh_metadata()
+    assert conn._meta_memo == {}
+    conn._uid = 7
+    conn.get_user_tz()
+    assert len(calls) == before + 1
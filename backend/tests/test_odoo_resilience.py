@@ -0,0 +1,120 @@
+import xmlrpc.client
+
+import pytest
+
+from app.integrations.odoo.odoo_resilience import AdaptiveLimiter, CircuitBreaker, OdooGuard
+from app.utils.exceptions import OdooUnavailableError
+
+
+def _breaker(open_seconds=60.0, probes=1):
+    return CircuitBreaker("test", failure_threshold=3, open_seconds=open_seconds, half_open_probes=probes)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    b = _breaker()
+    b.record_failure()
+    b.record_failure()
+    b.record_success()  # un éxito reinicia la cuenta
+    b.record_failure()
+    b.record_failure()
+    assert b.state == CircuitBreaker.CLOSED
+    b.record_failure()
+    assert b.state == CircuitBreaker.OPEN
+    assert not b.allow()
+    assert 0 < b.retry_after() <= 60.0
+    assert b.opened_total == 1
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    b = _breaker(open_seconds=0.0)
+    for _ in range(3):
+        b.record_failure()
+    assert b.state == CircuitBreaker.HALF_OPEN
+    assert b.allow()
+    assert not b.allow()  # un solo hueco de prueba
+    b.record_success()
+    assert b.state == CircuitBreaker.CLOSED
+    assert b.allow()
+
+
+def test_breaker_half_open_probe_failure_reopens():
+    b = _breaker(open_seconds=60.0)
+    for _ in range(3):
+        b.record_failure()
+    b.open_seconds = 0.0
+    assert b.allow()
+    b.open_seconds = 60.0
+    b.record_failure()
+    assert b.state == CircuitBreaker.OPEN
+    assert b.opened_total == 2
+
+
+def test_breaker_release_frees_probe_slot():
+    b = _breaker(open_seconds=0.0)
+    for _ in range(3):
+        b.record_failure()
+    assert b.allow()
+    b.release()
+    assert b.state == CircuitBreaker.HALF_OPEN
+    assert b.allow()
+
+
+def _limiter(**kw):
+    opts = dict(initial=4, min_limit=1, max_limit=6, latency_target=60.0)
+    opts.update(kw)
+    return AdaptiveLimiter("test", **opts)
+
+
+def test_limiter_rejects_when_full():
+    lim = _limiter(initial=2)
+    assert lim.acquire(0) and lim.acquire(0)
+    assert not lim.acquire(0)
+    assert lim.rejected_total == 1
+    assert lim.inflight == 2
+
+
+def test_limiter_grows_only_when_used():
+    lim = _limiter()
+    lim.acquire(0)
+    lim.release(0.01)  # 1 en vuelo de 4: no aporta información
+    assert lim.snapshot()["limit_exact"] == 4.0
+    for _ in range(2):
+        lim.acquire(0)
+    lim.release(0.01)
+    assert lim.snapshot()["limit_exact"] == 4.25
+
+
+def test_limiter_backs_off_once_per_window():
+    lim = _limiter(initial=6)
+    for _ in range(3):
+        lim.acquire(0)
+    lim.release(0.01, overloaded=True)
+    assert lim.snapshot()["limit_exact"] == pytest.approx(4.2)
+    # Segundo timeout de la misma ráfaga: sin nueva reducción
+    lim.release(0.01, overloaded=True)
+    assert lim.snapshot()["limit_exact"] == pytest.approx(4.2)
+    assert lim.limit == 4
+
+
+def test_limiter_respects_min_limit():
+    lim = _limiter(initial=1, latency_target=0.0)
+    lim.acquire(0)
+    lim.release(5.0)
+    assert lim.limit == 1
+
+
+def test_guard_fault_counts_as_success_and_transport_error_as_failure():
+    guard = OdooGuard("test")
+    guard.breaker = _breaker()
+    with pytest.raises(xmlrpc.client.Fault):
+        with guard.call("res.partner", "read"):
+            raise xmlrpc.client.Fault(1, "bad")
+    assert guard.breaker.snapshot()["consecutive_failures"] == 0
+    for _ in range(3):
+        with pytest.raises(OSError):
+            with guard.call("res.partner", "read"):
+                raise ConnectionRefusedError()
+    with pytest.raises(OdooUnavailableError):
+        with guard.call("res.partner", "read"):
+            pass
+    assert guard.limiter.inflight == 0
@@ -0,0 +1,27 @@
+import json
+
+from app.integrations.odoo.odoo_router import _stream_json_array
+
+
+def _body(first, rest):
+    return b"".join(_stream_json_array(first, iter(rest))).decode("utf-8")
+
+
+def test_stream_is_valid_json_array():
+    body = _body([{"id": 1}, {"id": 2}], [[{"id": 3, "name": "Año"}], [{"id": 4}]])
+    assert json.loads(body) == [{"id": 1}, {"id": 2}, {"id": 3, "name": "Año"}, {"id": 4}]
+
+
+def test_stream_skips_empty_chunks():
+    assert json.loads(_body([], [[], [{"id": 1}], [], [{"id": 2}]])) == [{"id": 1}, {"id": 2}]
+    assert _body([], []) == "[]"
+
+
+def test_stream_error_cuts_response():
+    def rest():
+        yield [{"id": 2}]
+        raise ConnectionError("odoo down")
+
+    body = b"".join(_stream_json_array([{"id": 1}], rest())).decode("utf-8")
+    # Sin "]" final: el cliente detecta la respuesta incompleta
+    assert body == '[{"id":1},{"id":2}'
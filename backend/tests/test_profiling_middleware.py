@@ -0,0 +1,30 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.middleware.profiling_middleware import ProfilingMiddleware
+from app.core.middleware.request_id_middleware import RequestIdMiddleware
+from app.observability import profiler
+
+
+def test_profile_id_is_server_generated(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILER_SECRET", "test-secret")
+    app = FastAPI()
+
+    @app.get("/work")
+    def work():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    token, _ = profiler.sign_request_token("GET", "/work", 60)
+
+    with TestClient(app) as client:
+        resp = client.get("/work", headers={profiler.TOKEN_HEADER: token, "X-Request-ID": "profiler:request:x"})
+
+    assert resp.status_code == 200
+    profile_id = resp.headers[profiler.ID_HEADER]
+    assert profile_id != "profiler:request:x"
+    assert len(profile_id) == 32
+    saved = profiler.get_request_profile(profile_id)
+    assert saved is not None
+    assert saved["path"] == "/work" and saved["status"] == 200
@@ -0,0 +1,84 @@
+from typing import List
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import release_router
+from app.core.middleware.request_timing_middleware import RequestTimingMiddleware
+from app.db.database import Base
+from app.db.models import Release, ReleaseSection
+from app.observability.query_counter import assert_max_queries, instrument_engine, statement_shape
+
+RELEASES = 6
+
+
+@pytest.mark.parametrize(
+    "statement, shape",
+    [
+        ("SELECT a\n  FROM t\tWHERE id = ?", "SELECT a FROM t WHERE id = ?"),
+        ("SELECT a FROM t WHERE id IN (?, ?, ?)", "SELECT a FROM t WHERE id IN (...)"),
+        (
+            "SELECT a FROM t WHERE id IN (%(id_1_1)s,  %(id_1_2)s) AND b IN ('x', 'y''z', NULL, -1.5)",
+            "SELECT a FROM t WHERE id IN (...) AND b IN (...)",
+        ),
+        ("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)", "INSERT INTO t (a, b) VALUES (?, ?), ..."),
+        # Subconsultas no son listas de parámetros
+        ("SELECT a FROM t WHERE id IN (SELECT id FROM u)", "SELECT a FROM t WHERE id IN (SELECT id FROM u)"),
+    ],
+)
+def test_statement_shape(statement, shape):
+    assert statement_shape(statement) == shape
+
+
+@pytest.fixture(scope="module")
+def client():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    Base.metadata.create_all(engine, tables=[Release.__table__, ReleaseSection.__table__])
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for i in range(RELEASES):
+            release = Release(title=f"r{i}", version=f"1.{i}", type="fix")
+            release.sections.append(ReleaseSection(title="s", content="c", position=0))
+            db.add(release)
+        db.commit()
+
+    def get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(release_router.router)
+    app.dependency_overrides[release_router.get_db] = get_db
+
+    # Igual que list_releases pero sin selectinload: una query de secciones por release
+    @app.get("/lazy-releases", response_model=List[release_router.ReleaseOut])
+    def lazy_releases(db=Depends(get_db)):
+        return db.query(Release).order_by(Release.created_at.desc()).all()
+
+    app.add_middleware(RequestTimingMiddleware)
+    with TestClient(app) as c:
+        yield c
+    engine.dispose()
+
+
+def test_list_releases_loads_sections_in_one_query(client):
+    with assert_max_queries(2) as log:
+        resp = client.get("/releases?limit=20")
+    assert resp.status_code == 200
+    assert len(resp.json()) == RELEASES
+    assert all(r["sections"] for r in resp.json())
+    assert log.count == 2
+
+
+def test_lazy_loading_exceeds_limit(client):
+    with pytest.raises(AssertionError, match=rf"{RELEASES + 1} queries ejecutadas, máximo 2"):
+        with assert_max_queries(2):
+            client.get("/lazy-releases")
@@ -0,0 +1,64 @@
+import httpx
+import pytest
+
+from app.observability import tracing
+from app.utils.logging_config import correlation_id
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_FILE", "/dev/null")
+
+
+def test_request_id_does_not_become_trace_id(enabled):
+    rid = "ab" * 16
+    span, token = tracing.begin_request("GET", "/x", None, rid)
+    try:
+        assert span.trace.trace_id != rid
+        assert span.attributes["http.request_id"] == rid
+    finally:
+        tracing.end_request(span, token, status=200, route="/x")
+
+
+def test_traceparent_continues_trace_and_sampling(enabled, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    tp = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    span, token = tracing.begin_request("GET", "/x", tp, None)
+    try:
+        assert span.trace.trace_id == "0af7651916cd43dd8448eb211c80319c"
+        assert span.parent_id == "b7ad6b7169203331"
+        assert span.trace.sampled
+    finally:
+        tracing.end_request(span, token, status=200, route="/x")
+    assert tracing.begin_request("GET", "/x", tp[:-2] + "00", None) is None
+
+
+def test_httpx_hooks_record_span_and_propagate_ids(enabled):
+    seen = {}
+
+    def handler(request):
+        seen.update(request.headers)
+        return httpx.Response(200)
+
+    span, token = tracing.begin_request("GET", "/x", None, None)
+    cid_token = correlation_id.set("cid-1")
+    try:
+        with httpx.Client(transport=httpx.MockTransport(handler), event_hooks=tracing.httpx_event_hooks()) as c:
+            c.get("http://n8n.local/hook?q=1")
+    finally:
+        correlation_id.reset(cid_token)
+        tracing.end_request(span, token, status=200, route="/x")
+    client_spans = [s for s in span.trace.finished() if s.kind == tracing.KIND_CLIENT]
+    assert len(client_spans) == 1
+    assert client_spans[0].parent_id == span.span_id
+    assert client_spans[0].attributes["url.full"] == "http://n8n.local/hook"
+    assert seen["x-request-id"] == "cid-1"
+    assert seen["traceparent"] == client_spans[0].traceparent()
+
+
+def test_httpx_hooks_keep_env_proxies(monkeypatch):
+    monkeypatch.setenv("HTTPS_PROXY", "http://proxy.local:3128")
+    with httpx.Client(event_hooks=tracing.httpx_event_hooks()) as c:
+        assert c._mounts, "los proxies de entorno deben seguir montados"